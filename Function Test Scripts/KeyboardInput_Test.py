@@ -10,8 +10,30 @@
 import board                                              # IMPORTS IMPORTANT DATA FOR THE RP2040
 from digitalio import DigitalInOut, Direction, Pull       # IMPORTS ABILITY TO MANIPULATE PICO PINS
 import analogio                                           # IMPORTS USAGE OF ANALOG PINS ON PICO
+try:
+    import analogbufio                                    # IMPORTS BUFFERED CAPTURES FROM THE ANALOG PINS
+except ImportError:
+    analogbufio = None
 import array                                              # IMPORTS ABILITY TO USE DATA ARRAYS
 import time                                               # IMPORTS USAGE OF SYTEM TIME
+import struct                                             # IMPORTS PACKING OF BINARY DATA
+import sys                                                # IMPORTS READING FROM THE SERIAL CONSOLE
+try:
+    import microcontroller                                # IMPORTS ACCESS TO THE PICO'S NON-VOLATILE MEMORY
+except ImportError:
+    microcontroller = None
+try:
+    import asyncio                                        # IMPORTS COOPERATIVE TASKS FOR THE TASK RUNTIME
+except ImportError:
+    asyncio = None
+try:
+    import supervisor                                     # IMPORTS CHECKING FOR SERIAL CONSOLE INPUT
+except ImportError:
+    supervisor = None
+try:
+    import usb_cdc                                        # IMPORTS THE SECOND USB SERIAL PORT FOR TELEMETRY
+except ImportError:
+    usb_cdc = None
 import usb_hid                                            # IMPORTS KEYBOARD FUNCTIONALITY
 from adafruit_hid.keyboard import Keyboard
 from adafruit_hid.keycode import Keycode
@@ -50,50 +72,421 @@ allowKbPin.pull = Pull.UP
 numOfSensorRows = 12
 numOfSensorCols = 8
 numOfSensors = 96
+"""CONSTANTS FOR THE GRAY-CODE MUX SCAN ENGINE"""
+# ORDER TO VISIT THE SENSOR ROWS IN. EACH ROW NUMBER ONLY DIFFERS FROM THE NEXT BY ONE BIT,
+# SO MOVING TO THE NEXT ROW ONLY TOGGLES ONE OUTPUT MUX PIN
+grayRowOrder = (4, 5, 7, 6, 2, 3, 1, 0, 8, 9, 11, 10)
+# ORDER TO VISIT THE SENSOR COLUMNS IN (3-BIT GRAY CODE). EVERY OTHER ROW WALKS THIS IN
+# REVERSE, SO THE COLUMN STAYS THE SAME WHEN THE SCAN MOVES TO A NEW ROW
+grayColOrder = (0, 1, 3, 2, 6, 7, 5, 4)
+"""CONSTANTS FOR THE SENSOR READ PATH"""
+readSettleTime = 0              # microseconds to wait after the mux pins change, before reading a sensor
+readOversampleShift = 0         # 2^shift samples are summed and shifted back down for every reading (0 = one sample)
+settleAutoTuneEnabled = False   # when True, the settle time of each row is measured at startup
+settleTuneMaxTime = 200         # longest settle time tried by the auto-tune, in microseconds
+settleTuneStep = 5              # step between the settle times tried by the auto-tune, in microseconds
+settleTuneRepeats = 4           # times every sensor in a row is checked for each settle time tried
+settleTuneTolerance = 64        # most a settled reading can differ from a fully settled one, in ADC units
+bulkCaptureEnabled = False      # when True, every reading is a burst of 2^readOversampleShift samples captured by analogbufio
+bulkSampleRate = 500000         # samples per second of the bulk captures (the RP2040's ADC tops out at 500000)
+bulkSampleBits = 12             # bits in every captured sample. Readings are scaled up to the 16 bits AnalogIn gives
 """CONSTANTS FOR KEYPRESS FUNCTIONS"""
+# PANEL INDEXES IN THE DDR LAYOUT
 UpIndex = 0
 RightIndex = 1
 DownIndex = 2
 LeftIndex = 3
+# PANEL INDEXES IN THE PIU LAYOUT
+UpLeftIndex = 0
+UpRightIndex = 1
+CenterIndex = 2
+DownRightIndex = 3
+DownLeftIndex = 4
+# GAME STYLES, EACH ONE IS THE INDEX OF ITS LAYOUT IN panelLayoutDefinitions
 StyleDDR = 0
 StylePIU = 1
+StyleCustom = 2
+"""CONSTANTS FOR THE HID REPORTS"""
+# WHICH USB HID DEVICES THE PRESSES ARE SENT TO. THE GAMEPAD IS SET UP IN boot.py
+HidModeKeyboard = 0
+HidModeGamepad = 1
+HidModeBoth = 2
+hidOutputMode = HidModeKeyboard
+batchedReportsEnabled = True    # when True, all key changes in a frame are sent as one keyboard report
+keyboardReportLength = 8        # bytes in a boot keyboard report: modifiers, reserved, then 6 keycodes
+keyboardReportKeySlots = 6      # keycodes that fit in one keyboard report
+"""CONSTANTS FOR THE SENSOR TELEMETRY"""
+# WHEN ENABLED, A BINARY PACKET IS SENT OVER THE usb_cdc DATA PORT (SET UP IN boot.py) AT MOST ONCE EVERY
+# telemetryInterval. A PACKET IS A HEADER, THEN EVERY SENSOR'S CURRENT VALUE, THEN THE WHOLE INTERLEAVED
+# (threshold, high, low) CALIBRATION, THEN THE DETECTION BITMAP, THEN THE SEQUENCE NUMBER AGAIN SO A PACKET THAT
+# WAS CUT SHORT CAN BE SPOTTED. ALL VALUES ARE LITTLE-ENDIAN 16-BIT NUMBERS
+telemetryEnabled = False        # when True, sensor telemetry is sent over the usb_cdc data port
+telemetryInterval = 20000000    # nanoseconds between telemetry packets (20ms = 50 packets a second)
+telemetryMagic = b"VT"          # marks the start of every telemetry packet
+telemetryFormatVersion = 1      # change this if the packet layout ever changes
+telemetryHeaderFormat = "<2sBBBBHI"  # magic, format version, rows, columns, panel presses bitmask, sequence, time in ms
+telemetryTrailerFormat = "<H"   # sequence, repeated at the end of the packet
+"""CONSTANTS FOR THE FRAME SCHEDULER"""
+framePeriod = 2000000           # nanoseconds from the start of one frame to the next (0 = run as fast as possible)
+"""CONSTANTS FOR THE ASYNCIO TASK RUNTIME"""
+asyncRuntimeEnabled = False     # when True, the main loop runs as cooperative asyncio tasks instead of one loop
+buttonPollInterval = 20         # milliseconds between checks of the calibration button and keyboard switch
+ledRenderInterval = 16          # milliseconds between LED frames
+lowPriorityGuard = 500000       # nanoseconds that must be left before the next frame for a low priority task to run
+"""CONSTANTS FOR THE FRAME PROFILER"""
+profilingEnabled = False        # when True, the time taken by every stage of the main loop is recorded
+profileBufferSize = 128         # frames kept for every stage (the oldest frames are overwritten)
+profileRequestKey = "p"         # sending this character over the serial console prints the profile
+# STAGES OF THE MAIN LOOP THAT ARE TIMED
+ProfileStageReset = 0           # calibration button check and incremental recalibration
+ProfileStagePresses = 1         # sensor scan and threshold check (done in one pass)
+ProfileStageRegions = 2         # summed-area tables
+ProfileStageArrows = 3          # arrow hit counts and debounce
+ProfileStageKeyboard = 4        # keyboard reports
+ProfileStageSave = 5            # periodic calibration save
+ProfileStageFrame = 6           # all of the above, for the whole frame
+profileStageNames = ("reset", "presses", "regions", "arrows", "keyboard", "save", "frame")
+"""CONSTANTS FOR THE PANEL LAYOUTS"""
+# EVERY LAYOUT IS ONLY DATA: A NAME, AND ONE ENTRY PER PANEL OF (name, region, press limit, release limit, keycode).
+# A REGION IS (first row, last row + 1, first column, last column + 1) OF THE SENSOR MATRIX.
+# A PANEL IS PRESSED WHEN MORE THAN ITS PRESS LIMIT OF SENSORS IN ITS REGION DETECT A PRESS, AND RELEASED ONCE
+# ITS RELEASE LIMIT OR FEWER DO. THE GAP BETWEEN THE TWO LIMITS IS THE HYSTERESIS BAND. A KEYCODE OF 0 SENDS NO KEY.
+# TO ADD A LAYOUT, ADD IT TO THE END OF panelLayoutDefinitions. ITS POSITION THERE IS ITS GAME STYLE
+maxPanels = 8                   # most panels in one layout (one bit each in the gamepad report)
+layoutDDR = ("DDR", (
+    ("up",        (0, 4, 2, 6),   3, 1, Keycode.UP_ARROW),
+    ("right",     (4, 8, 5, 8),   3, 1, Keycode.RIGHT_ARROW),
+    ("down",      (8, 12, 2, 6),  3, 1, Keycode.DOWN_ARROW),
+    ("left",      (4, 8, 0, 3),   3, 1, Keycode.LEFT_ARROW),
+))
+layoutPIU = ("PIU", (
+    ("upLeft",    (0, 4, 0, 3),   3, 1, Keycode.Q),
+    ("upRight",   (0, 4, 5, 8),   3, 1, Keycode.E),
+    ("center",    (4, 8, 2, 6),   3, 1, Keycode.S),
+    ("downRight", (8, 12, 5, 8),  3, 1, Keycode.C),
+    ("downLeft",  (8, 12, 0, 3),  3, 1, Keycode.Z),
+))
+# EXAMPLE OF A CUSTOM LAYOUT: THE DDR ARROWS, WITH THE MIDDLE OF THE PAD AS AN ENTER KEY
+layoutCustom = ("DDR + center", layoutDDR[1] + (
+    ("center",    (4, 8, 3, 5),   2, 0, Keycode.ENTER),
+))
+panelLayoutDefinitions = (layoutDDR, layoutPIU, layoutCustom)
+activeGameStyle = StyleDDR      # game style used at startup
+summedAreaTablesEnabled = False    # when True, the summed-area tables are rebuilt every frame for region queries
+"""CONSTANTS FOR PRESSURE SCORING"""
+pressureScoringEnabled = False  # when True, panels are pressed on their summed pressure instead of their hit count
+pressureScaleBits = 16          # fractional bits of each sensor's fixed-point pressure scale
+pressureMinSpan = 1000          # smallest high - low span used to scale a sensor, so an unlearned high cannot inflate it
+# A FULLY PRESSED SENSOR SCORES 255. A PANEL IS PRESSED WHEN ITS SUMMED SCORE IS ABOVE THE PRESS SCORE, AND
+# RELEASED ONCE IT IS AT OR BELOW THE RELEASE SCORE. A PANEL ENTRY IN A LAYOUT CAN OVERRIDE BOTH WITH A SIXTH
+# AND SEVENTH VALUE
+pressurePressScore = 384
+pressureReleaseScore = 128
+"""CONSTANTS FOR THE PANEL DEBOUNCE"""
+debounceEnabled = True          # when False, every frame's raw region check is sent straight to the keyboard
+pressConfirmFrames = 2          # frames in a row above the press limit before a press is sent
+releaseConfirmFrames = 2        # frames in a row at or below the release limit before a release is sent
+minHoldFrames = 3               # frames a press is held for at the least before it can be released
+minReleaseFrames = 2            # frames a release is held for at the least before the panel can be pressed again
+maxAddedLatency = 25            # milliseconds a change can be pending for before it needs fewer confirming frames
+lateConfirmFrames = 2           # frames in a row that still confirm a change pending for maxAddedLatency (at least 2)
+# DEBOUNCE STATES OF A PANEL
+DebounceReleased = 0
+DebouncePressPending = 1
+DebouncePressed = 2
+DebounceReleasePending = 3
+# CLASSES OF A PANEL'S HIT COUNT: AT OR BELOW THE RELEASE LIMIT, IN THE HYSTERESIS BAND, ABOVE THE PRESS LIMIT
+DebounceBelowRelease = 0
+DebounceInBand = 1
+DebounceAbovePress = 2
+# NEXT STATE OF A PANEL, INDEXED BY (state * 3) + hit count class
+debounceNextState = bytes((
+    DebounceReleased, DebounceReleased, DebouncePressPending,               # RELEASED
+    DebounceReleased, DebouncePressPending, DebouncePressPending,           # PRESS PENDING
+    DebounceReleasePending, DebouncePressed, DebouncePressed,               # PRESSED
+    DebounceReleasePending, DebounceReleasePending, DebouncePressed,        # RELEASE PENDING
+))
+# FOR EACH STATE: THE HIT COUNT CLASS THAT CONFIRMS IT, THE STATE IT IS CONFIRMED INTO, THE NUMBER OF
+# CONFIRMING FRAMES NEEDED, AND THE FRAMES THE LAST CONFIRMED STATE MUST HAVE BEEN HELD FOR.
+# ONLY THE PENDING STATES CAN BE CONFIRMED
+debounceConfirmClass = bytes((255, DebounceAbovePress, 255, DebounceBelowRelease))
+debounceConfirmState = bytes((DebounceReleased, DebouncePressed, DebouncePressed, DebounceReleased))
+debounceConfirmFrames = bytes((0, pressConfirmFrames, 0, releaseConfirmFrames))
+debounceMinFrames = bytes((0, minReleaseFrames, 0, minHoldFrames))
+"""CONSTANTS FOR THE DOUBLE-BUFFERED SENSOR FRAMES"""
+doubleBufferEnabled = False     # when True, frames are read into a back buffer and checked in a separate pass
+"""CONSTANTS FOR THE ACTIVITY-ADAPTIVE SCAN SCHEDULER"""
+# WHEN TRUE, IDLE REGIONS ARE ONLY READ EVERY idleScanInterval FRAMES. THIS SAVES READS, BUT A PRESS THAT STARTS
+# ON AN IDLE REGION CAN BE SEEN UP TO idleScanInterval - 1 FRAMES LATER THAN WITH EVERY REGION READ ON EVERY FRAME
+adaptiveScanEnabled = False     # when False, every panel region is read on every frame
+idleScanInterval = 4            # idle regions are read once every this many frames (the most frames a sensor can be stale)
+scanHotMargin = 1               # a region is "hot" if a press is found inside it, or this many sensors around it
+scanHotPressure = 32            # with pressure scoring, a region is also "hot" while its summed pressure is above this
+"""CONSTANTS FOR CALIBRATION"""
+thresholdPercentage = 0.35      # constant that determines where inbetween high/low the threshold should be
+lowOffsetValue = 5              # amount to shift calibration amount to account for drift/noise
+fastCalibrationEnabled = True   # when True, calibration samples the whole matrix per pass instead of one sensor at a time
+calibrationMaxPasses = 16       # most full-matrix passes taken by the fast calibration
+calibrationMinPasses = 4        # passes taken before the fast calibration is allowed to stop early
+calibrationPassDelay = 0.002    # seconds to wait between passes, to let the sensors settle
+calibrationVarianceLimit = 16   # stop early once every sensor's variance (in ADC units squared) is below this
+incrementalRecalibrationEnabled = True  # when True, the calibration button recalibrates a few sensors per frame instead of blocking
+recalibrationSliceSize = 8      # sensors sampled per frame by the incremental recalibration
+recalibrationSamples = 4        # samples taken of every sensor by the incremental recalibration
+"""CONSTANTS FOR BASELINE DRIFT TRACKING"""
+driftTrackingEnabled = True     # when True, idle sensors keep updating their low value and threshold
+driftTimeConstant = 60          # seconds the baseline takes to move about 63% of the way to a new idle level
+driftFilterShift = 12           # each baseline update moves 1/(2^shift) of the way to the idle reading
+driftFractionBits = 12          # fractional bits kept in each tracked baseline (at least driftFilterShift, so small differences still move it)
+driftNearLimit = 100            # an idle reading only updates the baseline if it is within this of the current low value
+driftUnpacedFramePeriod = 1000000   # nanoseconds a frame is assumed to take when framePeriod is 0
+highDecayInterval = 256         # frames between each decay step of idle sensors' high values
+highDecayShift = 6              # each decay step moves the high value 1/(2^shift) of the way down to the low value
+highDecayMinSpan = 1000         # high values never decay closer than this to the low value
+"""CONSTANTS FOR THE SAVED CALIBRATION"""
+calibrationMagic = b"VPCL"          # marks the start of a saved calibration
+calibrationFormatVersion = 1        # change this if the saved layout ever changes
+calibrationHeaderFormat = "<4sBBBHH"  # magic, format version, rows, columns, payload length, checksum
+calibrationFilePath = "calibration.bin"  # file used instead of the NVM when the NVM is not available
+calibrationDriftLimit = 200         # a sensor has drifted if its idle reading is this far from its saved low value
+calibrationDriftCells = 4           # recalibrate if more than this many sensors have drifted
+calibrationSaveInterval = 300       # seconds between saves of newly learned calibration data (0 to disable)
+"""CONSTANTS FOR THE RAW FRAME RECORDER"""
+# A RECORDING IS A HEADER, THE SAVED FORM OF THE CALIBRATION IT STARTED FROM, THEN ONE RECORD PER FRAME:
+# THE TIME IN MILLISECONDS SINCE THE RECORDING STARTED, THEN EVERY SENSOR'S CURRENT VALUE AS A LITTLE-ENDIAN
+# 16-BIT NUMBER, IN ROW ORDER. boot.py MUST MAKE THE CIRCUITPY DRIVE WRITABLE FOR RECORDINGS TO BE SAVED.
+# EVERY RECORDED FRAME TAKES 4 + (2 * numOfSensors) BYTES: 196 FOR THE 12x8 MATRIX. AT A 2ms framePeriod THAT IS
+# ABOUT 98KB A SECOND, SO THE ROUGHLY 1MB CIRCUITPY DRIVE OF A PICO WOULD FILL IN ABOUT 10 SECONDS. A RECORDING TO
+# THE DRIVE STOPS AT recordingMaxBytes INSTEAD, SO THE DRIVE KEEPS ROOM FOR THE SAVED CALIBRATION. FOR LONGER
+# SESSIONS, ONLY RECORD EVERY FEW FRAMES (recordingDecimation), OR STREAM THE RECORDING OVER THE usb_cdc DATA PORT
+# TO A COMPUTER RUNNING CaptureRecording.py (recordingToSerial), WHICH HAS NO SIZE LIMIT
+recordingEnabled = False            # when True, every frame's raw sensor values are saved to recordingFilePath
+recordingToSerial = False           # when True, the recording is streamed over the usb_cdc data port instead (telemetry must be off)
+recordingFilePath = "recording.bin" # file the recording is written to (replaced on every startup)
+recordingMaxBytes = 524288          # a recording to the drive stops before growing past this (about 5 seconds of every frame)
+recordingDecimation = 1             # only every this many frames is recorded (1 = every frame)
+recordingMagic = b"VPRF"            # marks the start of a recording
+recordingFormatVersion = 1          # change this if the recording layout ever changes
+recordingHeaderFormat = "<4sBBBBH"  # magic, format version, rows, columns, game style, calibration snapshot length
+recordingFrameHeaderFormat = "<I"   # time of the frame in ms since the recording started
+recordingBufferFrames = 32          # frames kept in each of the two buffers. A full buffer is written out while the other fills
+recordingFlushGuard = 1000000       # nanoseconds that must be left before the next frame to write out a full buffer
+
+"""CONSTANTS FOR THE SENSOR MATRIX STORAGE"""
+# EACH SENSOR'S CALIBRATION DATA IS STORED AS ONE RECORD OF (threshold, high, low)
+ThresholdField = 0
+HighField = 1
+LowField = 2
+calibrationStride = 3
+
+"""CLASS THAT HOLDS ALL OF THE DATA FOR THE SENSOR MATRIX"""
+# ALL ADC VALUES ARE 16-BIT, SO EVERYTHING IS STORED IN PREALLOCATED 'H' ARRAYS.
+# THE CALIBRATION DATA IS INTERLEAVED, SO THE THRESHOLD, HIGH AND LOW VALUES OF A SENSOR SIT NEXT
+# TO EACH OTHER FOR THE HOT LOOP. A SENSOR'S RECORD STARTS AT (index * calibrationStride).
+# THE DETECTION DATA IS A PACKED BITMAP: ONE BYTE PER ROW, WITH ONE BIT PER COLUMN (SO AT MOST 8 COLUMNS)
+class SensorMatrix:
+    __slots__ = ("numOfRows", "numOfCols", "numOfSensors", "calibration", "current", "detection",
+                 "currentRows", "calibrationRows", "hitSummedArea", "pressureSummedArea", "baseline",
+                 "pressure", "pressureScale", "backCurrent", "backCurrentRows", "frontPrograms", "backPrograms")
+
+    def __init__(self, numOfRows, numOfCols):
+        self.numOfRows = numOfRows
+        self.numOfCols = numOfCols
+        self.numOfSensors = numOfRows * numOfCols
+        # ALLOCATE ALL STORAGE UP FRONT. A BYTEARRAY OF ZEROS IS COPIED IN AS RAW BYTES
+        self.calibration = array.array('H', bytearray(2 * calibrationStride * self.numOfSensors))
+        self.current = array.array('H', bytearray(2 * self.numOfSensors))
+        self.detection = bytearray(numOfRows)
+        # TRACKED IDLE BASELINE OF EVERY SENSOR, AS A FIXED-POINT VALUE WITH driftFractionBits FRACTIONAL BITS
+        self.baseline = array.array('I', bytearray(4 * self.numOfSensors))
+        # PRESSURE OF EVERY SENSOR (0-255), AND THE FIXED-POINT SCALE THAT TURNS (current - low) INTO IT
+        self.pressure = bytearray(self.numOfSensors)
+        self.pressureScale = array.array('I', bytearray(4 * self.numOfSensors))
+        # SUMMED-AREA TABLES OVER THE DETECTION BITMAP AND THE CURRENT VALUES, WITH AN EXTRA ROW/COLUMN OF ZEROS
+        self.hitSummedArea = array.array('B', bytearray((numOfRows + 1) * (numOfCols + 1)))
+        self.pressureSummedArea = array.array('I', bytearray(4 * (numOfRows + 1) * (numOfCols + 1)))
+        # MEMORYVIEW SLICES OF EACH ROW, SO A ROW CAN BE HANDED OUT WITHOUT COPYING
+        currentView = memoryview(self.current)
+        calibrationView = memoryview(self.calibration)
+        currentRows = []
+        calibrationRows = []
+        for rowCounter in range(numOfRows):
+            rowStart = rowCounter * numOfCols
+            currentRows.append(currentView[rowStart:rowStart + numOfCols])
+            calibrationRows.append(calibrationView[rowStart * calibrationStride:(rowStart + numOfCols) * calibrationStride])
+        self.currentRows = tuple(currentRows)
+        self.calibrationRows = tuple(calibrationRows)
+        # BACK BUFFER FOR THE DOUBLE-BUFFERED FRAMES, WITH ITS OWN ROW SLICES. EACH BUFFER ALSO KEEPS THE LIST OF
+        # SCAN PROGRAMS THAT WERE READ INTO IT, SO ONLY THOSE SENSORS ARE CHECKED
+        self.backCurrent = array.array('H', bytearray(2 * self.numOfSensors))
+        backView = memoryview(self.backCurrent)
+        self.backCurrentRows = tuple(backView[rowCounter * numOfCols:(rowCounter + 1) * numOfCols]
+                                     for rowCounter in range(numOfRows))
+        self.frontPrograms = []
+        self.backPrograms = []
+
+    # CONVERTS A ROW AND COLUMN INTO A FLAT SENSOR INDEX
+    def Index(self, row, col):
+        return (row * self.numOfCols) + col
+
+    # READ/WRITE ONE FIELD OF A SENSOR'S CALIBRATION RECORD, BY FLAT INDEX
+    def ReadCalibration(self, index, field):
+        return self.calibration[(index * calibrationStride) + field]
+    def WriteCalibration(self, index, field, value):
+        self.calibration[(index * calibrationStride) + field] = value
+
+    # READ/WRITE A SENSOR'S MOST RECENT READING, BY FLAT INDEX
+    def ReadCurrent(self, index):
+        return self.current[index]
+    def WriteCurrent(self, index, value):
+        self.current[index] = value
+
+    # READ/WRITE A SENSOR'S DETECTION BIT, BY ROW AND COLUMN
+    def ReadDetection(self, row, col):
+        return (self.detection[row] >> col) & 1
+    def WriteDetection(self, row, col, value):
+        if value == 1:
+            self.detection[row] |= (1 << col)
+        else:
+            self.detection[row] &= ~(1 << col)
+
+    # REPLACES THE WHOLE CALIBRATION ARRAY IN ONE STEP, AND RETURNS THE OLD ONE SO IT CAN BE REUSED.
+    # THE NEW ARRAY MUST BE THE SAME SIZE AS THE OLD ONE
+    def SwapCalibration(self, newCalibration):
+        oldCalibration = self.calibration
+        self.calibration = newCalibration
+        calibrationView = memoryview(newCalibration)
+        calibrationRows = []
+        for rowCounter in range(self.numOfRows):
+            rowStart = rowCounter * self.numOfCols * calibrationStride
+            calibrationRows.append(calibrationView[rowStart:rowStart + (self.numOfCols * calibrationStride)])
+        self.calibrationRows = tuple(calibrationRows)
+        return oldCalibration
+
+    # SWAPS THE FRONT AND BACK FRAME BUFFERS. ONLY THE REFERENCES ARE SWAPPED, SO NO DATA IS COPIED
+    def SwapFrames(self):
+        self.current, self.backCurrent = self.backCurrent, self.current
+        self.currentRows, self.backCurrentRows = self.backCurrentRows, self.currentRows
+        self.frontPrograms, self.backPrograms = self.backPrograms, self.frontPrograms
+
+    # RESTARTS THE TRACKED BASELINE OF EVERY SENSOR FROM ITS CURRENT LOW VALUE.
+    # THIS MUST BE CALLED WHENEVER THE LOW VALUES ARE REPLACED BY A CALIBRATION
+    def ResetBaselines(self):
+        for index in range(self.numOfSensors):
+            lowValue = self.ReadCalibration(index, LowField)
+            self.baseline[index] = max(lowValue - lowOffsetValue, 0) << driftFractionBits
+
+    # WORKS OUT THE PRESSURE SCALE OF EVERY SENSOR FROM ITS HIGH AND LOW VALUES, SO THE SCAN ONLY HAS TO
+    # MULTIPLY AND SHIFT. THIS MUST BE CALLED WHENEVER THE CALIBRATION IS REPLACED
+    def ResetPressureScales(self):
+        for index in range(self.numOfSensors):
+            span = self.ReadCalibration(index, HighField) - self.ReadCalibration(index, LowField)
+            self.pressureScale[index] = (255 << pressureScaleBits) // max(span, pressureMinSpan)
+
+    # SETS ONE CALIBRATION FIELD TO THE SAME VALUE FOR EVERY SENSOR
+    def FillCalibration(self, field, value):
+        calibration = self.calibration
+        for index in range(field, len(calibration), calibrationStride):
+            calibration[index] = value
+
+"""CLASS THAT HOLDS A PANEL LAYOUT, COMPILED INTO THE TABLES USED BY DETECTION AND HID OUTPUT"""
+# EVERY LAYOUT IS COMPILED ONCE AT STARTUP, SO SWITCHING GAME STYLES ONLY SWAPS WHICH LAYOUT IS ACTIVE.
+# THE COMPILED LAYOUT HOLDS THE DETECTION BITMAP MASK, LIMITS AND KEYCODE OF EVERY PANEL, AND THE SCAN
+# PLAN AND SCAN GROUPS THAT ONLY READ THE SENSORS ITS PANELS USE
+class PanelLayout:
+    __slots__ = ("name", "numOfPanels", "panelNames", "regions", "masks", "pressLimits", "releaseLimits",
+                 "keycodes", "scanPlan", "scanGroups", "pressurePressLimits", "pressureReleaseLimits",
+                 "cellPanels", "panelCellCounts")
+
+    # ACCEPTS A LAYOUT DEFINITION: (name, tuple of (panel name, region, press limit, release limit, keycode))
+    def __init__(self, definition):
+        layoutName, panels = definition
+        if len(panels) > maxPanels:
+            raise ValueError("Layout " + layoutName + " has more than " + str(maxPanels) + " panels")
+        self.name = layoutName
+        self.numOfPanels = len(panels)
+        self.panelNames = tuple(panel[0] for panel in panels)
+        self.regions = tuple(panel[1] for panel in panels)
+        self.masks = tuple(CompileRegionMask(region) for region in self.regions)
+        self.pressLimits = bytes(panel[2] for panel in panels)
+        self.releaseLimits = bytes(panel[3] for panel in panels)
+        self.keycodes = bytes(panel[4] for panel in panels)
+        self.scanPlan = CompileScanPlan(self.regions)
+        self.scanGroups = CompileScanGroups(self.regions)
+        # PRESSURE SCORE LIMITS, FROM THE PANEL ENTRY IF IT HAS THEM
+        self.pressurePressLimits = array.array('H', [panel[5] if len(panel) > 5 else pressurePressScore
+                                                     for panel in panels])
+        self.pressureReleaseLimits = array.array('H', [panel[6] if len(panel) > 6 else pressureReleaseScore
+                                                       for panel in panels])
+        # PANEL OF EVERY SENSOR (255 = NONE), SO THE SCAN CAN ADD EACH SENSOR'S PRESSURE TO ITS PANEL.
+        # A SENSOR INSIDE MORE THAN ONE REGION ONLY COUNTS TOWARDS THE FIRST
+        self.cellPanels = bytearray(b"\xff" * numOfSensors)
+        self.panelCellCounts = bytearray(self.numOfPanels)
+        for panelCounter in range(self.numOfPanels - 1, -1, -1):
+            rowStart, rowEnd, colStart, colEnd = self.regions[panelCounter]
+            for rowCounter in range(rowStart, rowEnd):
+                for colCounter in range(colStart, colEnd):
+                    self.cellPanels[(rowCounter * numOfSensorCols) + colCounter] = panelCounter
+        for panelIndex in self.cellPanels:
+            if panelIndex != 255:
+                self.panelCellCounts[panelIndex] += 1
+
+"""CLASS THAT READS THE SENSOR VOLTAGE WITH BULK ADC CAPTURES"""
+# STANDS IN FOR analogio.AnalogIn: READING value CAPTURES A WHOLE BURST OF SAMPLES INTO A PREALLOCATED BUFFER
+# WITH ONE CALL, AND AVERAGES THEM. THE AVERAGE IS SCALED UP TO 16 BITS THE SAME WAY AnalogIn DOES, SO BOTH
+# READ PATHS GIVE THE SAME READINGS FOR THE SAME ADC RESULTS
+class BulkAnalogIn:
+    __slots__ = ("adc", "samples", "sampleShift", "scaleShift", "fillShift")
+
+    # ACCEPTS THE ANALOG PIN, AND THE 2^sampleShift SAMPLES TO CAPTURE FOR EVERY READING
+    def __init__(self, pin, sampleShift):
+        self.adc = analogbufio.BufferedIn(pin, sample_rate=bulkSampleRate)
+        self.scaleShift = 16 - bulkSampleBits
+        self.fillShift = bulkSampleBits - self.scaleShift
+        self.SetSampleShift(sampleShift)
+
+    # SETS THE NUMBER OF SAMPLES IN EVERY BURST TO 2^sampleShift, AND ALLOCATES THE BUFFER FOR THEM
+    def SetSampleShift(self, sampleShift):
+        self.sampleShift = sampleShift
+        self.samples = array.array('H', bytearray(2 << sampleShift))
+
+    # CAPTURES A BURST FROM THE SENSOR THE MUXES ARE SET TO, AND RETURNS ITS AVERAGE AS A 16-BIT READING
+    @property
+    def value(self):
+        self.adc.readinto(self.samples)
+        average = sum(self.samples) >> self.sampleShift
+        return (average << self.scaleShift) | (average >> self.fillShift)
+
+    def deinit(self):
+        self.adc.deinit()
 
 """ALL FUNCTIONS RELATED TO READING AND WRITING FROM GLOBAL DATA ARRAYS"""
+# THESE FUNCTIONS ARE KEPT SO ROW/COLUMN CODE KEEPS WORKING. THEY ALL GO THROUGH THE GLOBAL sensorMatrix
 # FUNCTIONS FOR ARRAY THAT STORE THE LOW RANGE CALIBRATION DATA
 def WriteSensorArray_LowData(row, col, value):
-    index = (row * numOfSensorCols) + col
-    sensorData_low[index] = value
+    sensorMatrix.WriteCalibration(sensorMatrix.Index(row, col), LowField, value)
 def ReadSensorArray_LowData(row, col):
-    index = (row * numOfSensorCols) + col
-    return sensorData_low[index]
+    return sensorMatrix.ReadCalibration(sensorMatrix.Index(row, col), LowField)
 # FUNCTIONS FOR ARRAY THAT STORE THE THRESHOLD LEVEL CALIBRATION DATA
 def WriteSensorArray_ThresholdData(row, col, value):
-    index = (row * numOfSensorCols) + col
-    sensorData_threshold[index] = value
+    sensorMatrix.WriteCalibration(sensorMatrix.Index(row, col), ThresholdField, value)
 def ReadSensorArray_ThresholdData(row, col):
-    index = (row * numOfSensorCols) + col
-    return sensorData_threshold[index]
+    return sensorMatrix.ReadCalibration(sensorMatrix.Index(row, col), ThresholdField)
 # FUNCTIONS FOR ARRAY THAT STORE THE HIGH RANGE CALIBRATION DATA
 def WriteSensorArray_HighData(row, col, value):
-    index = (row * numOfSensorCols) + col
-    sensorData_high[index] = value
+    sensorMatrix.WriteCalibration(sensorMatrix.Index(row, col), HighField, value)
 def ReadSensorArray_HighData(row, col):
-    index = (row * numOfSensorCols) + col
-    return sensorData_high[index]
+    return sensorMatrix.ReadCalibration(sensorMatrix.Index(row, col), HighField)
 # FUNCTIONS FOR ARRAY THAT STORES THE MOST RECENT VOLTAGE READING
 def WriteSensorArray_CurrentData(row, col, value):
-    index = (row * numOfSensorCols) + col
-    sensorData_current[index] = value
+    sensorMatrix.WriteCurrent(sensorMatrix.Index(row, col), value)
 def ReadSensorArray_CurrentData(row, col):
-    index = (row * numOfSensorCols) + col
-    return sensorData_current[index]
+    return sensorMatrix.ReadCurrent(sensorMatrix.Index(row, col))
 # FUNCTIONS FOR ARRAY THAT STORES "PRESS" DETECTIONS
 def WriteSensorDetectionArray(row, col, value):
-    index = (row * numOfSensorCols) + col
-    sensorData_detection[index] = value
+    sensorMatrix.WriteDetection(row, col, value)
 def ReadSensorDetectionArray(row, col):
-    index = (row * numOfSensorCols) + col
-    return sensorData_detection[index]
+    return sensorMatrix.ReadDetection(row, col)
 # FUNCTIONS FOR ARRAY THAT STORES KEYPRESS STATUS
 def WriteKeypressArray(index, value):
     keypress_data[index] = value
@@ -107,65 +500,297 @@ def ReadKeypressArray(index):
 def IntegerMap(x, i_m, i_M, o_m, o_M):
     return max(min(o_M, (x - i_m) * (o_M - o_m) // (i_M - i_m) + o_m), o_m)
 
+# FUNCTION TO CONVERT A ROW AND COLUMN INTO THE 8-BIT CODE THAT SELECTS IT ON THE MUXES.
+# THE LOW 4 BITS DRIVE THE OUTPUT MUX A-D PINS (ROW), THE HIGH 4 BITS DRIVE THE INPUT MUX A-D PINS (COLUMN)
+def RowCol2MuxCode(row, col):
+    return row | (col << 4)
+
+# FUNCTION TO SET THE MUX SELECTION PINS TO A NEW MUX CODE.
+# ONLY THE PINS WHOSE BIT IS DIFFERENT FROM THE LAST WRITTEN MUX STATE ARE WRITTEN,
+# AND EVERY PIN WRITE IS ADDED TO THE PIN WRITE COUNTER
+def SetMuxCode(muxCode):
+    global muxState, muxPinWriteCount
+    changedBits = muxCode ^ muxState
+    bitCounter = 0
+    while changedBits:
+        if changedBits & 1:
+            muxPins[bitCounter].value = (muxCode >> bitCounter) & 1
+            muxPinWriteCount += 1
+        changedBits >>= 1
+        bitCounter += 1
+    muxState = muxCode
+
+# FUNCTION THAT WAITS FOR A NUMBER OF MICROSECONDS. THE PICO HAS A PRECISE BUILT-IN DELAY,
+# OTHERWISE THE SYSTEM TIME IS POLLED
+def SettleDelay(microseconds):
+    if microcontroller is not None and hasattr(microcontroller, "delay_us"):
+        microcontroller.delay_us(microseconds)
+    else:
+        endTime = time.monotonic_ns() + (microseconds * 1000)
+        while time.monotonic_ns() < endTime:
+            pass
+
+# FUNCTION THAT READS THE SENSOR THE MUXES ARE SET TO, AFTER WAITING THE SETTLE TIME OF ITS ROW.
+# 2^readLoopShift SAMPLES ARE SUMMED AND SHIFTED BACK DOWN, SO NO FLOATS ARE USED
+# ACCEPTS THE ROW OF THE SENSOR, AND RETURNS THE READING
+def ReadSelectedSensor(row):
+    settleTime = rowSettleTimes[row]
+    if settleTime > 0:
+        SettleDelay(settleTime)
+    readPin = voltageInPin
+    sampleTotal = 0
+    for sampleCounter in range(1 << readLoopShift):
+        sampleTotal += readPin.value
+    return sampleTotal >> readLoopShift
+
+# FUNCTION THAT OPENS THE ANALOG PIN WITH THE READ BACKEND PICKED BY bulkCaptureEnabled, CLOSING THE ONE IN USE.
+# BULK CAPTURES NEED analogbufio, SO WITHOUT IT THE PIN IS ALWAYS READ WITH analogio.AnalogIn
+# RETURNS THE OBJECT TO READ THE SENSOR VOLTAGE FROM. SetReadPath MUST BE CALLED AFTER IT
+def OpenSensorInput():
+    voltageInPin.deinit()
+    if bulkCaptureEnabled == True and analogbufio is not None:
+        return BulkAnalogIn(board.GP26, readOversampleShift)
+    return analogio.AnalogIn(board.GP26)
+
+# FUNCTION THAT SETS THE SETTLE TIME OF EVERY ROW AND THE OVERSAMPLING, AND PICKS THE READ PATH.
+# WITH BULK CAPTURES, THE OVERSAMPLING IS DONE BY THE CAPTURE ITSELF, SO IT DOES NOT NEED THE SLOWER READ PATH.
+# THE SCAN LOOPS ONLY TAKE THE SLOWER READ PATH IF A SETTLE TIME OR LOOPED OVERSAMPLING IS IN USE
+# ACCEPTS A SETTLE TIME IN MICROSECONDS (A NUMBER FOR ALL ROWS, OR ONE PER ROW) AND AN OVERSAMPLING SHIFT
+def SetReadPath(settleTimes, oversampleShift):
+    global readOversampleShift, readLoopShift, slowReadPath
+    for rowCounter in range(numOfSensorRows):
+        if isinstance(settleTimes, int):
+            rowSettleTimes[rowCounter] = settleTimes
+        else:
+            rowSettleTimes[rowCounter] = settleTimes[rowCounter]
+    readOversampleShift = oversampleShift
+    if isinstance(voltageInPin, BulkAnalogIn):
+        voltageInPin.SetSampleShift(oversampleShift)
+        readLoopShift = 0
+    else:
+        readLoopShift = oversampleShift
+    slowReadPath = readLoopShift > 0 or max(rowSettleTimes) > 0
+
+# FUNCTION THAT MEASURES THE SHORTEST SETTLE TIME THAT KEEPS READINGS STABLE ON EACH ROW.
+# EVERY SENSOR OF A ROW IS SELECTED COMING FROM THE FARTHEST ROW AND COLUMN, READ AFTER EACH SETTLE TIME
+# TRIED, AND COMPARED TO A READING TAKEN AFTER THE LONGEST SETTLE TIME. THE FIRST SETTLE TIME THAT STAYS
+# WITHIN settleTuneTolerance ON EVERY CHECK IS KEPT. NOTHING SHOULD PRESS THE SENSORS WHILE THIS RUNS
+# RETURNS THE SETTLE TIMES FOUND FOR EACH ROW, AND SETS THEM AS THE ROW SETTLE TIMES
+def AutoTuneSettleTimes():
+    readPin = voltageInPin
+    tunedTimes = array.array('H', bytearray(2 * numOfSensorRows))
+    for rowCounter in range(numOfSensorRows):
+        farRow = (rowCounter + (numOfSensorRows // 2)) % numOfSensorRows
+        settleTime = 0
+        while settleTime < settleTuneMaxTime:
+            stable = True
+            for repeatCounter in range(settleTuneRepeats):
+                for colCounter in range(numOfSensorCols):
+                    farCol = (numOfSensorCols - 1) - colCounter
+                    # READ AFTER THE SETTLE TIME BEING TRIED
+                    SetMuxCode(RowCol2MuxCode(farRow, farCol))
+                    SettleDelay(settleTuneMaxTime)
+                    SetMuxCode(RowCol2MuxCode(rowCounter, colCounter))
+                    if settleTime > 0:
+                        SettleDelay(settleTime)
+                    quickValue = readPin.value
+                    # READ AGAIN ONCE THE SENSOR HAS FULLY SETTLED
+                    SettleDelay(settleTuneMaxTime)
+                    settledValue = readPin.value
+                    if abs(quickValue - settledValue) > settleTuneTolerance:
+                        stable = False
+                        break
+                if stable == False:
+                    break
+            if stable == True:
+                break
+            settleTime += settleTuneStep
+        tunedTimes[rowCounter] = min(settleTime, settleTuneMaxTime)
+    SetReadPath(tunedTimes, readOversampleShift)
+    return tunedTimes
+
 # COMPLETE FUNCTION TO READ THE VALUE OF A SINGLE SENSOR IN THE SENSOR ARRAY.
 # ACCEPTS A ROW AND COLUMN VALUE, AND RETURNS NOTHING. INSTEAD, THIS FUNCTION
 # DIRECTLY WRITES TO THE PROGRAM'S SENSOR DATA ARRAY.
 # THIS FUNCTION SHOULD TAKE LESS THAN 0ms TO PERFORM!
 def CheckOneSensor(row, col):
-    # CREATE VARIABLES TO REPRESENT EACH PIN TO SET ON THE OUTPUT MUX.
-    # USE FLOOR DIVISION TO CONVERT THE DECIMAL NUMBER TO BINARY, AND STORE
-    # THE RESULT IN THE OUTPUT MUX'S A-D PINS
-    outputA = row % 2
-    tempMath = row // 2
-    outputB = tempMath % 2
-    tempMath = tempMath // 2
-    outputC = tempMath % 2
-    tempMath = tempMath // 2
-    outputD = tempMath % 2
-    # DO THE SAME PROCESS, EXCEPT FOR THE CURRENT COLUMN. RESULTS ARE STORE IN
-    # INPUT MUX PINS
-    inputA = col % 2
-    tempMath = col // 2
-    inputB = tempMath % 2
-    tempMath = tempMath // 2
-    inputC = tempMath % 2
-    tempMath = tempMath // 2
-    inputD = tempMath % 2
-    
-    # SET THE PINS ON THE PICO TO THE VARIABLES THAT WERE CALCULATED
-    muxOutApin.value = outputA
-    muxOutBpin.value = outputB
-    muxOutCpin.value = outputC
-    muxOutDpin.value = outputD
-    muxInApin.value = inputA
-    muxInBpin.value = inputB
-    muxInCpin.value = inputC
-    muxInDpin.value = inputD
-    
-    # MUX PINS ARE SET: READ THE VOLTAGE FROM A SPECIFIC SENSOR. THEN REMAP THE
-    # RESULT INTO A SMALLER RANGE TO SAVE DATA
-    rawVoltage = voltageInPin.value
+    # SET THE MUX PINS TO SELECT THE SENSOR. PINS ALREADY AT THE RIGHT LEVEL ARE NOT TOUCHED
+    SetMuxCode(RowCol2MuxCode(row, col))
+    
+    # MUX PINS ARE SET: READ THE VOLTAGE FROM A SPECIFIC SENSOR
+    if slowReadPath == True:
+        rawVoltage = ReadSelectedSensor(row)
+    else:
+        rawVoltage = voltageInPin.value
     
     # WRITE DATA TO SENSOR DATA ARRAY
     WriteSensorArray_CurrentData(row, col, rawVoltage)
+
+# FUNCTION THAT RETURNS THE ORDER TO VISIT EVERY SENSOR IN, AS A LIST OF FLAT INDEXES.
+# ROWS FOLLOW grayRowOrder AND COLUMNS SNAKE BACK AND FORTH ALONG grayColOrder,
+# SO EACH STEP OF THE WALK ONLY CHANGES ONE MUX PIN
+def GrayScanOrder():
+    scanOrder = []
+    for rowStep in range(numOfSensorRows):
+        row = grayRowOrder[rowStep]
+        for colStep in range(numOfSensorCols):
+            if rowStep % 2 == 0:
+                col = grayColOrder[colStep]
+            else:
+                col = grayColOrder[(numOfSensorCols - 1) - colStep]
+            scanOrder.append((row * numOfSensorCols) + col)
+    return scanOrder
+
+# FUNCTION THAT PRECOMPUTES A "SCAN PROGRAM" FOR A LIST OF SENSOR INDEXES, IN THE ORDER GIVEN.
+# EACH STEP OF THE PROGRAM HOLDS THE SENSOR INDEX, THE START OF ITS CALIBRATION RECORD, ITS ROW AND
+# BIT IN THE DETECTION BITMAP, AND ONLY THE (pin, value) WRITES NEEDED TO GET THERE FROM THE STEP BEFORE IT.
+# RETURNS A PACKED VARIABLE FOR (steps, first mux code, last mux code, pin writes per scan)
+def CompileScanProgram(sensorIndexes):
+    scanSteps = []
+    stepPinWrites = 0
+    firstMuxCode = 0
+    lastMuxCode = 0
+    for stepCounter in range(len(sensorIndexes)):
+        index = sensorIndexes[stepCounter]
+        muxCode = RowCol2MuxCode(index // numOfSensorCols, index % numOfSensorCols)
+        pinChanges = []
+        if stepCounter == 0:
+            # THE FIRST STEP IS REACHED WITH SetMuxCode, SINCE THE PINS COULD BE IN ANY STATE
+            firstMuxCode = muxCode
+        else:
+            for bitCounter in range(8):
+                if ((muxCode ^ lastMuxCode) >> bitCounter) & 1:
+                    pinChanges.append((muxPins[bitCounter], (muxCode >> bitCounter) & 1))
+        stepPinWrites += len(pinChanges)
+        scanSteps.append((index, index * calibrationStride, index // numOfSensorCols,
+                          1 << (index % numOfSensorCols), tuple(pinChanges)))
+        lastMuxCode = muxCode
+    return (tuple(scanSteps), firstMuxCode, lastMuxCode, stepPinWrites)
+
+# FUNCTION TO READ EVERY SENSOR IN A PRECOMPUTED SCAN PROGRAM. THE SETTLE TIME AND OVERSAMPLING ARE
+# ONLY APPLIED IF THE SLOW READ PATH IS IN USE
+# ACCEPTS A SENSOR MATRIX, A SCAN PROGRAM FROM CompileScanProgram, AND OPTIONALLY THE ARRAY TO WRITE THE
+# READINGS TO. WITHOUT ONE, IT WRITES DIRECTLY TO THE MATRIX'S CURRENT DATA
+def RunScanProgram(matrix, scanProgram, currentData=None):
+    global muxState, muxPinWriteCount
+    scanSteps, firstMuxCode, lastMuxCode, stepPinWrites = scanProgram
+    # MOVE THE MUXES TO THE FIRST SENSOR, THEN ONLY APPLY THE PRECOMPUTED PIN CHANGES
+    SetMuxCode(firstMuxCode)
+    readPin = voltageInPin
+    if currentData is None:
+        currentData = matrix.current
+    slowRead = slowReadPath
+    for index, calibrationIndex, detectionRow, detectionBit, pinChanges in scanSteps:
+        for pin, pinValue in pinChanges:
+            pin.value = pinValue
+        if slowRead:
+            currentData[index] = ReadSelectedSensor(detectionRow)
+        else:
+            currentData[index] = readPin.value
+    muxState = lastMuxCode
+    muxPinWriteCount += stepPinWrites
     
 # FUNCTION TO AUTOMATICALLY CHECK ALL SENSORS IN THE SENSOR MATRIX
 # ACCEPTS NOTHING, AND RETURNS NOTHING
 def CheckAllSensors():
-    # ITERATE THROUGH EACH ROW AND COLUMN
-    for rowCounter in range(numOfSensorRows):
-        for colCounter in range(numOfSensorCols):
-            CheckOneSensor(rowCounter, colCounter)
+    # WALK THE ACTIVE SCAN PLAN IN GRAY-CODE ORDER (EITHER THE PANEL REGIONS, OR THE WHOLE MATRIX)
+    if fullScanMode == True:
+        RunScanProgram(sensorMatrix, fullScanProgram)
+    elif adaptiveScanEnabled == True:
+        # ONLY READ THE REGIONS THE SCHEDULER PICKED FOR THIS FRAME
+        ScheduleScanGroups(sensorMatrix)
+        for groupCounter in range(len(scanGroups)):
+            if scanGroupDue[groupCounter] == 1:
+                RunScanProgram(sensorMatrix, scanGroups[groupCounter][1])
+    else:
+        RunScanProgram(sensorMatrix, panelScanPlan[1])
+
+# FUNCTION THAT COMPILES EACH PANEL REGION INTO ITS OWN "SCAN GROUP" FOR THE ADAPTIVE SCHEDULER.
+# A SCAN GROUP HOLDS THE REGION'S SENSOR INDEXES, ITS SCAN PROGRAM, AND THE REGION MASK TO WATCH
+# FOR PRESSES (THE REGION, GROWN BY scanHotMargin SENSORS ON EVERY SIDE)
+# ACCEPTS A TUPLE OF PANEL REGIONS, AND RETURNS A TUPLE OF SCAN GROUPS
+def CompileScanGroups(panelRegions):
+    groups = []
+    for rowStart, rowEnd, colStart, colEnd in panelRegions:
+        groupIndexes, groupProgram = CompileScanPlan(((rowStart, rowEnd, colStart, colEnd),))
+        watchMask = CompileRegionMask((max(0, rowStart - scanHotMargin), min(numOfSensorRows, rowEnd + scanHotMargin),
+                                       max(0, colStart - scanHotMargin), min(numOfSensorCols, colEnd + scanHotMargin)))
+        groups.append((groupIndexes, groupProgram, watchMask))
+    return tuple(groups)
+
+# FUNCTION THAT DECIDES WHICH SCAN GROUPS ARE READ THIS FRAME.
+# "HOT" GROUPS, WITH A PRESS IN OR AROUND THEM, ARE READ EVERY FRAME. WITH PRESSURE SCORING, A GROUP IS ALSO HOT
+# WHILE ITS PANEL'S PRESSURE IS ABOVE scanHotPressure, SO A PRESS IS FOLLOWED AS IT BUILDS UP, BEFORE ANY SENSOR
+# CROSSES ITS THRESHOLD. IDLE GROUPS ARE READ ONCE EVERY idleScanInterval FRAMES, SO NO SENSOR IS EVER MORE THAN
+# idleScanInterval FRAMES OLD
+# ACCEPTS A SENSOR MATRIX, AND WRITES THE RESULTS TO scanGroupDue AND THE SCAN RATE COUNTERS
+def ScheduleScanGroups(matrix):
+    global scanFrameCount
+    scanFrameCount += 1
+    for groupCounter in range(len(scanGroups)):
+        # IDLE GROUPS ARE DUE ONCE THEY REACH THEIR SWEEP INTERVAL
+        groupDue = (regionFramesSinceScan[groupCounter] + 1) >= idleScanInterval
+        # OR IF THE PANEL'S PRESSURE HAS RISEN ABOVE ITS IDLE LEVEL (EACH GROUP IS ONE PANEL OF THE ACTIVE LAYOUT)
+        if groupDue == False and pressureScoringEnabled == True:
+            groupDue = panelPressure[groupCounter] > scanHotPressure
+        # OTHERWISE, CHECK IF ANY PRESS WAS DETECTED IN OR AROUND THE GROUP LAST FRAME
+        if groupDue == False:
+            for row, colMask in scanGroups[groupCounter][2]:
+                if matrix.detection[row] & colMask:
+                    groupDue = True
+                    break
+        # RECORD THE DECISION AND UPDATE THE SCAN RATE COUNTERS
+        if groupDue == True:
+            scanGroupDue[groupCounter] = 1
+            regionFramesSinceScan[groupCounter] = 0
+            regionScanCounts[groupCounter] += 1
+        else:
+            scanGroupDue[groupCounter] = 0
+            regionFramesSinceScan[groupCounter] += 1
+
+# FUNCTION THAT COMPILES A PANEL LAYOUT INTO A SCAN PLAN: THE LIST OF SENSORS USED BY ANY PANEL,
+# IN GRAY-CODE ORDER, AND THE SCAN PROGRAM THAT READS THEM
+# ACCEPTS A TUPLE OF PANEL REGIONS, AND RETURNS A PACKED VARIABLE FOR (sensor indexes, scan program)
+def CompileScanPlan(panelRegions):
+    # MARK EVERY SENSOR THAT IS INSIDE AT LEAST ONE PANEL REGION
+    usedSensors = bytearray(numOfSensors)
+    for rowStart, rowEnd, colStart, colEnd in panelRegions:
+        for rowCounter in range(rowStart, rowEnd):
+            for colCounter in range(colStart, colEnd):
+                usedSensors[(rowCounter * numOfSensorCols) + colCounter] = 1
+    # KEEP THE GRAY-CODE WALK ORDER, BUT SKIP SENSORS THAT NO PANEL USES
+    planIndexes = []
+    for index in GrayScanOrder():
+        if usedSensors[index] == 1:
+            planIndexes.append(index)
+    return (tuple(planIndexes), CompileScanProgram(planIndexes))
+
+# FUNCTION TO SWITCH BETWEEN SCANNING ONLY THE PANEL REGIONS AND SCANNING THE WHOLE MATRIX.
+# THE FULL SCAN IS MEANT FOR DIAGNOSTICS, SO EVERY SENSOR SHOWS UP IN THE PRINT FUNCTIONS
+# ACCEPTS TRUE TO SCAN THE WHOLE MATRIX, OR FALSE TO ONLY SCAN THE PANEL REGIONS
+def SetFullScanMode(enabled):
+    global fullScanMode
+    fullScanMode = enabled
+    if enabled == False:
+        # SENSORS OUTSIDE THE PLAN ARE NO LONGER UPDATED, SO CLEAR ANY OLD DETECTIONS THEY HOLD
+        for index in range(numOfSensors):
+            if index not in panelScanPlan[0]:
+                WriteSensorDetectionArray(index // numOfSensorCols, index % numOfSensorCols, 0)
 
 """ ALL FUNCTIONS RELATED TO PERFORMING CALIBRATIONS FOR THE SYSTEM"""
 # FUNCTION TO CALIBRATE THE SENSOR MATRIX, FINDING THE AVERAGE OF THE LOWEST POSSIBLE READINGS
 # DIRECTLY WRITES TO LOW VALUE STORAGE ARRAY, AND IS USUALLY PERFORMED AT STARTUP
 # ACCEPTS NOTHING, AND RETURNS NOTHING
 def CalibrateLow():
+    # USE THE FAST, PASS-BASED CALIBRATION IF IT IS ENABLED
+    if fastCalibrationEnabled == True:
+        CalibrateLowFast(sensorMatrix)
+        return
+    
     # CREATE CONSTANTS THAT CONTROL THE ACCURACY OF THE SENSOR CALIBRATION
     numOfSamples = 3            # total samples per sensor
     totalCalibrationTime = 3    # total time to wait for entire calibration process
-    offsetValue = 5           # amount to shift calibration amount to account for drift/noise
+    offsetValue = lowOffsetValue  # amount to shift calibration amount to account for drift/noise
     
     # CALCULATE THE DELAY BETWEEN INDIVIDUAL SAMPLES
     calibrationDelay = (totalCalibrationTime * 1.0) / (numOfSamples * numOfSensors)
@@ -197,14 +822,61 @@ def CalibrateLow():
                 averageVal = 0
             else:
                 pass
-            WriteSensorArray_LowData(rowCounter, colCounter, (averageVal + offsetValue))
+            # THE LOW VALUE IS STORED AS 16-BIT, SO THE OFFSET CANNOT PUSH IT PAST 65535
+            WriteSensorArray_LowData(rowCounter, colCounter, min(averageVal + offsetValue, 65535))
+    sensorMatrix.ResetBaselines()
+    sensorMatrix.ResetPressureScales()
+
+# FUNCTION TO CALIBRATE THE LOW VALUES OF THE SENSOR MATRIX USING FULL-MATRIX PASSES.
+# EACH PASS READS ALL SENSORS ONCE, AND THERE IS AT MOST ONE SHORT SLEEP BETWEEN PASSES.
+# AFTER calibrationMinPasses, THE CALIBRATION STOPS AS SOON AS EVERY SENSOR'S VARIANCE IS BELOW
+# calibrationVarianceLimit, OR AFTER calibrationMaxPasses AT THE MOST
+# ACCEPTS A SENSOR MATRIX, AND RETURNS THE NUMBER OF PASSES TAKEN
+def CalibrateLowFast(matrix):
+    numOfCells = matrix.numOfSensors
+    currentData = matrix.current
+    # RUNNING SUMS OF EACH SENSOR'S VALUES, AND OF THEIR SQUARES (THESE CAN BE LARGER THAN 32 BITS)
+    valueSums = array.array('I', bytearray(4 * numOfCells))
+    squareSums = [0] * numOfCells
+    
+    passCounter = 0
+    while passCounter < calibrationMaxPasses:
+        # READ THE WHOLE MATRIX, THEN ADD EVERY SENSOR TO ITS SUMS
+        RunScanProgram(matrix, fullScanProgram)
+        for index in range(numOfCells):
+            currentVoltage = currentData[index]
+            valueSums[index] += currentVoltage
+            squareSums[index] += currentVoltage * currentVoltage
+        passCounter += 1
+        
+        # CHECK IF EVERY SENSOR HAS SETTLED. USING n = passCounter, THE VARIANCE IS BELOW THE LIMIT WHEN
+        # (n * sumOfSquares - sum * sum) <= limit * n * n, WHICH AVOIDS ANY DIVISION
+        if passCounter >= calibrationMinPasses:
+            varianceLimit = calibrationVarianceLimit * passCounter * passCounter
+            allSettled = True
+            for index in range(numOfCells):
+                valueSum = valueSums[index]
+                if (passCounter * squareSums[index]) - (valueSum * valueSum) > varianceLimit:
+                    allSettled = False
+                    break
+            if allSettled == True:
+                break
+        
+        # WAIT BETWEEN PASSES, BUT NOT AFTER THE LAST ONE
+        if passCounter < calibrationMaxPasses and calibrationPassDelay > 0:
+            time.sleep(calibrationPassDelay)
+    
+    # FIND THE AVERAGE OF EVERY SENSOR AND STORE IT, WITH THE OFFSET, AS ITS LOW VALUE
+    for index in range(numOfCells):
+        averageVal = valueSums[index] // passCounter
+        matrix.WriteCalibration(index, LowField, min(averageVal + lowOffsetValue, 65535))
+    matrix.ResetBaselines()
+    matrix.ResetPressureScales()
+    return passCounter
 
 # FUNCTION THAT WILL RECALCULATE WHAT THE THRESHOLD VALUE SHOULD BE FOR A SPECIFIC SENSOR
 # ACCEPTS ROW AND COLUMN, AND RETURNS NOTHING
 def CalibrateThreshold(row, col):
-    # CONSTANTS NEEDED FOR THE FUNCTION
-    thresholdPercentage = 0.35      # constant that determines where inbetween high/low the threshold should be
-    
     # GET THE REQUIRED INFORMATION FROM ARRAYS
     lowValue = ReadSensorArray_LowData(row, col)
     highValue = ReadSensorArray_HighData(row, col)
@@ -216,110 +888,858 @@ def CalibrateThreshold(row, col):
     WriteSensorArray_ThresholdData(row, col, newThreshold)
 
 def ResetCalibration(resetBtnStatus):
+    # WITH INCREMENTAL RECALIBRATION, THE BUTTON ONLY STARTS THE JOB. EACH CALL THEN RUNS ONE SLICE OF IT
+    if incrementalRecalibrationEnabled == True:
+        if resetBtnStatus == 0 and recalibrationActive == False:
+            print("Recalibrating the system in the background. Keep off the pad!")
+            StartRecalibration()
+        StepRecalibration(sensorMatrix)
+        return
+    
     # PERFORM RECALIBRATION OF SYSTEM IF CALIBRATION BUTTON IS PRESSED
     if resetBtnStatus == 0:
         print("Recalibrating the system. Please be patient!")
-        # TO CLEAR THRESHOLD AND HIGH CALIBRATION, WE NEED TO CLEAR BOTHT THEIR ARRAYS.
-        # THE SYSTEM WILL AUTOMATICALLY RESET THEIR VALUES OVER TIME
-        for rowCounter in range(numOfSensorRows):
-            for colCounter in range(numOfSensorCols):
-                WriteSensorArray_ThresholdData(rowCounter, colCounter, 0)
-                WriteSensorArray_HighData(rowCounter, colCounter, 0)
-                
-        # TO CLEAR LOW CALIBRATION, WE NEED TO RECALL THE FUNCTION THAT RUNS AT STARTUP
-        CalibrateLow()
+        CalibrateFromScratch()
         print("System recalibration finished. System ready to use!")
         time.sleep(1.0)
     else:
         pass
 
+# FUNCTION THAT SPLITS THE FULL GRAY-CODE SCAN INTO SLICES FOR THE INCREMENTAL RECALIBRATION
+# ACCEPTS THE NUMBER OF SENSORS PER SLICE, AND RETURNS A TUPLE OF (sensor indexes, scan program) SLICES
+def CompileRecalibrationSlices(sliceSize):
+    slices = []
+    for sliceStart in range(0, len(fullScanIndexes), sliceSize):
+        sliceIndexes = fullScanIndexes[sliceStart:sliceStart + sliceSize]
+        slices.append((sliceIndexes, CompileScanProgram(sliceIndexes)))
+    return tuple(slices)
+
+# FUNCTION THAT STARTS (OR RESTARTS) AN INCREMENTAL RECALIBRATION.
+# THE CURRENT CALIBRATION STAYS IN USE UNTIL THE NEW ONE IS FINISHED
+def StartRecalibration():
+    global recalibrationActive, recalibrationStep
+    for index in range(len(recalibrationSums)):
+        recalibrationSums[index] = 0
+    recalibrationStep = 0
+    recalibrationActive = True
+
+# FUNCTION THAT RUNS ONE STEP OF THE INCREMENTAL RECALIBRATION: IT READS ONE SLICE OF SENSORS INTO ITS OWN
+# ARRAY, SO NEITHER FRAME BUFFER IS TOUCHED, AND ADDS THEM TO THE RUNNING SUMS. AFTER EVERY SLICE HAS BEEN READ recalibrationSamples TIMES, THE NEW TABLE IS
+# BUILT IN THE SPARE CALIBRATION ARRAY AND SWAPPED IN WITH ONE ASSIGNMENT.
+# THE NEW HIGH AND THRESHOLD VALUES START AT THE NEW LOW VALUE, AND ARE LEARNED AGAIN DURING PLAY
+# ACCEPTS A SENSOR MATRIX, AND RETURNS TRUE ON THE FRAME THE NEW CALIBRATION IS SWAPPED IN
+def StepRecalibration(matrix):
+    global recalibrationActive, recalibrationStep, recalibrationTable
+    if recalibrationActive == False:
+        return False
+    
+    # READ THIS STEP'S SLICE AND ADD IT TO THE SUMS
+    sliceIndexes, sliceProgram = recalibrationSlices[recalibrationStep % len(recalibrationSlices)]
+    RunScanProgram(matrix, sliceProgram, recalibrationReads)
+    for index in sliceIndexes:
+        recalibrationSums[index] += recalibrationReads[index]
+    recalibrationStep += 1
+    if recalibrationStep < len(recalibrationSlices) * recalibrationSamples:
+        return False
+    
+    # EVERY SAMPLE IS TAKEN: BUILD THE NEW TABLE, THEN SWAP IT IN
+    newCalibration = recalibrationTable
+    for index in range(matrix.numOfSensors):
+        lowValue = min((recalibrationSums[index] // recalibrationSamples) + lowOffsetValue, 65535)
+        recordStart = index * calibrationStride
+        newCalibration[recordStart + ThresholdField] = lowValue
+        newCalibration[recordStart + HighField] = lowValue
+        newCalibration[recordStart + LowField] = lowValue
+    recalibrationTable = matrix.SwapCalibration(newCalibration)
+    matrix.ResetBaselines()
+    matrix.ResetPressureScales()
+    recalibrationActive = False
+    print("System recalibration finished. System ready to use!")
+    return True
+
+""" ALL FUNCTIONS RELATED TO SAVING AND LOADING CALIBRATION DATA"""
+# CLASS THAT STANDS IN FOR microcontroller.nvm BY KEEPING THE BYTES IN A FILE.
+# IT SUPPORTS THE SAME len() AND SLICE READ/WRITE THAT THE CALIBRATION FUNCTIONS USE,
+# SO THE SAVED CALIBRATION CAN ALSO BE USED AND CHECKED ON A COMPUTER
+class FileNVM:
+    __slots__ = ("path", "size")
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    # READS THE WHOLE FILE, PADDED WITH 0xFF LIKE ERASED FLASH
+    def ReadAll(self):
+        try:
+            with open(self.path, "rb") as storeFile:
+                storedBytes = bytearray(storeFile.read(self.size))
+        except OSError:
+            storedBytes = bytearray()
+        return storedBytes + bytearray(b"\xff" * (self.size - len(storedBytes)))
+
+    def __getitem__(self, key):
+        return bytes(self.ReadAll()[key])
+
+    def __setitem__(self, key, value):
+        storedBytes = self.ReadAll()
+        storedBytes[key] = value
+        with open(self.path, "wb") as storeFile:
+            storeFile.write(storedBytes)
+
+# FUNCTION THAT CALCULATES A FLETCHER-16 CHECKSUM OVER A BLOCK OF BYTES
+def Checksum16(data):
+    sumA = 0
+    sumB = 0
+    for byteValue in data:
+        sumA = (sumA + byteValue) % 255
+        sumB = (sumB + sumA) % 255
+    return (sumB << 8) | sumA
+
+# FUNCTION THAT BUILDS THE SAVED FORM OF THE CALIBRATION: A HEADER, THEN THE RAW (threshold, high, low) RECORDS
+# ACCEPTS A SENSOR MATRIX, AND RETURNS THE SNAPSHOT AS BYTES
+def BuildCalibrationSnapshot(matrix):
+    payload = bytes(matrix.calibration)
+    header = struct.pack(calibrationHeaderFormat, calibrationMagic, calibrationFormatVersion,
+                         matrix.numOfRows, matrix.numOfCols, len(payload), Checksum16(payload))
+    return header + payload
+
+# FUNCTION THAT SAVES THE CALIBRATION TO THE CALIBRATION STORE, IF IT HAS CHANGED SINCE THE LAST SAVE.
+# FLASH HAS LIMITED WRITE CYCLES, SO AN UNCHANGED CALIBRATION IS NEVER WRITTEN AGAIN
+# ACCEPTS A SENSOR MATRIX, AND RETURNS TRUE IF THE CALIBRATION WAS WRITTEN
+def SaveCalibration(matrix):
+    snapshot = BuildCalibrationSnapshot(matrix)
+    if len(snapshot) > len(calibrationStore):
+        print("Calibration is too large for the calibration store!")
+        return False
+    if calibrationStore[0:len(snapshot)] == snapshot:
+        return False
+    calibrationStore[0:len(snapshot)] = snapshot
+    return True
+
+# FUNCTION THAT LOADS A SAVED CALIBRATION INTO THE SENSOR MATRIX.
+# THE CALIBRATION IS ONLY USED IF ITS MAGIC, VERSION, MATRIX SIZE AND CHECKSUM ALL MATCH
+# ACCEPTS A SENSOR MATRIX, AND RETURNS TRUE IF THE CALIBRATION WAS LOADED
+def LoadCalibration(matrix):
+    headerSize = struct.calcsize(calibrationHeaderFormat)
+    payloadSize = len(matrix.calibration) * 2
+    if headerSize + payloadSize > len(calibrationStore):
+        return False
+    storedBytes = calibrationStore[0:headerSize + payloadSize]
+    magic, formatVersion, storedRows, storedCols, storedLength, storedChecksum = struct.unpack_from(calibrationHeaderFormat, storedBytes, 0)
+    if magic != calibrationMagic or formatVersion != calibrationFormatVersion:
+        return False
+    if storedRows != matrix.numOfRows or storedCols != matrix.numOfCols or storedLength != payloadSize:
+        return False
+    payload = storedBytes[headerSize:]
+    if Checksum16(payload) != storedChecksum:
+        print("Saved calibration is damaged, recalibrating.")
+        return False
+    # THE PAYLOAD IS THE RAW 16-BIT RECORDS, SO COPY IT STRAIGHT INTO THE CALIBRATION ARRAY
+    storedCalibration = array.array('H', bytearray(payload))
+    calibrationData = matrix.calibration
+    for index in range(len(calibrationData)):
+        calibrationData[index] = storedCalibration[index]
+    matrix.ResetBaselines()
+    matrix.ResetPressureScales()
+    return True
+
+# FUNCTION THAT CALIBRATES THE SENSOR MATRIX FROM SCRATCH, AND SAVES THE RESULT.
+# TO CLEAR THRESHOLD AND HIGH CALIBRATION, WE NEED TO CLEAR BOTH THEIR FIELDS. OLD ONES CAN SIT BELOW THE NEW LOW
+# VALUES AND HOLD EVERY SENSOR PRESSED. THE SYSTEM WILL AUTOMATICALLY RESET THEIR VALUES OVER TIME.
+# TO CLEAR LOW CALIBRATION, WE NEED TO RECALL THE FUNCTION THAT RUNS AT STARTUP
+def CalibrateFromScratch():
+    sensorMatrix.FillCalibration(ThresholdField, 0)
+    sensorMatrix.FillCalibration(HighField, 0)
+    CalibrateLow()
+    SaveCalibration(sensorMatrix)
+
+# FUNCTION THAT SETS UP THE CALIBRATION AT STARTUP. THE SAVED CALIBRATION IS LOADED, AND THE SENSOR MATRIX IS
+# ONLY CALIBRATED FROM SCRATCH IF THERE IS NO USABLE SAVED CALIBRATION, OR IF THE SENSORS HAVE DRIFTED AWAY FROM IT
+# RETURNS TRUE IF THE SAVED CALIBRATION IS IN USE
+def LoadStartupCalibration():
+    if LoadCalibration(sensorMatrix) == True and CheckCalibrationDrift(sensorMatrix) == False:
+        return True
+    CalibrateFromScratch()
+    return False
+
+# FUNCTION THAT CHECKS A LOADED CALIBRATION AGAINST ONE LIVE SWEEP OF THE MATRIX.
+# THE PAD SHOULD BE EMPTY AT STARTUP, SO EVERY SENSOR SHOULD READ CLOSE TO ITS SAVED LOW VALUE
+# ACCEPTS A SENSOR MATRIX, AND RETURNS TRUE IF TOO MANY SENSORS HAVE DRIFTED
+def CheckCalibrationDrift(matrix):
+    RunScanProgram(matrix, fullScanProgram)
+    driftedCells = 0
+    for index in range(matrix.numOfSensors):
+        savedBaseline = matrix.ReadCalibration(index, LowField) - lowOffsetValue
+        if abs(matrix.ReadCurrent(index) - savedBaseline) > calibrationDriftLimit:
+            driftedCells += 1
+    return driftedCells > calibrationDriftCells
+
+""" ALL FUNCTIONS RELATED TO RECORDING RAW SENSOR FRAMES"""
+# CLASS THAT RECORDS THE RAW SENSOR VALUES OF EVERY recordingDecimation-TH FRAME, SO A SESSION CAN BE REPLAYED ON A
+# COMPUTER. FRAMES ARE PACKED INTO TWO PREALLOCATED BUFFERS. ONCE ONE IS FULL, IT WAITS FOR FlushPending TO WRITE IT
+# OUT (BETWEEN FRAMES, SEE FlushRecording) WHILE THE OTHER FILLS. IF THE OTHER FILLS FIRST, THE WAITING BUFFER IS
+# WRITTEN RIGHT AWAY, AND COUNTED IN lateFlushes.
+# THE RECORDING GOES TO A FILE, OR TO A usb_cdc PORT IF ONE IS GIVEN. OVER A PORT, IT BEGINS ON THE FIRST FRAME THE
+# COMPUTER HAS THE PORT OPEN. A FILE STOPS GROWING AT recordingMaxBytes.
+# THE RECORDING STARTS FROM THE CALIBRATION IN USE WHEN IT BEGINS, SO A RECALIBRATION PART WAY THROUGH IS NOT REPLAYED
+class FrameRecorder:
+    __slots__ = ("path", "port", "gameStyle", "frameWords", "frameSize", "buffers", "fillBuffer", "bufferedFrames",
+                 "pendingFrames", "framesSkipped", "framesRecorded", "bytesWritten", "lateFlushes", "started", "full",
+                 "startTime")
+
+    # ACCEPTS THE PATH OF THE FILE TO RECORD TO, THE NUMBER OF SENSORS, AND THE usb_cdc PORT TO RECORD TO INSTEAD
+    # OF THE FILE (OR None)
+    def __init__(self, path, numOfSensors, port=None):
+        self.path = path
+        self.port = port
+        self.gameStyle = 0
+        # THE BUFFERS ARE ARRAYS OF 16 BIT WORDS, SO THE SENSOR VALUES ARE COPIED IN AS ONE BLOCK FROM AN ARRAY OF THE
+        # SAME TYPE. A FRAME IS ITS TIME AS TWO WORDS (LOW WORD FIRST), THEN ITS SENSOR VALUES
+        self.frameWords = (struct.calcsize(recordingFrameHeaderFormat) // 2) + numOfSensors
+        self.frameSize = 2 * self.frameWords
+        self.buffers = (array.array('H', bytearray(self.frameSize * recordingBufferFrames)),
+                        array.array('H', bytearray(self.frameSize * recordingBufferFrames)))
+        self.fillBuffer = 0             # index of the buffer frames are added to
+        self.bufferedFrames = 0         # frames in the buffer being filled
+        self.pendingFrames = 0          # frames in the other buffer, waiting to be written (0 = none)
+        self.framesSkipped = 0          # frames since the last recorded frame
+        self.framesRecorded = 0
+        self.bytesWritten = 0
+        self.lateFlushes = 0            # buffers written out during a frame, since the other buffer had filled
+        self.started = False            # True once the header and calibration have been written
+        self.full = False               # True once a file recording has reached recordingMaxBytes
+        self.startTime = 0
+
+    # STARTS A NEW RECORDING. TO A FILE, THE HEADER AND CALIBRATION ARE WRITTEN NOW. OVER A PORT, THEY ARE SENT
+    # ONCE THE COMPUTER HAS IT OPEN.
+    # ACCEPTS A SENSOR MATRIX AND THE ACTIVE GAME STYLE, AND RETURNS FALSE IF THE FILE CANNOT BE WRITTEN
+    def Start(self, matrix, gameStyle):
+        self.gameStyle = gameStyle
+        self.fillBuffer = 0
+        self.bufferedFrames = 0
+        self.pendingFrames = 0
+        self.framesSkipped = 0
+        self.framesRecorded = 0
+        self.bytesWritten = 0
+        self.lateFlushes = 0
+        self.started = False
+        self.full = False
+        if self.port is None:
+            return self.Begin(matrix)
+        return True
+
+    # WRITES THE HEADER AND THE CALIBRATION THE RECORDING STARTS FROM, AND STARTS ITS CLOCK.
+    # ACCEPTS A SENSOR MATRIX, AND RETURNS FALSE IF THEY CANNOT BE WRITTEN
+    def Begin(self, matrix):
+        snapshot = BuildCalibrationSnapshot(matrix)
+        header = struct.pack(recordingHeaderFormat, recordingMagic, recordingFormatVersion,
+                             matrix.numOfRows, matrix.numOfCols, self.gameStyle, len(snapshot))
+        if self.Write(header, len(header), True) == False or self.Write(snapshot, len(snapshot)) == False:
+            return False
+        self.bytesWritten = len(header) + len(snapshot)
+        self.started = True
+        self.startTime = time.monotonic_ns()
+        return True
+
+    # WRITES A BUFFER TO THE END OF THE RECORDING, OR TO A NEW FILE.
+    # ACCEPTS THE BUFFER, ITS SIZE IN BYTES, AND IF THE FILE SHOULD BE REPLACED. RETURNS FALSE IF IT WAS NOT ALL WRITTEN
+    def Write(self, data, size, replace=False):
+        if self.port is not None:
+            return self.port.write(data) == size
+        try:
+            with open(self.path, "wb" if replace else "ab") as recordFile:
+                recordFile.write(data)
+        except OSError:
+            return False
+        return True
+
+    # WRITES WHOLE FRAMES FROM THE START OF A BUFFER TO THE END OF THE RECORDING. A FILE ONLY TAKES THE FRAMES THAT
+    # FIT IN recordingMaxBytes.
+    # ACCEPTS THE BUFFER AND THE NUMBER OF FRAMES, AND RETURNS FALSE IF THEY WERE NOT ALL WRITTEN
+    def WriteFrames(self, buffer, numOfFrames):
+        if numOfFrames == 0:
+            return True
+        if self.port is None and self.bytesWritten + (numOfFrames * self.frameSize) > recordingMaxBytes:
+            self.full = True
+            numOfFrames = (recordingMaxBytes - self.bytesWritten) // self.frameSize
+            if numOfFrames > 0 and self.Write(memoryview(buffer)[0:numOfFrames * self.frameWords],
+                                              numOfFrames * self.frameSize) == True:
+                self.bytesWritten += numOfFrames * self.frameSize
+            return False
+        if self.Write(memoryview(buffer)[0:numOfFrames * self.frameWords], numOfFrames * self.frameSize) == False:
+            return False
+        self.bytesWritten += numOfFrames * self.frameSize
+        return True
+
+    # ADDS THE MATRIX'S CURRENT VALUES TO THE BUFFER AS ONE FRAME, IF THIS FRAME IS ONE TO RECORD. NOTHING IS WRITTEN
+    # OUT UNLESS BOTH BUFFERS ARE FULL.
+    # ACCEPTS A SENSOR MATRIX, AND RETURNS FALSE IF THE RECORDING CANNOT CARRY ON
+    def Record(self, matrix):
+        if self.started == False:
+            # A RECORDING OVER A PORT WAITS FOR THE COMPUTER TO OPEN IT
+            if not self.port.connected:
+                return True
+            if self.Begin(matrix) == False:
+                return False
+        self.framesSkipped += 1
+        if self.framesSkipped < recordingDecimation:
+            return True
+        self.framesSkipped = 0
+        buffer = self.buffers[self.fillBuffer]
+        frameStart = self.bufferedFrames * self.frameWords
+        frameTime = ((time.monotonic_ns() - self.startTime) // 1000000) & 0xFFFFFFFF
+        buffer[frameStart] = frameTime & 0xFFFF
+        buffer[frameStart + 1] = frameTime >> 16
+        buffer[frameStart + 2:frameStart + self.frameWords] = matrix.current
+        self.bufferedFrames += 1
+        self.framesRecorded += 1
+        if self.bufferedFrames == recordingBufferFrames:
+            # THE OTHER BUFFER IS FILLED NEXT, SO IF IT IS STILL WAITING TO BE WRITTEN, IT HAS TO BE WRITTEN NOW
+            if self.pendingFrames > 0:
+                self.lateFlushes += 1
+                if self.FlushPending() == False:
+                    return False
+            self.pendingFrames = self.bufferedFrames
+            self.fillBuffer ^= 1
+            self.bufferedFrames = 0
+        return True
+
+    # WRITES THE FULL BUFFER THAT IS WAITING, IF THERE IS ONE. RETURNS FALSE IF IT WAS NOT ALL WRITTEN
+    def FlushPending(self):
+        if self.pendingFrames == 0:
+            return True
+        pendingFrames = self.pendingFrames
+        self.pendingFrames = 0
+        return self.WriteFrames(self.buffers[self.fillBuffer ^ 1], pendingFrames)
+
+    # WRITES EVERY FRAME STILL IN MEMORY, SUCH AS AT THE END OF A RECORDING. RETURNS FALSE IF THEY WERE NOT ALL WRITTEN
+    def Flush(self):
+        if self.FlushPending() == False:
+            return False
+        bufferedFrames = self.bufferedFrames
+        self.bufferedFrames = 0
+        return self.WriteFrames(self.buffers[self.fillBuffer], bufferedFrames)
+
+# FUNCTION THAT STARTS RECORDING RAW FRAMES, IF ENABLED. THE RECORDER IS LEFT AS None IF IT CANNOT RECORD
+def StartRecording():
+    global frameRecorder
+    if recordingEnabled == False:
+        return
+    recordingPort = None
+    if recordingToSerial == True:
+        # THE RECORDING AND THE TELEMETRY WOULD BOTH USE THE DATA PORT
+        if telemetryPort is None or telemetryEnabled == True:
+            print("Recording over USB serial needs the data port from boot.py, with telemetry off.")
+            return
+        recordingPort = telemetryPort
+    frameRecorder = FrameRecorder(recordingFilePath, sensorMatrix.numOfSensors, recordingPort)
+    if frameRecorder.Start(sensorMatrix, activeGameStyle) == False:
+        print("Cannot write the recording. Is the drive writable from boot.py?")
+        frameRecorder = None
+        return
+    PrintRecordingCapacity()
+
+# FUNCTION THAT STOPS THE RECORDING AFTER A WRITE DID NOT GO THROUGH, AND SAYS WHY
+def StopRecording():
+    global frameRecorder
+    if frameRecorder.full == True:
+        print("The recording reached recordingMaxBytes. Recording stopped.")
+    else:
+        print("Writing the recording failed. Recording stopped.")
+    frameRecorder = None
+
+# FUNCTION THAT RECORDS THE LATEST FRAME, IF A RECORDING IS RUNNING
+def RecordFrame():
+    if frameRecorder is not None and frameRecorder.Record(sensorMatrix) == False:
+        StopRecording()
+
+# FUNCTION THAT WRITES OUT A FULL RECORDING BUFFER, IF ONE IS WAITING AND AT LEAST recordingFlushGuard IS LEFT
+# BEFORE THE NEXT FRAME. OTHERWISE IT KEEPS WAITING, FOR UP TO recordingBufferFrames RECORDED FRAMES
+# ACCEPTS THE TIME THE NEXT FRAME STARTS AT, FROM time.monotonic_ns()
+def FlushRecording(nextFrameTime):
+    if frameRecorder is None or frameRecorder.pendingFrames == 0:
+        return
+    if framePeriod > 0 and (nextFrameTime - time.monotonic_ns()) < recordingFlushGuard:
+        return
+    if frameRecorder.FlushPending() == False:
+        StopRecording()
+
+# FUNCTION TO PRINT HOW FAST THE RECORDING GROWS, AND HOW LONG A RECORDING TO THE DRIVE CAN RUN FOR
+def PrintRecordingCapacity():
+    if framePeriod <= 0:
+        return
+    bytesPerSecond = (frameRecorder.frameSize * 1000000000) // (framePeriod * recordingDecimation)
+    print("Recording bytes per second: ", end="")
+    print(bytesPerSecond)
+    if frameRecorder.port is None:
+        print("Seconds of recording that fit in recordingMaxBytes: ", end="")
+        print(recordingMaxBytes // bytesPerSecond)
+
 """ FUNCTIONS THAT USE COLLECTED SENSOR DATA TO PRODUCE OUTPUTS OR RESULTS"""
+# FUNCTION THAT WORKS OUT ONCE PER FRAME IF IDLE BASELINES SHOULD UPDATE, AND IF IDLE HIGH VALUES SHOULD DECAY, ON
+# THIS FRAME. THE FRAMES BETWEEN BASELINE UPDATES ARE SET SO 2^driftFilterShift UPDATES TAKE driftTimeConstant
+# SECONDS AT THE CURRENT framePeriod. THEY ARE ONLY WORKED OUT AGAIN WHEN framePeriod CHANGES, SINCE THE TIME
+# CONSTANT IN NANOSECONDS IS TOO LARGE FOR A SMALL INTEGER AND WOULD ALLOCATE ON EVERY FRAME.
+# WITH THE ADAPTIVE SCAN SCHEDULER ON, AN IDLE REGION IS NOT READ ON EVERY FRAME, SO ITS BASELINE MOVES MORE SLOWLY
+# ACCEPTS NOTHING, AND RETURNS NOTHING
+def ScheduleDriftUpdates():
+    global driftFrameCount, driftUpdateDue, highDecayDue, driftUpdateInterval, driftIntervalFramePeriod
+    if framePeriod != driftIntervalFramePeriod:
+        driftIntervalFramePeriod = framePeriod
+        driftUpdateInterval = max(1, round((driftTimeConstant * 1000000000)
+                                           / ((framePeriod if framePeriod > 0 else driftUnpacedFramePeriod)
+                                              << driftFilterShift)))
+    driftFrameCount += 1
+    driftUpdateDue = (driftFrameCount % driftUpdateInterval) == 0
+    highDecayDue = (driftFrameCount % highDecayInterval) == 0
+
 # FUNCTION TO COMPARE EACH SENSOR TO ITS THRESHOLD VALUE, AND TRANSLATE THE RESULT INTO A "PRESS"
 # FUNCTION WRITES DIRECTLY TO A DATA ARRAY FOR ITS RESULTS
 # ACCEPTS NOTHING, AND RETURNS NOTHING
 def CheckAllPresses():
-    # START BY CHECKING ALL SENSORS FOR CURRENT VALUES
-    CheckAllSensors()
+    # WITH DOUBLE BUFFERING, READ THE FRAME INTO THE BACK BUFFER, THEN SWAP IT IN AND CHECK IT
+    if doubleBufferEnabled == True:
+        AcquireFrame(sensorMatrix)
+        EvaluateFrame(sensorMatrix)
+        return
+    
+    # WORK OUT IF IDLE BASELINES SHOULD UPDATE, AND IF IDLE HIGH VALUES SHOULD DECAY, ON THIS FRAME
+    ScheduleDriftUpdates()
     
+    # READ EACH SCHEDULED SENSOR AND CHECK IT AGAINST ITS THRESHOLD IN A SINGLE PASS.
+    # THIS PICKS THE SAME SENSORS AS CheckAllSensors, BUT WITHOUT A SECOND LOOP OVER THE MATRIX
+    if fullScanMode == True:
+        ScanAndDetect(sensorMatrix, fullScanProgram)
+    elif adaptiveScanEnabled == True:
+        ScheduleScanGroups(sensorMatrix)
+        for groupCounter in range(len(scanGroups)):
+            if scanGroupDue[groupCounter] == 1:
+                ScanAndDetect(sensorMatrix, scanGroups[groupCounter][1])
+    else:
+        ScanAndDetect(sensorMatrix, panelScanPlan[1])
+
+"""ALL FUNCTIONS FOR THE DOUBLE-BUFFERED SENSOR FRAMES"""
+# A FRAME IS READ INTO THE BACK BUFFER BY AcquireFrame (THE PRODUCER), WHILE THE FRONT BUFFER IS CHECKED BY
+# EvaluateFrame (THE CONSUMER). THE TWO SIDES HAND FRAMES OVER WITH TWO COUNTERS, EACH WRITTEN BY ONLY ONE SIDE:
+# framesAcquired GOES UP WHEN THE BACK BUFFER HOLDS A WHOLE NEW FRAME, AND framesEvaluated GOES UP ONCE THE
+# CONSUMER HAS SWAPPED IT TO THE FRONT. THE BACK BUFFER IS ONLY WRITTEN WHILE THEY ARE EQUAL, AND ONLY SWAPPED
+# WHILE THEY ARE NOT, SO A FRAME IS NEVER CHECKED WHILE IT IS STILL BEING READ, AND IS NEVER CHECKED TWICE.
+# THE SIDES CAN RUN ONE AFTER THE OTHER, AS ASYNCIO TASKS, OR ON SEPARATE THREADS. ANY OTHER SENSOR READS (LIKE THE
+# INCREMENTAL RECALIBRATION) MUST BE MADE BY THE SAME SIDE AS AcquireFrame
+# ONLY THE SENSORS IN A FRAME'S SCAN PROGRAMS ARE CHECKED, SO SENSORS THAT WERE NOT READ INTO A BUFFER (OUTSIDE
+# THE PANEL PLAN, OR IN A SCAN GROUP THAT WAS NOT DUE) CAN HOLD OLDER VALUES THERE WITHOUT CHANGING ANY DETECTION
+
+# FUNCTION THAT READS ONE WHOLE FRAME INTO THE BACK BUFFER, PICKING THE SENSORS THE SAME WAY AS CheckAllPresses
+# ACCEPTS A SENSOR MATRIX, AND RETURNS FALSE (WITHOUT READING ANYTHING) IF THE LAST FRAME HAS NOT BEEN TAKEN YET
+def AcquireFrame(matrix):
+    global framesAcquired
+    if framesAcquired != framesEvaluated:
+        return False
+    backPrograms = matrix.backPrograms
+    backPrograms.clear()
+    if fullScanMode == True:
+        backPrograms.append(fullScanProgram)
+    elif adaptiveScanEnabled == True:
+        ScheduleScanGroups(matrix)
+        for groupCounter in range(len(scanGroups)):
+            if scanGroupDue[groupCounter] == 1:
+                backPrograms.append(scanGroups[groupCounter][1])
+    else:
+        backPrograms.append(panelScanPlan[1])
+    backCurrent = matrix.backCurrent
+    for scanProgram in backPrograms:
+        RunScanProgram(matrix, scanProgram, backCurrent)
+    framesAcquired += 1
+    return True
+
+# FUNCTION THAT SWAPS THE NEWEST FRAME TO THE FRONT AND CHECKS IT: THRESHOLDS, DRIFT TRACKING AND PRESSURE,
+# EXACTLY AS THE FUSED SCAN DOES, BUT WITHOUT READING ANY SENSORS
+# ACCEPTS A SENSOR MATRIX, AND RETURNS FALSE (WITHOUT CHECKING ANYTHING) IF THERE IS NO NEW FRAME
+def EvaluateFrame(matrix):
+    global framesEvaluated
+    if framesAcquired == framesEvaluated:
+        return False
+    matrix.SwapFrames()
+    # THE OLD FRONT BUFFER IS NOW THE BACK BUFFER, SO THE PRODUCER CAN START READING THE NEXT FRAME INTO IT
+    framesEvaluated += 1
+    ScheduleDriftUpdates()
+    for scanProgram in matrix.frontPrograms:
+        ScanAndDetect(matrix, scanProgram, False)
+    return True
+
+# FUSED FUNCTION THAT READS EVERY SENSOR IN A SCAN PROGRAM, COMPARES IT TO ITS THRESHOLD, UPDATES
+# ITS HIGH VALUE AND THRESHOLD, AND WRITES THE DETECTION RESULT, ALL IN ONE LOOP.
+# THE ARRAYS ARE BOUND TO LOCAL VARIABLES ONCE, AND INDEXED DIRECTLY INSTEAD OF THROUGH THE
+# READ/WRITE FUNCTIONS. THE RESULTS ARE THE SAME AS CheckAllSensors FOLLOWED BY CheckSensorThresholds.
+# WITH DRIFT TRACKING ON, ON driftUpdateDue FRAMES, EACH SENSOR THAT IS NOT PRESSED AND READS WITHIN driftNearLimit
+# OF ITS LOW VALUE ALSO UPDATES ITS BASELINE WITH AN INTEGER MOVING AVERAGE. ITS LOW VALUE AND THRESHOLD ARE
+# ONLY RECALCULATED IF THE LOW VALUE CHANGED. ON highDecayDue FRAMES, ITS HIGH VALUE ALSO DECAYS A LITTLE
+# TOWARDS THE LOW VALUE.
+# IF acquire IS False, NOTHING IS READ: THE SENSORS' VALUES ARE ALREADY IN THE MATRIX'S CURRENT DATA
+# (FROM AcquireFrame), AND ONLY THE CHECKS ARE DONE
+# ACCEPTS A SENSOR MATRIX, A SCAN PROGRAM FROM CompileScanProgram, AND IF THE SENSORS SHOULD BE READ.
+# RETURNS NOTHING
+def ScanAndDetect(matrix, scanProgram, acquire=True):
+    global muxState, muxPinWriteCount
+    scanSteps, firstMuxCode, lastMuxCode, stepPinWrites = scanProgram
+    if acquire:
+        SetMuxCode(firstMuxCode)
+    # BIND EVERYTHING USED IN THE LOOP TO LOCALS
+    readPin = voltageInPin
+    currentData = matrix.current
+    calibrationData = matrix.calibration
+    detectionData = matrix.detection
+    baselineData = matrix.baseline
+    percentage = thresholdPercentage
+    updateBaseline = driftUpdateDue
+    decayHigh = highDecayDue
+    trackDrift = driftTrackingEnabled and (updateBaseline or decayHigh)
+    nearLimit = driftNearLimit
+    slowRead = slowReadPath
+    scorePressure = pressureScoringEnabled
+    pressureData = matrix.pressure
+    scaleData = matrix.pressureScale
+    cellPanels = activeLayout.cellPanels
+    panelPressureData = panelPressure
+    for index, calibrationIndex, detectionRow, detectionBit, pinChanges in scanSteps:
+        # MOVE THE MUXES TO THIS SENSOR, AND READ IT. SETTLING AND OVERSAMPLING ONLY HAPPEN ON THE SLOW READ PATH
+        if acquire:
+            for pin, pinValue in pinChanges:
+                pin.value = pinValue
+            if slowRead:
+                currentValue = ReadSelectedSensor(detectionRow)
+            else:
+                currentValue = readPin.value
+            currentData[index] = currentValue
+        else:
+            currentValue = currentData[index]
+        # CHECK IF THE VALUE IS HIGHER THAN THE DESIRED THRESHOLD
+        if currentValue > calibrationData[calibrationIndex]:
+            # IF CURRENT VALUE IS HIGHER THAN RECORDED HIGHEST, UPDATE HIGHEST AND RECALCULATE THRESHOLD.
+            # THE RECORD IS (threshold, high, low), STARTING AT calibrationIndex
+            if currentValue > calibrationData[calibrationIndex + 1]:
+                calibrationData[calibrationIndex + 1] = currentValue
+                lowValue = calibrationData[calibrationIndex + 2]
+                calibrationData[calibrationIndex] = int(((currentValue - lowValue) * percentage) + lowValue)
+                scaleData[index] = (255 << pressureScaleBits) // max(currentValue - lowValue, pressureMinSpan)
+            detectionData[detectionRow] |= detectionBit
+        else:
+            detectionData[detectionRow] &= ~detectionBit
+            if trackDrift:
+                lowValue = calibrationData[calibrationIndex + 2]
+                highValue = calibrationData[calibrationIndex + 1]
+                recalculate = False
+                # MOVE THE FIXED-POINT BASELINE TOWARDS THIS IDLE READING, UNLESS IT IS FAR FROM THE LOW VALUE
+                # (A FOOT RESTING ON THE SENSOR BELOW ITS THRESHOLD IS NOT DRIFT)
+                if updateBaseline and -nearLimit <= currentValue - lowValue <= nearLimit:
+                    baselineValue = baselineData[index]
+                    baselineValue += ((currentValue << driftFractionBits) - baselineValue) >> driftFilterShift
+                    baselineData[index] = baselineValue
+                    newLowValue = min((baselineValue >> driftFractionBits) + lowOffsetValue, 65535)
+                    if newLowValue != lowValue:
+                        lowValue = newLowValue
+                        calibrationData[calibrationIndex + 2] = lowValue
+                        recalculate = True
+                # LET A STALE HIGH VALUE DECAY, BUT NEVER CLOSER TO THE LOW VALUE THAN highDecayMinSpan
+                if decayHigh and (highValue - lowValue) > highDecayMinSpan:
+                    highValue -= (highValue - lowValue) >> highDecayShift
+                    calibrationData[calibrationIndex + 1] = highValue
+                    recalculate = True
+                if recalculate and highValue > lowValue:
+                    calibrationData[calibrationIndex] = int(((highValue - lowValue) * percentage) + lowValue)
+                    scaleData[index] = (255 << pressureScaleBits) // max(highValue - lowValue, pressureMinSpan)
+        if scorePressure:
+            # SCALE (current - low) TO 0-255 WITH ONE MULTIPLY AND SHIFT, AND MOVE THE PANEL'S SUM BY THE CHANGE
+            lowValue = calibrationData[calibrationIndex + 2]
+            if currentValue > lowValue:
+                pressureValue = min(((currentValue - lowValue) * scaleData[index]) >> pressureScaleBits, 255)
+            else:
+                pressureValue = 0
+            panelIndex = cellPanels[index]
+            if panelIndex != 255:
+                panelPressureData[panelIndex] += pressureValue - pressureData[index]
+            pressureData[index] = pressureValue
+    if acquire:
+        muxState = lastMuxCode
+        muxPinWriteCount += stepPinWrites
+
+# FUNCTION TO COMPARE A LIST OF SENSORS TO THEIR THRESHOLD VALUES, AND TRANSLATE THE RESULT INTO A "PRESS"
+# ACCEPTS A LIST OF SENSOR INDEXES, AND WRITES DIRECTLY TO THE DETECTION ARRAY.
+# THE MAIN LOOP USES ScanAndDetect INSTEAD, THIS IS KEPT FOR USE AFTER A SEPARATE CheckAllSensors
+def CheckSensorThresholds(sensorIndexes):
     # COMPARE THE CURRENT SENSOR VALUE TO ITS PREVIOUS VALUE
     # IF THE DIFFERENCE IN VALUES IS HIGHER THAN A SPECIFIC AMOUNT, TREAT THAT AS A PRESS
-    for rowCounter in range(numOfSensorRows):
-        for colCounter in range(numOfSensorCols):
-            # GET THE LAST RECORDED VALUE AND THRESHOLD FOR THIS SENSOR
-            currentValue = ReadSensorArray_CurrentData(rowCounter, colCounter)
-            currentThreshold = ReadSensorArray_ThresholdData(rowCounter, colCounter)
+    for index in sensorIndexes:
+        rowCounter = index // numOfSensorCols
+        colCounter = index % numOfSensorCols
+        # GET THE LAST RECORDED VALUE AND THRESHOLD FOR THIS SENSOR
+        currentValue = ReadSensorArray_CurrentData(rowCounter, colCounter)
+        currentThreshold = ReadSensorArray_ThresholdData(rowCounter, colCounter)
+        
+        # CHECK IF THE VALUE IS HIGHER THAN THE DESIRED THRESHOLD
+        if currentValue > currentThreshold:
+            # GET THE HIGH VALUE TO CHECK IF THRESHOLD NEEDS ADJUSTING
+            currentHigh = ReadSensorArray_HighData(rowCounter, colCounter)
             
-            # CHECK IF THE VALUE IS HIGHER THAN THE DESIRED THRESHOLD
-            if currentValue > currentThreshold:
-                # GET THE HIGH VALUE TO CHECK IF THRESHOLD NEEDS ADJUSTING
-                currentHigh = ReadSensorArray_HighData(rowCounter, colCounter)
-                
-                # IF CURRENT VALUE IS HIGHER THAN RECORDED HIGHEST, UPDATE HIGHEST AND RECALCULATE THRESHOLD
-                if currentValue > currentHigh:
-                    WriteSensorArray_HighData(rowCounter, colCounter, currentValue)
-                    CalibrateThreshold(rowCounter, colCounter)
-                else:
-                    pass
-                
-                # WRITE TO THE DETECTION ARRAY THAT A "PRESS" HAS BEEN FOUND
-                WriteSensorDetectionArray(rowCounter, colCounter, 1)
+            # IF CURRENT VALUE IS HIGHER THAN RECORDED HIGHEST, UPDATE HIGHEST AND RECALCULATE THRESHOLD
+            if currentValue > currentHigh:
+                WriteSensorArray_HighData(rowCounter, colCounter, currentValue)
+                CalibrateThreshold(rowCounter, colCounter)
             else:
-                WriteSensorDetectionArray(rowCounter, colCounter, 0)
+                pass
+            
+            # WRITE TO THE DETECTION ARRAY THAT A "PRESS" HAS BEEN FOUND
+            WriteSensorDetectionArray(rowCounter, colCounter, 1)
+        else:
+            WriteSensorDetectionArray(rowCounter, colCounter, 0)
+
+# FUNCTION THAT COMPILES A RECTANGULAR REGION INTO A MASK FOR THE DETECTION BITMAP
+# ACCEPTS A REGION AS (first row, last row + 1, first column, last column + 1), AND RETURNS
+# A TUPLE OF (row, column bit mask) PAIRS, ONE FOR EACH ROW IN THE REGION
+def CompileRegionMask(region):
+    rowStart, rowEnd, colStart, colEnd = region
+    colMask = 0
+    for colCounter in range(colStart, colEnd):
+        colMask |= (1 << colCounter)
+    regionMask = []
+    for rowCounter in range(rowStart, rowEnd):
+        regionMask.append((rowCounter, colMask))
+    return tuple(regionMask)
+
+# FUNCTION THAT COUNTS HOW MANY SENSORS DETECT A PRESS INSIDE A REGION.
+# EACH ROW OF THE BITMAP IS ANDED WITH THE REGION MASK, AND THE SET BITS ARE COUNTED WITH A LOOKUP TABLE
+# ACCEPTS A SENSOR MATRIX AND A REGION MASK FROM CompileRegionMask, AND RETURNS THE NUMBER OF HITS
+def CountRegionHits(matrix, regionMask):
+    detectionData = matrix.detection
+    bitCounts = popCountTable
+    regionHits = 0
+    for row, colMask in regionMask:
+        regionHits += bitCounts[detectionData[row] & colMask]
+    return regionHits
 
 # FUNCTION THAT CONVERTS THE PRESS DATA INTO ARROW DATA
 # THIS FUNCTION SPECIFICALLY IS FOR DANCE DANCE REVOLUTION, CONTAINING UP, DOWN, LEFT AND RIGHT ARROWS
 # ACCEPTS NOTHING, AND RETURNS A PACKED VARIABLE FOR (up, right, down, left, and a placeholder)
 def CheckArrowPressesDDR():
-    # CREATE TEMP VARIABLES FOR STORAGE
-    upPasses = 0            # pass variables check how many times a sensor
-    rightPasses = 0         # within a specific region is activated
-    downPasses = 0
-    leftPasses = 0
-    upPress = False         # press booleans are for after logic is performed
-    rightPress = False
-    downPress = False
-    leftPress = False
-    
-    # CHECK THE DETECTION ARRAY IN A SPECIFIC REGION TO DETERMINE IF AN UP ARROW IS PRESSED
-    for rowCounter in range(0, 4):
-        for colCounter in range(2, 6):
-            if ReadSensorDetectionArray(rowCounter, colCounter) == 1:
-                upPasses+=1
-            else:
-                pass
-    # CHECK FOR RIGHT ARROW
-    for rowCounter in range(4, 8):
-        for colCounter in range(5, 8):
-            if ReadSensorDetectionArray(rowCounter, colCounter) == 1:
-                rightPasses+=1
-            else:
-                pass
-    # CHECK FOR DOWN ARROW
-    for rowCounter in range(8, 12):
-        for colCounter in range(2, 6):
-            if ReadSensorDetectionArray(rowCounter, colCounter) == 1:
-                downPasses+=1
-            else:
-                pass
-    # CHECK FOR LEFT ARROW
-    for rowCounter in range(4, 8):
-        for colCounter in range(0, 3):
-            if ReadSensorDetectionArray(rowCounter, colCounter) == 1:
-                leftPasses+=1
-            else:
-                pass
-
-    # CHECK THE NUMBER OF PRESS OCCURANCES. IF IT IS LARGER THAN THE THRESHOLD, TREAT IT
-    # AS A TRUE ARROW PRESS. THESE VALUES CAN BE ADJUSTED TO ENHANCE SENSITIVITY
-    upPress = (upPasses > 3)
-    rightPress = (rightPasses > 3)
-    downPress = (downPasses > 3)
-    leftPress = (leftPasses > 3)
+    # COUNT THE HITS IN EACH ARROW'S REGION. IF IT IS LARGER THAN THE ARROW'S LIMIT, TREAT IT
+    # AS A TRUE ARROW PRESS
+    layout = panelLayouts[StyleDDR]
+    upPress = CountRegionHits(sensorMatrix, layout.masks[UpIndex]) > layout.pressLimits[UpIndex]
+    rightPress = CountRegionHits(sensorMatrix, layout.masks[RightIndex]) > layout.pressLimits[RightIndex]
+    downPress = CountRegionHits(sensorMatrix, layout.masks[DownIndex]) > layout.pressLimits[DownIndex]
+    leftPress = CountRegionHits(sensorMatrix, layout.masks[LeftIndex]) > layout.pressLimits[LeftIndex]
     
     # RETURN THE RESULTS OF EACH ARROW PRESS AS PACKED VARIABLE
     return (upPress, rightPress, downPress, leftPress, 0)
 
+# FUNCTION THAT COUNTS THE HITS IN EACH PANEL'S REGION, WITHOUT DECIDING IF IT IS A PRESS.
+# ACCEPTS A COMPILED PANEL LAYOUT AND AN ARRAY TO WRITE THE HIT COUNTS TO, AND RETURNS NOTHING
+def CountPanelHits(layout, hitCounts):
+    masks = layout.masks
+    for panelCounter in range(layout.numOfPanels):
+        hitCounts[panelCounter] = CountRegionHits(sensorMatrix, masks[panelCounter])
+
+# FUNCTION THAT CHECKS EVERY PANEL OF A LAYOUT FOR A PRESS, WITHOUT DEBOUNCING
+# ACCEPTS A COMPILED PANEL LAYOUT AND AN ARRAY TO WRITE THE PRESSES TO (1 = PRESSED), AND RETURNS NOTHING
+def CheckPanelPresses(layout, presses):
+    masks = layout.masks
+    pressLimits = layout.pressLimits
+    for panelCounter in range(layout.numOfPanels):
+        presses[panelCounter] = 1 if CountRegionHits(sensorMatrix, masks[panelCounter]) > pressLimits[panelCounter] else 0
+
+# FUNCTION THAT ADDS UP THE PRESSURE OF EVERY PANEL FROM SCRATCH. THE SCAN KEEPS THE SUMS UP TO DATE ON ITS
+# OWN, SO THIS IS ONLY NEEDED WHEN THE ACTIVE LAYOUT CHANGES
+# ACCEPTS A SENSOR MATRIX AND A COMPILED PANEL LAYOUT, AND WRITES TO panelPressure
+def RebuildPanelPressure(matrix, layout):
+    for panelCounter in range(maxPanels):
+        panelPressure[panelCounter] = 0
+    for index in range(numOfSensors):
+        panelIndex = layout.cellPanels[index]
+        if panelIndex != 255:
+            panelPressure[panelIndex] += matrix.pressure[index]
+
+# FUNCTION THAT RETURNS THE AVERAGE PRESSURE OF A PANEL (0-255), FOR ANALOG OUTPUTS.
+# ONLY UP TO DATE WHILE PRESSURE SCORING IS ENABLED
+def PanelPressureLevel(panelIndex):
+    cellCount = activeLayout.panelCellCounts[panelIndex]
+    if cellCount == 0:
+        return 0
+    return panelPressure[panelIndex] // cellCount
+
+# FUNCTION THAT DECIDES THIS FRAME'S PANEL PRESSES FOR A LAYOUT, FROM EITHER THE PANEL PRESSURE SCORES
+# OR THE PANEL HIT COUNTS, DEBOUNCING THEM IF ENABLED
+# ACCEPTS A COMPILED PANEL LAYOUT, AND WRITES THE PRESSES TO panelPresses
+def UpdatePanelPresses(layout):
+    if pressureScoringEnabled == True:
+        panelScores = panelPressure
+        pressLimits = layout.pressurePressLimits
+        releaseLimits = layout.pressureReleaseLimits
+    else:
+        CountPanelHits(layout, panelHitCounts)
+        panelScores = panelHitCounts
+        pressLimits = layout.pressLimits
+        releaseLimits = layout.releaseLimits
+    if debounceEnabled == True:
+        DebouncePanelPresses(panelScores, pressLimits, releaseLimits, panelPresses)
+    else:
+        for panelCounter in range(layout.numOfPanels):
+            panelPresses[panelCounter] = 1 if panelScores[panelCounter] > pressLimits[panelCounter] else 0
+
+# FUNCTION TO SWITCH TO ANOTHER GAME STYLE. EVERY LAYOUT IS ALREADY COMPILED, SO THIS ONLY RELEASES ANY HELD
+# KEYS, SWAPS THE ACTIVE LAYOUT AND ITS SCAN PLAN, AND RESETS THE PER-PANEL STATE. NOTHING IS CHECKED PER FRAME
+# ACCEPTS THE NEW GAME STYLE (ITS INDEX IN panelLayoutDefinitions)
+def SetGameStyle(gameStyle):
+    global activeGameStyle, activeLayout, panelScanPlan, scanGroups
+    # RELEASE EVERY KEY THAT IS HELD WITH THE OLD LAYOUT'S KEYCODES
+    for panelCounter in range(maxPanels):
+        panelPresses[panelCounter] = 0
+    HidControl(panelPresses, activeGameStyle, CheckKeyboardEnabled())
+    # SWAP IN THE NEW LAYOUT
+    activeGameStyle = gameStyle
+    activeLayout = panelLayouts[gameStyle]
+    panelScanPlan = activeLayout.scanPlan
+    scanGroups = activeLayout.scanGroups
+    # START EVERY PANEL AND SCAN GROUP FROM A CLEAN STATE
+    for panelCounter in range(maxPanels):
+        debounceStates[panelCounter] = DebounceReleased
+        debounceHeldFrames[panelCounter] = 255
+        panelHitCounts[panelCounter] = 0
+        regionFramesSinceScan[panelCounter] = panelCounter % idleScanInterval
+    RebuildPanelPressure(sensorMatrix, activeLayout)
+    SetFullScanMode(fullScanMode)
+
+# FUNCTION THAT TURNS EACH PANEL'S HIT COUNT INTO A DEBOUNCED PRESS, USING A SMALL STATE MACHINE PER PANEL.
+# A PANEL ONLY CHANGES ONCE ITS HIT COUNT HAS STAYED PAST THE PRESS (OR RELEASE) LIMIT FOR ENOUGH FRAMES,
+# AND THE LAST CHANGE HAS BEEN HELD FOR ENOUGH FRAMES. ONCE A CHANGE HAS BEEN PENDING FOR maxAddedLatency
+# MILLISECONDS, lateConfirmFrames IN A ROW ARE ENOUGH TO CONFIRM IT. A FRAME IN THE HYSTERESIS BAND RESTARTS THE
+# COUNT, SO A SINGLE SPIKE AFTER HOVERING IN THE BAND IS NEVER SENT.
+# ALL STATE IS KEPT IN PREALLOCATED ARRAYS, SO NOTHING IS ALLOCATED PER FRAME
+# ACCEPTS THE HIT COUNTS, THE PRESS AND RELEASE LIMITS, AND AN ARRAY TO WRITE THE PRESSES TO (1 = PRESSED).
+# RETURNS NOTHING
+def DebouncePanelPresses(hitCounts, pressLimits, releaseLimits, presses):
+    nowMs = (time.monotonic_ns() // 1000000) & 0xFFFFFFFF
+    for panelCounter in range(len(pressLimits)):
+        # SORT THE HIT COUNT INTO ITS CLASS
+        hitCount = hitCounts[panelCounter]
+        if hitCount > pressLimits[panelCounter]:
+            hitClass = DebounceAbovePress
+        elif hitCount <= releaseLimits[panelCounter]:
+            hitClass = DebounceBelowRelease
+        else:
+            hitClass = DebounceInBand
+        
+        # COUNT THE FRAMES SINCE THE LAST CONFIRMED CHANGE, STOPPING AT 255
+        if debounceHeldFrames[panelCounter] < 255:
+            debounceHeldFrames[panelCounter] += 1
+        
+        # MOVE TO THE NEXT STATE. A NEW PENDING CHANGE STARTS ITS FRAME COUNT AND TIMER
+        state = debounceStates[panelCounter]
+        nextState = debounceNextState[(state * 3) + hitClass]
+        if nextState != state:
+            if nextState == DebouncePressPending or nextState == DebounceReleasePending:
+                debouncePendingFrames[panelCounter] = 0
+                debouncePendingStart[panelCounter] = nowMs
+            state = nextState
+        
+        # CHECK IF A PENDING CHANGE IS CONFIRMED. ONLY CONFIRMING FRAMES IN A ROW ARE COUNTED
+        if hitClass == debounceConfirmClass[state]:
+            if debouncePendingFrames[panelCounter] < 255:
+                debouncePendingFrames[panelCounter] += 1
+            confirmFrames = debounceConfirmFrames[state]
+            pendingMs = (nowMs - debouncePendingStart[panelCounter]) & 0xFFFFFFFF
+            if pendingMs >= maxAddedLatency and confirmFrames > lateConfirmFrames:
+                confirmFrames = lateConfirmFrames
+            if (debouncePendingFrames[panelCounter] >= confirmFrames and
+                    debounceHeldFrames[panelCounter] >= debounceMinFrames[state]):
+                state = debounceConfirmState[state]
+                debounceHeldFrames[panelCounter] = 0
+        elif debounceConfirmClass[state] != 255:
+            debouncePendingFrames[panelCounter] = 0
+        debounceStates[panelCounter] = state
+        
+        # A PANEL IS PRESSED UNTIL ITS RELEASE IS CONFIRMED
+        presses[panelCounter] = 1 if state >= DebouncePressed else 0
+
+# FUNCTION THAT BUILDS THE SUMMED-AREA TABLES FOR THE DETECTION BITMAP AND THE CURRENT SENSOR VALUES.
+# EACH TABLE HAS ONE EXTRA ROW AND COLUMN OF ZEROS, AND EVERY ENTRY HOLDS THE SUM OF ALL SENSORS ABOVE
+# AND TO THE LEFT OF IT. AFTER THIS, THE SUM OVER ANY RECTANGLE ONLY TAKES 4 LOOKUPS.
+# ONLY SENSORS IN THE ACTIVE SCAN PLAN ARE UP TO DATE, SO USE A FULL SCAN FOR REGIONS OUTSIDE THE PANELS
+# ACCEPTS A SENSOR MATRIX, AND WRITES TO ITS SUMMED-AREA TABLES
+def BuildSummedAreaTables(matrix):
+    detectionData = matrix.detection
+    currentData = matrix.current
+    hitTable = matrix.hitSummedArea
+    pressureTable = matrix.pressureSummedArea
+    tableCols = numOfSensorCols + 1
+    for rowCounter in range(numOfSensorRows):
+        # RUNNING SUMS ALONG THIS ROW
+        rowHits = 0
+        rowPressure = 0
+        detectionRow = detectionData[rowCounter]
+        sensorIndex = rowCounter * numOfSensorCols
+        aboveIndex = (rowCounter * tableCols) + 1
+        tableIndex = aboveIndex + tableCols
+        for colCounter in range(numOfSensorCols):
+            rowHits += (detectionRow >> colCounter) & 1
+            rowPressure += currentData[sensorIndex]
+            hitTable[tableIndex] = hitTable[aboveIndex] + rowHits
+            pressureTable[tableIndex] = pressureTable[aboveIndex] + rowPressure
+            sensorIndex += 1
+            aboveIndex += 1
+            tableIndex += 1
+
+# FUNCTION THAT SUMS A RECTANGLE OF A SUMMED-AREA TABLE IN CONSTANT TIME
+# ACCEPTS A TABLE AND A REGION AS (first row, last row + 1, first column, last column + 1)
+def SumSummedAreaRegion(table, region):
+    rowStart, rowEnd, colStart, colEnd = region
+    tableCols = numOfSensorCols + 1
+    topRow = rowStart * tableCols
+    bottomRow = rowEnd * tableCols
+    return table[bottomRow + colEnd] - table[topRow + colEnd] - table[bottomRow + colStart] + table[topRow + colStart]
+
+# FUNCTION THAT RETURNS HOW MANY SENSORS DETECT A PRESS INSIDE ANY RECTANGULAR REGION
+# BuildSummedAreaTables MUST BE CALLED FIRST FOR THE CURRENT FRAME
+def RegionHitCount(region):
+    return SumSummedAreaRegion(sensorMatrix.hitSummedArea, region)
+
+# FUNCTION THAT RETURNS THE SUM OF THE CURRENT SENSOR VALUES INSIDE ANY RECTANGULAR REGION
+# BuildSummedAreaTables MUST BE CALLED FIRST FOR THE CURRENT FRAME
+def RegionPressureSum(region):
+    return SumSummedAreaRegion(sensorMatrix.pressureSummedArea, region)
+
+# FUNCTION THAT CHECKS ANY NUMBER OF (POSSIBLY OVERLAPPING) REGIONS FOR PRESSES USING THE SUMMED-AREA TABLES
+# ACCEPTS A TUPLE OF REGIONS AND A TUPLE OF HIT LIMITS, AND RETURNS A TUPLE OF PRESS BOOLEANS
+def CheckRegionPresses(regions, hitLimits):
+    regionPresses = []
+    for regionCounter in range(len(regions)):
+        regionPresses.append(RegionHitCount(regions[regionCounter]) > hitLimits[regionCounter])
+    return tuple(regionPresses)
+
 """ ALL FUNCTIONS FOR PRINTING OUT DATA TO THE USER THROUGH THE TERMINAL """
+# FUNCTION TO PRINT HOW OFTEN EACH PANEL REGION WAS READ BY THE ADAPTIVE SCAN SCHEDULER
+# USEFULL FOR TUNING idleScanInterval AND scanHotMargin
+def PrintScanRates():
+    print("Frames scheduled: ", end="")
+    print(scanFrameCount)
+    for groupCounter in range(len(scanGroups)):
+        print("Region ", end="")
+        print(groupCounter, end=": ")
+        print(regionScanCounts[groupCounter], end=" reads, ")
+        if scanFrameCount > 0:
+            print((regionScanCounts[groupCounter] * 100) // scanFrameCount, end="")
+        else:
+            print(0, end="")
+        print("% of frames")
+# FUNCTION TO PRINT THE LOW CALIBRATION VALUE OF EVERY SENSOR
+def PrintCalibration():
+    for rowCounter in range(numOfSensorRows):
+        for colCounter in range(numOfSensorCols):
+            print(ReadSensorArray_LowData(rowCounter, colCounter), end=" ")
+        print("")
+
 # FUNCTION TO PRINT THE "PRESS" ARRAY TO THE USER
 def PrintPresses():
     for rowCounter in range(numOfSensorRows):
@@ -345,6 +1765,55 @@ def PrintSensorsVsThresholds():
             print(ReadSensorArray_ThresholdData(rowCounter, colCounterThreshold), end=" ")
         print("")
         
+"""ALL FUNCTIONS FOR SENDING SENSOR TELEMETRY TO THE PC"""
+# FUNCTION THAT FINDS THE usb_cdc DATA PORT, WHICH ONLY EXISTS IF boot.py ENABLED IT.
+# WRITES NEVER WAIT: IF THE PC IS NOT KEEPING UP, PART OF A PACKET IS DROPPED AND THE DECODER FINDS THE NEXT ONE
+# RETURNS THE PORT, OR None IF IT IS NOT AVAILABLE
+def FindTelemetryPort():
+    if usb_cdc is None or usb_cdc.data is None:
+        return None
+    usb_cdc.data.write_timeout = 0
+    return usb_cdc.data
+
+# FUNCTION THAT WRITES ONE PART OF A TELEMETRY PACKET TO THE PORT, STRAIGHT FROM THE BUFFER OR ARRAY IT IS KEPT IN.
+# ACCEPTS THE DATA AND ITS SIZE IN BYTES, AND RETURNS FALSE IF THE PC WAS NOT READING FAST ENOUGH TO TAKE ALL OF IT
+def WriteTelemetryPart(data, size):
+    bytesWritten = telemetryPort.write(data)
+    return bytesWritten is None or bytesWritten >= size
+
+# FUNCTION THAT SENDS THE LATEST FRAME AS ONE TELEMETRY PACKET, IF telemetryInterval HAS PASSED SINCE THE LAST ONE
+# AND THE PC HAS THE PORT OPEN. THE HEADER AND TRAILER ARE PACKED IN PREALLOCATED BUFFERS, AND EACH ARRAY IS WRITTEN
+# TO THE PORT AS ONE BLOCK IN BETWEEN, SO NOTHING IS FORMATTED, COPIED OR ALLOCATED PER SENSOR
+# ACCEPTS A SENSOR MATRIX, AND RETURNS TRUE IF A PACKET WAS SENT
+def SendTelemetry(matrix):
+    global nextTelemetryTime, telemetrySequence, telemetryPacketsSent, telemetryPacketsCut
+    now = time.monotonic_ns()
+    if telemetryPort is None or now < nextTelemetryTime or not telemetryPort.connected:
+        return False
+    nextTelemetryTime = now + telemetryInterval
+    
+    # PACK THE HEADER AND TRAILER
+    panelMask = 0
+    for panelCounter in range(activeLayout.numOfPanels):
+        if panelPresses[panelCounter] == 1:
+            panelMask |= (1 << panelCounter)
+    struct.pack_into(telemetryHeaderFormat, telemetryHeader, 0, telemetryMagic, telemetryFormatVersion,
+                     matrix.numOfRows, matrix.numOfCols, panelMask, telemetrySequence, (now // 1000000) & 0xFFFFFFFF)
+    struct.pack_into(telemetryTrailerFormat, telemetryTrailer, 0, telemetrySequence)
+    
+    # SEND IT, STOPPING AT THE FIRST PART THE PC DID NOT TAKE. THE SEQUENCE NUMBER LETS THE DECODER COUNT PACKETS
+    # THAT WERE LOST
+    telemetrySequence = (telemetrySequence + 1) & 0xFFFF
+    if (WriteTelemetryPart(telemetryHeader, telemetryHeaderSize) == False
+            or WriteTelemetryPart(matrix.current, 2 * matrix.numOfSensors) == False
+            or WriteTelemetryPart(matrix.calibration, 2 * calibrationStride * matrix.numOfSensors) == False
+            or WriteTelemetryPart(matrix.detection, matrix.numOfRows) == False
+            or WriteTelemetryPart(telemetryTrailer, telemetryTrailerSize) == False):
+        telemetryPacketsCut += 1
+        return False
+    telemetryPacketsSent += 1
+    return True
+
 """ALL FUNCTIONS FOR SENDING KEYBOARD INTERACTIONS TO THE PC"""
 
 def CheckKeyboardEnabled():
@@ -354,71 +1823,93 @@ def CheckKeyboardEnabled():
     else:
         return False
 
+# FUNCTION THAT PRESSES THE KEY OF ONE PANEL, LOOKED UP IN THE GAME STYLE'S LAYOUT
 def SendKeypress(directionVal, gameStyle):
-    # BASED OFF CURRENT GAME STYLE, SEND A SPECIFIC SET OF KEYBOARD KEYSTROKES
-    if gameStyle == StyleDDR:              # for Dance Dance Revolution gameplay
-        # CHECK THROUGH POSSIBLE KEY INDEXES FOR DDR
-        # TO SEND THE CORRECT KEYSTROKE
-        if directionVal == UpIndex:
-            picoKeyboard.press(Keycode.UP_ARROW)
-        elif directionVal == RightIndex:
-            picoKeyboard.press(Keycode.RIGHT_ARROW)
-        elif directionVal == DownIndex:
-            picoKeyboard.press(Keycode.DOWN_ARROW)
-        elif directionVal == LeftIndex:
-            picoKeyboard.press(Keycode.LEFT_ARROW)
-        else:
-            print("Keypress Index error. Check code!")
-    else:                                              # for Pump It Up gameplay
-        # CHECK THROUGH POSSIBLE KEY INDEXES FOR PIU
-        # TO SEND THE CORRECT KEYSTROKE
-        if directionVal == upLeftIndex:
-            picoKeyboard.press(Keycode.Q)
-        elif directionVal == upRightIndex:
-            picoKeyboard.press(Keycode.E)
-        elif direcitonVal == centerIndex:
-            picoKeyboard.press(Keycode.S)
-        elif directionVal == downRightIndex:
-            picoKeyboard.press(Keycode.C)
-        elif directionVal == downLeftIndex:
-            picoKeyboard.press(Keycode.Z)
-        else:
-            print("Keypress Index Error. Check Code!")
+    layout = panelLayouts[gameStyle]
+    if directionVal >= layout.numOfPanels:
+        print("Keypress Index error. Check code!")
+    elif layout.keycodes[directionVal] != 0:
+        picoKeyboard.press(layout.keycodes[directionVal])
 
+# FUNCTION THAT RELEASES THE KEY OF ONE PANEL, LOOKED UP IN THE GAME STYLE'S LAYOUT
 def SendKeyrelease(directionVal, gameStyle):
-    # BASED OFF CURRENT GAME STYLE, SEND A SPECIFIC SET OF KEYBOARD KEY-RELEASES
-    if gameStyle == StyleDDR:                          # for Dance Dance Revolution gameplay
-        # CHECK THROUGH POSSIBLE KEY INDEXES FOR DDR
-        # TO SEND THE CORRECT KEYSTROKE
-        if directionVal == UpIndex:
-            picoKeyboard.release(Keycode.UP_ARROW)
-        elif directionVal == RightIndex:
-            picoKeyboard.release(Keycode.RIGHT_ARROW)
-        elif directionVal == DownIndex:
-            picoKeyboard.release(Keycode.DOWN_ARROW)
-        elif directionVal == LeftIndex:
-            picoKeyboard.release(Keycode.LEFT_ARROW)
-        else:
-            print("Keyrelease Index error. Check code!")
-    else:                                              # for Pump It Up gameplay
-        # CHECK THROUGH POSSIBLE KEY INDEXES FOR PIU
-        # TO SEND THE CORRECT KEYSTROKE
-        if directionVal == upLeftIndex:
-            picoKeyboard.release(Keycode.Q)
-        elif directionVal == upRightIndex:
-            picoKeyboard.release(Keycode.E)
-        elif direcitonVal == centerIndex:
-            picoKeyboard.release(Keycode.S)
-        elif directionVal == downRightIndex:
-            picoKeyboard.release(Keycode.C)
-        elif directionVal == downLeftIndex:
-            picoKeyboard.release(Keycode.Z)
-        else:
-            print("Keyrelease Index Error. Check Code!")
+    layout = panelLayouts[gameStyle]
+    if directionVal >= layout.numOfPanels:
+        print("Keyrelease Index error. Check code!")
+    elif layout.keycodes[directionVal] != 0:
+        picoKeyboard.release(layout.keycodes[directionVal])
+
+# FUNCTION THAT FINDS THE KEYBOARD AMONG THE USB HID DEVICES
+# RETURNS THE KEYBOARD DEVICE, OR None IF THERE IS NO KEYBOARD
+def FindKeyboardDevice():
+    for device in usb_hid.devices:
+        if device.usage_page == 0x01 and device.usage == 0x06:
+            return device
+    return None
+
+# FUNCTION THAT FINDS THE PANEL GAMEPAD (SET UP IN boot.py) AMONG THE USB HID DEVICES
+# RETURNS THE GAMEPAD DEVICE, OR None IF boot.py DID NOT SET ONE UP
+def FindGamepadDevice():
+    for device in usb_hid.devices:
+        if device.usage_page == 0x01 and device.usage == 0x05:
+            return device
+    return None
+
+# FUNCTION THAT SENDS THE PANEL GAMEPAD REPORT: ONE BYTE, WITH ONE BIT PER PANEL (BIT 0 = PANEL 0).
+# THE MASK IS BUILT WITH A SHORT LOOP OVER THE PANELS (NO MORE THAN maxPanels), AND THE REPORT IS ONLY SENT
+# WHEN A PANEL CHANGED SINCE THE LAST ONE
+# ACCEPTS THE PRESSES OF THIS FRAME AND THE NUMBER OF PANELS, AND RETURNS NOTHING
+def GamepadControl(arrowPresses, numOfPanels):
+    global lastGamepadMask, hidReportsThisFrame, hidReportsSent
+    panelMask = 0
+    for panelCounter in range(numOfPanels):
+        panelMask |= (arrowPresses[panelCounter] & 1) << panelCounter
+    if panelMask == lastGamepadMask:
+        return
+    gamepadReport[0] = panelMask
+    gamepadDevice.send_report(gamepadReport)
+    lastGamepadMask = panelMask
+    hidReportsThisFrame += 1
+    hidReportsSent += 1
+
+# FUNCTION THAT SENDS THIS FRAME'S PRESSES TO THE USB HID DEVICES PICKED BY hidOutputMode.
+# THE GAMEPAD IS SKIPPED IF boot.py DID NOT SET ONE UP, OR IF THE KEYBOARD SWITCH IS OFF
+# ACCEPTS THE PRESSES OF THIS FRAME, THE GAME STYLE, AND IF THE KEYBOARD SWITCH IS ON
+def HidControl(arrowPresses, gameStyle, keyControlEnabled):
+    global hidReportsThisFrame
+    hidReportsThisFrame = 0
+    if hidOutputMode != HidModeGamepad:
+        KeyboardControl(arrowPresses, gameStyle, keyControlEnabled)
+    if hidOutputMode != HidModeKeyboard and gamepadDevice is not None and keyControlEnabled == True:
+        GamepadControl(arrowPresses, panelLayouts[gameStyle].numOfPanels)
+
+# FUNCTION THAT BUILDS ONE KEYBOARD REPORT HOLDING EVERY KEY THAT IS CURRENTLY PRESSED, AND SENDS IT.
+# THE REPORT BUFFER IS PREALLOCATED, AND FILLED DIRECTLY FROM THE GLOBAL PRESS ARRAY
+# ACCEPTS THE GAME STYLE, AND RETURNS NOTHING
+def SendKeyboardReport(gameStyle):
+    global hidReportsThisFrame, hidReportsSent
+    layout = panelLayouts[gameStyle]
+    keycodes = layout.keycodes
+    for byteCounter in range(keyboardReportLength):
+        keyboardReport[byteCounter] = 0
+    reportSlot = 2
+    for keyCounter in range(layout.numOfPanels):
+        if keypress_data[keyCounter] == 1 and keycodes[keyCounter] != 0 and reportSlot < 2 + keyboardReportKeySlots:
+            keyboardReport[reportSlot] = keycodes[keyCounter]
+            reportSlot += 1
+    keyboardDevice.send_report(keyboardReport)
+    hidReportsThisFrame += 1
+    hidReportsSent += 1
 
+# FUNCTION THAT UPDATES THE GLOBAL PRESS ARRAY FROM THIS FRAME'S PRESSES, AND SENDS THE CHANGES TO THE PC.
+# WITH BATCHED REPORTS, ALL CHANGES IN THE FRAME GO OUT TOGETHER IN ONE KEYBOARD REPORT. OTHERWISE EACH
+# CHANGED KEY IS SENT ON ITS OWN. EVERY REPORT SENT IS ADDED TO hidReportsThisFrame
 def KeyboardControl(arrowPresses, gameStyle, keyControlEnabled):
-    # ITERATE THROUGH THE ARROW PRESSES, CHECKING IF A KEYBOARD ACTION NEEDS TO BE PERFORMED
-    for keyCounter in range(5):
+    global hidReportsThisFrame, hidReportsSent
+    batchReport = batchedReportsEnabled == True and keyboardDevice is not None
+    reportNeeded = False
+    # ITERATE THROUGH THE PANEL PRESSES, CHECKING IF A KEYBOARD ACTION NEEDS TO BE PERFORMED
+    for keyCounter in range(panelLayouts[gameStyle].numOfPanels):
         # EXTRACT ARROW PRESS FROM PACKED VARIABLE, AND GET GLOBAL PRESS STATUS
         currentPress = arrowPresses[keyCounter]
         currentStatus = ReadKeypressArray(keyCounter)
@@ -430,8 +1921,12 @@ def KeyboardControl(arrowPresses, gameStyle, keyControlEnabled):
             WriteKeypressArray(keyCounter, 1)
             
             # IF THE KEYBOARD IS ENABLED, SEND THE KEYSTROKE. OTHERWISE, PRINT TO TERMINAL
-            if keyControlEnabled == True:
+            if keyControlEnabled == True and batchReport == True:
+                reportNeeded = True
+            elif keyControlEnabled == True:
                 SendKeypress(keyCounter, gameStyle)
+                hidReportsThisFrame += 1
+                hidReportsSent += 1
             else:
                 print("Key pressed index: ", end="")
                 print(keyCounter)
@@ -441,77 +1936,474 @@ def KeyboardControl(arrowPresses, gameStyle, keyControlEnabled):
             WriteKeypressArray(keyCounter, 0)
             
             # IF KEYBOARD IS ENABLED, SEND THE KEY-RELEASE. OTHERWISE, PRINT TO TERMINAL
-            if keyControlEnabled == True:
+            if keyControlEnabled == True and batchReport == True:
+                reportNeeded = True
+            elif keyControlEnabled == True:
                 SendKeyrelease(keyCounter, gameStyle)
+                hidReportsThisFrame += 1
+                hidReportsSent += 1
             else:
                 print("Key released index: ", end="")
                 print(keyCounter)
         else:
             pass
+    
+    # SEND EVERY CHANGE FROM THIS FRAME IN ONE REPORT
+    if reportNeeded == True:
+        SendKeyboardReport(gameStyle)
+
+"""ALL FUNCTIONS FOR KEEPING THE MAIN LOOP ON A FIXED FRAME RATE"""
+# FUNCTION THAT ENDS THE CURRENT FRAME, AND WORKS OUT WHEN THE NEXT ONE SHOULD START.
+# IF THE FRAME RAN PAST ITS DEADLINE, IT IS COUNTED AS AN OVERRUN AND THE NEXT FRAME STARTS RIGHT AWAY,
+# INSTEAD OF TRYING TO CATCH UP. WITH A FRAME PERIOD OF 0, THE NEXT FRAME ALWAYS STARTS RIGHT AWAY
+# RETURNS THE TIME THE NEXT FRAME SHOULD START AT, FROM time.monotonic_ns()
+def ScheduleNextFrame():
+    global frameDeadline, nextFrameStart, frameCount, frameOverruns, worstFrameOverrun
+    frameCount += 1
+    now = time.monotonic_ns()
+    if framePeriod <= 0:
+        nextFrameStart = now
+        return now
+    remaining = frameDeadline - now
+    if remaining < 0:
+        # OVERRUN: RECORD IT, AND START THE NEXT FRAME'S PERIOD FROM NOW
+        frameOverruns += 1
+        worstFrameOverrun = max(worstFrameOverrun, -remaining)
+        nextFrameStart = now
+        frameDeadline = now + framePeriod
+    else:
+        nextFrameStart = frameDeadline
+        frameDeadline += framePeriod
+    return nextFrameStart
+
+# FUNCTION THAT WAITS UNTIL THE DEADLINE OF THE CURRENT FRAME, THEN SETS THE DEADLINE OF THE NEXT ONE.
+# ONLY THE TIME LEFT IN THE FRAME IS WAITED, SO THE WORK DONE IN THE FRAME DOES NOT ADD TO THE PERIOD.
+# WHOLE MILLISECONDS ARE SLEPT, AND THE REST IS WAITED OUT BY POLLING THE SYSTEM TIME
+def WaitForNextFrame():
+    wakeTime = ScheduleNextFrame()
+    remaining = wakeTime - time.monotonic_ns()
+    if remaining >= 1000000:
+        time.sleep((remaining // 1000000) / 1000)
+    while time.monotonic_ns() < wakeTime:
+        pass
+
+# FUNCTION TO PRINT THE NUMBER OF FRAMES RUN, AND HOW MANY OF THEM RAN PAST THEIR DEADLINE
+def PrintFrameStats():
+    print("Frames: ", end="")
+    print(frameCount, end="")
+    print(" | Overruns: ", end="")
+    print(frameOverruns, end="")
+    print(" | Worst overrun (us): ", end="")
+    print(worstFrameOverrun // 1000)
+
+"""ALL FUNCTIONS FOR PROFILING THE MAIN LOOP"""
+# FUNCTION THAT STARTS TIMING A NEW FRAME
+# ACCEPTS THE TIME THE FRAME STARTED AT, FROM time.monotonic_ns()
+def ProfileStartFrame(frameStart):
+    global profileFrameStart, profileLastMark
+    profileFrameStart = frameStart
+    profileLastMark = frameStart
+
+# FUNCTION THAT RECORDS THE TIME SINCE THE LAST MARK AS THE TIME TAKEN BY A STAGE.
+# TIMES ARE WRITTEN TO A PREALLOCATED RING BUFFER, SO NOTHING IS ALLOCATED
+# ACCEPTS THE STAGE THAT JUST FINISHED
+def ProfileMark(stage):
+    global profileLastMark
+    now = time.monotonic_ns()
+    profileTimes[(stage * profileBufferSize) + profileWriteIndex] = min(now - profileLastMark, 0xFFFFFFFF)
+    profileLastMark = now
+
+# FUNCTION THAT RECORDS THE TIME TAKEN BY THE WHOLE FRAME, AND MOVES THE RING BUFFERS ON TO THE NEXT FRAME
+def ProfileEndFrame():
+    global profileWriteIndex, profileFrameCount
+    now = time.monotonic_ns()
+    profileTimes[(ProfileStageFrame * profileBufferSize) + profileWriteIndex] = min(now - profileFrameStart, 0xFFFFFFFF)
+    profileWriteIndex = (profileWriteIndex + 1) % profileBufferSize
+    profileFrameCount += 1
+
+# FUNCTION TO PRINT THE MIN/MEDIAN/P99/MAX TIME OF EVERY STAGE, IN MICROSECONDS, OVER THE RECORDED FRAMES
+def PrintFrameProfile():
+    sampleCount = min(profileFrameCount, profileBufferSize)
+    if sampleCount == 0:
+        print("No frames profiled yet.")
+        return
+    print("Stage times over ", end="")
+    print(sampleCount, end="")
+    print(" frames (us): min / median / p99 / max")
+    for stage in range(len(profileStageNames)):
+        stageStart = stage * profileBufferSize
+        stageTimes = sorted(profileTimes[stageStart:stageStart + sampleCount])
+        print(profileStageNames[stage], end=": ")
+        print(stageTimes[0] // 1000, end=" / ")
+        print(stageTimes[sampleCount // 2] // 1000, end=" / ")
+        print(stageTimes[(sampleCount * 99) // 100] // 1000, end=" / ")
+        print(stageTimes[sampleCount - 1] // 1000)
+
+# FUNCTION THAT PRINTS THE PROFILE IF IT HAS BEEN ASKED FOR OVER THE SERIAL CONSOLE
+def CheckProfileRequest():
+    if supervisor is None or supervisor.runtime.serial_bytes_available == 0:
+        return
+    if sys.stdin.read(1) == profileRequestKey:
+        PrintFrameProfile()
+
+"""ALL FUNCTIONS FOR THE ASYNCIO TASK RUNTIME"""
+# THE TASK RUNTIME SPLITS THE MAIN LOOP INTO COOPERATIVE TASKS. THE INPUT TASKS (SCAN, DETECTION AND HID)
+# RUN EVERY FRAME AND HAND OFF TO EACH OTHER WITH EVENTS. THE LOW PRIORITY TASKS (BUTTONS AND LEDS) WAIT IN
+# YieldToInput UNTIL THE INPUT TASKS ARE DONE WITH THE FRAME AND THERE IS ENOUGH TIME BEFORE THE NEXT ONE.
+# TASKS CANNOT BE INTERRUPTED, SO EVERY LOW PRIORITY STEP MUST TAKE LESS THAN lowPriorityGuard
+
+# FUNCTION THAT WAITS UNTIL A LOW PRIORITY TASK IS ALLOWED TO RUN: THE INPUT TASKS ARE DONE WITH
+# THE CURRENT FRAME, AND AT LEAST lowPriorityGuard IS LEFT BEFORE THE NEXT FRAME STARTS.
+# THE SLACK IT DECIDED ON, AND THE FRAME START IT WAS MEASURED AGAINST, ARE KEPT IN lowPrioritySlack AND
+# lowPriorityFrameStart, SO THE DECISION CAN BE CHECKED LATER WITHOUT READING THE CLOCK AGAIN
+async def YieldToInput():
+    global lowPrioritySlack, lowPriorityFrameStart
+    while True:
+        if inputPending == True:
+            await asyncio.sleep(0)
+            continue
+        if framePeriod <= 0:
+            return
+        slack = nextFrameStart - time.monotonic_ns()
+        if slack >= lowPriorityGuard:
+            lowPrioritySlack = slack
+            lowPriorityFrameStart = nextFrameStart
+            return
+        # NOT ENOUGH TIME LEFT IN THIS FRAME: SLEEP UNTIL THE NEXT FRAME HAS STARTED
+        await asyncio.sleep(max(slack, 0) / 1000000000)
+
+# TASK THAT READS THE SENSORS AND CHECKS THEM AGAINST THEIR THRESHOLDS ONCE EVERY FRAME
+# ACCEPTS THE NUMBER OF FRAMES TO RUN FOR (0 = RUN FOREVER)
+async def ScanTask(frameLimit):
+    global inputPending
+    framesRun = 0
+    while frameLimit == 0 or framesRun < frameLimit:
+        inputPending = True
+        frameStart = time.monotonic_ns()
+        if profilingEnabled == True:
+            ProfileStartFrame(frameStart)
+            ProfileMark(ProfileStageReset)
+        if doubleBufferEnabled == True:
+            # ONLY READ THE FRAME HERE. THE DETECTION TASK CHECKS IT
+            AcquireFrame(sensorMatrix)
+        else:
+            CheckAllPresses()
+            RecordFrame()
+        if profilingEnabled == True:
+            ProfileMark(ProfileStagePresses)
+        if summedAreaTablesEnabled == True:
+            BuildSummedAreaTables(sensorMatrix)
+        if profilingEnabled == True:
+            ProfileMark(ProfileStageRegions)
+        scanReady.set()
+        framesRun += 1
+        
+        # WAIT FOR THE NEXT FRAME. THE DETECTION AND HID TASKS RUN FIRST, THEN THE LOW PRIORITY TASKS
+        wakeTime = ScheduleNextFrame()
+        await asyncio.sleep(max(wakeTime - time.monotonic_ns(), 0) / 1000000000)
+
+# TASK THAT TURNS EACH FRAME'S DETECTIONS INTO PANEL PRESSES FOR THE ACTIVE LAYOUT
+async def DetectTask():
+    while True:
+        await scanReady.wait()
+        scanReady.clear()
+        if doubleBufferEnabled == True:
+            EvaluateFrame(sensorMatrix)
+            RecordFrame()
+        UpdatePanelPresses(activeLayout)
+        if profilingEnabled == True:
+            ProfileMark(ProfileStageArrows)
+        pressesReady.set()
+
+# TASK THAT SENDS EACH FRAME'S PANEL PRESSES TO THE KEYBOARD AND/OR GAMEPAD, THEN ENDS THE FRAME'S INPUT WORK
+async def HidTask():
+    global inputPending
+    while True:
+        await pressesReady.wait()
+        pressesReady.clear()
+        HidControl(panelPresses, activeGameStyle, keyboardAllowed)
+        if profilingEnabled == True:
+            ProfileMark(ProfileStageKeyboard)
+            ProfileMark(ProfileStageSave)
+            ProfileEndFrame()
+        inputPending = False
+        if telemetryEnabled == True:
+            SendTelemetry(sensorMatrix)
+
+# LOW PRIORITY TASK THAT POLLS THE KEYBOARD SWITCH AND CALIBRATION BUTTON, STEPS ANY INCREMENTAL
+# RECALIBRATION, AND SAVES NEWLY LEARNED CALIBRATION DATA WHILE NO ARROW IS HELD
+async def ButtonTask():
+    global keyboardAllowed, lastCalibrationSave
+    while True:
+        await YieldToInput()
+        keyboardAllowed = CheckKeyboardEnabled()
+        ResetCalibration(calibResetPin.value)
+        if calibrationSaveInterval > 0 and (time.monotonic() - lastCalibrationSave) >= calibrationSaveInterval:
+            if not any(panelPresses):
+                SaveCalibration(sensorMatrix)
+                lastCalibrationSave = time.monotonic()
+        if profilingEnabled == True:
+            CheckProfileRequest()
+        await asyncio.sleep(buttonPollInterval / 1000)
+
+# LOWEST PRIORITY TASK THAT RENDERS THE LEDS. THE LED DRIVER IS NOT PART OF THIS SCRIPT YET, SO THIS
+# CALLS ledRenderHook (IF ONE IS SET) ONCE PER LED FRAME
+async def LedTask():
+    global ledFramesRendered
+    while True:
+        await YieldToInput()
+        if ledRenderHook is not None:
+            ledRenderHook()
+            ledFramesRendered += 1
+        await asyncio.sleep(ledRenderInterval / 1000)
+
+# LOW PRIORITY TASK THAT WRITES OUT FULL RECORDING BUFFERS BETWEEN FRAMES, WHILE A RECORDING IS RUNNING
+async def RecordingTask():
+    while frameRecorder is not None:
+        await YieldToInput()
+        FlushRecording(nextFrameStart)
+        await asyncio.sleep(max(framePeriod, 1000000) / 1000000000)
+
+# FUNCTION THAT RUNS ALL OF THE TASKS UNTIL THE SCAN TASK HAS RUN FOR A NUMBER OF FRAMES
+# ACCEPTS THE NUMBER OF FRAMES TO RUN FOR (0 = RUN FOREVER)
+async def RunTasks(frameLimit):
+    global scanReady, pressesReady, keyboardAllowed, frameDeadline, nextFrameStart
+    scanReady = asyncio.Event()
+    pressesReady = asyncio.Event()
+    keyboardAllowed = CheckKeyboardEnabled()
+    frameDeadline = time.monotonic_ns() + framePeriod
+    nextFrameStart = time.monotonic_ns()
+    # THE INPUT TASKS ARE CREATED FIRST, SO THEY ARE AHEAD OF THE LOW PRIORITY TASKS IN THE RUN QUEUE
+    inputTasks = [asyncio.create_task(DetectTask()), asyncio.create_task(HidTask())]
+    lowPriorityTasks = [asyncio.create_task(ButtonTask()), asyncio.create_task(LedTask()),
+                        asyncio.create_task(RecordingTask())]
+    await ScanTask(frameLimit)
+    # LET THE LAST FRAME FINISH, THEN STOP EVERYTHING ELSE
+    while inputPending == True:
+        await asyncio.sleep(0)
+    for task in inputTasks + lowPriorityTasks:
+        task.cancel()
 
 """ ALL GLOBAL PYTHON ARRAYS WILL BE DEFINED BELOW"""
 # CREATE ALL DATA ARRAYS NEEDED FOR THE PROGRAM. ARRAY TYPE CAN BE SPECIFIED, IN EFFORT
 # TO USE MINIMAL MEMORY. THIS USES THE PYTHON ARRAY LIBRARY!
-sensorData_low = array.array('I')
-for rowCounter in range(numOfSensorRows):
-    for colCounter in range(numOfSensorCols):
-        sensorData_low.append(0)
-sensorData_threshold = array.array('I')
-for rowCounter in range(numOfSensorRows):
-    for colCounter in range(numOfSensorCols):
-        sensorData_threshold.append(0)
-sensorData_high = array.array('I')
-for rowCounter in range(numOfSensorRows):
-    for colCounter in range(numOfSensorCols):
-        sensorData_high.append(0)
-sensorData_current = array.array('I')
-for rowCounter in range(numOfSensorRows):
-    for colCounter in range(numOfSensorCols):
-        sensorData_current.append(0)
-sensorData_detection = array.array('B')
-for rowCounter in range(numOfSensorRows):
-    for colCounter in range(numOfSensorCols):
-        sensorData_detection.append(0)
+# THE SENSOR MATRIX OBJECT OWNS ALL SENSOR DATA: CALIBRATION, CURRENT READINGS AND DETECTIONS
+sensorMatrix = SensorMatrix(numOfSensorRows, numOfSensorCols)
+# LOOKUP TABLE FOR THE NUMBER OF SET BITS IN A BYTE
+popCountTable = bytearray(256)
+for byteValue in range(256):
+    popCountTable[byteValue] = (byteValue & 1) + popCountTable[byteValue >> 1]
 keypress_data = array.array('B')
-for arrayCounter in range(5):
+for arrayCounter in range(maxPanels):
     keypress_data.append(0)
 
+"""GLOBAL STATE FOR THE SENSOR READ PATH"""
+rowSettleTimes = array.array('H', bytearray(2 * numOfSensorRows))     # settle time of each row, in microseconds
+slowReadPath = False                # True if readings are settled or oversampled in a loop
+readLoopShift = 0                   # 2^shift reads are summed for every reading on the slower read path
+voltageInPin = OpenSensorInput()
+SetReadPath(readSettleTime, readOversampleShift)
+
+"""GLOBAL STATE FOR THE GRAY-CODE MUX SCAN ENGINE"""
+# MUX SELECTION PINS, ORDERED BY THEIR BIT IN A MUX CODE
+muxPins = (muxOutApin, muxOutBpin, muxOutCpin, muxOutDpin,
+           muxInApin, muxInBpin, muxInCpin, muxInDpin)
+muxState = 0                # last mux code written to the pins (all pins start low as outputs)
+muxPinWriteCount = 0        # total number of mux pin writes, to measure scan cost
+# PRECOMPUTED SCAN PROGRAM THAT READS EVERY SENSOR IN THE MATRIX
+fullScanIndexes = tuple(GrayScanOrder())
+fullScanProgram = CompileScanProgram(fullScanIndexes)
+# COMPILE EVERY PANEL LAYOUT ONCE. SWITCHING GAME STYLES ONLY SWAPS WHICH ONE IS ACTIVE
+panelLayouts = tuple(PanelLayout(definition) for definition in panelLayoutDefinitions)
+activeLayout = panelLayouts[activeGameStyle]
+# SCAN PLAN OF THE ACTIVE LAYOUT, ONLY READING SENSORS THAT A PANEL USES
+panelScanPlan = activeLayout.scanPlan
+# SET THE ACTIVE SCAN PLAN. SET TO TRUE TO READ EVERY SENSOR FOR DIAGNOSTICS
+fullScanMode = False
+SetFullScanMode(fullScanMode)
+
+"""GLOBAL STATE FOR THE PANEL DEBOUNCE"""
+panelHitCounts = bytearray(maxPanels)           # hits counted in each panel region of the active layout this frame
+debounceStates = bytearray(maxPanels)           # debounce state of each panel
+debounceHeldFrames = bytearray(b"\xff" * maxPanels)    # frames since each panel's last confirmed change (255 = long ago)
+debouncePendingFrames = bytearray(maxPanels)    # confirming frames in a row for each pending change
+debouncePendingStart = array.array('I', bytearray(4 * maxPanels))      # time in ms each pending change started
+panelPresses = bytearray(maxPanels)             # presses of each panel of the active layout (1 = pressed)
+panelPressure = array.array('H', bytearray(2 * maxPanels))             # summed pressure of each panel of the active layout
+
+"""GLOBAL STATE FOR THE DOUBLE-BUFFERED SENSOR FRAMES"""
+framesAcquired = 0              # frames read into the back buffer (only written by AcquireFrame)
+framesEvaluated = 0             # frames swapped to the front and checked (only written by EvaluateFrame)
+
+"""GLOBAL STATE FOR THE ACTIVITY-ADAPTIVE SCAN SCHEDULER"""
+# ONE SCAN GROUP PER PANEL REGION OF THE ACTIVE LAYOUT
+scanGroups = activeLayout.scanGroups
+scanGroupDue = bytearray(maxPanels)                     # 1 if the group is read this frame
+regionScanCounts = array.array('L')                     # total number of times each group was read
+regionFramesSinceScan = array.array('B')                # frames since each group was last read
+for groupCounter in range(maxPanels):
+    regionScanCounts.append(0)
+    # STAGGER THE IDLE SWEEPS SO THE IDLE GROUPS ARE NOT ALL READ ON THE SAME FRAME
+    regionFramesSinceScan.append(groupCounter % idleScanInterval)
+scanFrameCount = 0                                      # total number of frames scheduled
+
+"""GLOBAL STATE FOR THE INCREMENTAL RECALIBRATION"""
+recalibrationSlices = CompileRecalibrationSlices(recalibrationSliceSize)
+recalibrationSums = array.array('I', bytearray(4 * numOfSensors))      # running sum of every sensor's samples
+recalibrationReads = array.array('H', bytearray(2 * numOfSensors))     # latest slice read by the incremental recalibration
+recalibrationTable = array.array('H', bytearray(2 * calibrationStride * numOfSensors))  # spare table the new calibration is built in
+recalibrationActive = False         # True while an incremental recalibration is running
+recalibrationStep = 0               # number of slices read so far
+
+"""GLOBAL STATE FOR BASELINE DRIFT TRACKING"""
+driftFrameCount = 0                 # frames checked, used to time the baseline updates and the high value decay
+driftUpdateDue = False              # True on frames where idle baselines update
+highDecayDue = False                # True on frames where idle high values decay
+driftUpdateInterval = 1             # frames between baseline updates, for driftIntervalFramePeriod
+driftIntervalFramePeriod = -1       # framePeriod driftUpdateInterval was worked out for (-1 = not yet)
+
+"""GLOBAL STATE FOR THE SAVED CALIBRATION"""
+# USE THE PICO'S NVM IF IT IS AVAILABLE, OTHERWISE KEEP THE CALIBRATION IN A FILE
+if microcontroller is not None and getattr(microcontroller, "nvm", None) is not None:
+    calibrationStore = microcontroller.nvm
+else:
+    calibrationStore = FileNVM(calibrationFilePath, 4096)
+lastCalibrationSave = time.monotonic()      # time of the last check for newly learned calibration data
+
+"""GLOBAL STATE FOR THE HID REPORTS"""
+keyboardReport = bytearray(keyboardReportLength)    # report buffer reused for every batched keyboard report
+keyboardDevice = None           # USB HID keyboard the batched reports are sent to, found at startup
+gamepadReport = bytearray(1)    # report buffer reused for every gamepad report
+gamepadDevice = None            # panel gamepad set up by boot.py, found at startup
+lastGamepadMask = 0             # panel bitmask sent in the last gamepad report
+hidReportsThisFrame = 0         # HID reports sent for the latest frame
+hidReportsSent = 0              # HID reports sent since startup
+
+"""GLOBAL STATE FOR THE SENSOR TELEMETRY"""
+telemetryHeaderSize = struct.calcsize(telemetryHeaderFormat)
+telemetryTrailerSize = struct.calcsize(telemetryTrailerFormat)
+telemetryPacketSize = telemetryHeaderSize + (2 * (1 + calibrationStride) * numOfSensors) + numOfSensorRows + telemetryTrailerSize
+telemetryHeader = bytearray(telemetryHeaderSize)    # header buffer reused for every packet
+telemetryTrailer = bytearray(telemetryTrailerSize)  # trailer buffer reused for every packet
+telemetryPort = None            # usb_cdc data port the telemetry (or a recording) is sent over, found at startup
+nextTelemetryTime = 0           # earliest time the next telemetry packet can be sent
+telemetrySequence = 0           # sequence number of the next telemetry packet
+telemetryPacketsSent = 0        # telemetry packets sent since startup
+telemetryPacketsCut = 0         # telemetry packets only partly sent, because the PC was not reading fast enough
+
+"""GLOBAL STATE FOR THE FRAME SCHEDULER"""
+frameDeadline = time.monotonic_ns() + framePeriod       # time the current frame should end at
+nextFrameStart = time.monotonic_ns()                    # time the next frame is scheduled to start at
+frameCount = 0                  # frames run since startup
+frameOverruns = 0               # frames that ran past their deadline
+worstFrameOverrun = 0           # longest a frame has run past its deadline, in nanoseconds
+
+"""GLOBAL STATE FOR THE FRAME PROFILER"""
+profileTimes = array.array('I', bytearray(4 * len(profileStageNames) * profileBufferSize))  # ring buffer of stage times (ns) for every stage
+profileWriteIndex = 0           # position in the ring buffers the current frame is written to
+profileFrameCount = 0           # frames profiled since startup
+profileFrameStart = 0           # time the current frame started at
+profileLastMark = 0             # time the last stage finished at
+
+"""GLOBAL STATE FOR THE ASYNCIO TASK RUNTIME"""
+scanReady = None                # event set by the scan task when a frame's detections are ready
+pressesReady = None             # event set by the detection task when a frame's arrow presses are ready
+inputPending = False            # True while the input tasks are working on a frame
+lowPrioritySlack = 0            # nanoseconds left before the next frame when a low priority task was last let run
+lowPriorityFrameStart = 0       # the next frame's start time that slack was measured against
+keyboardAllowed = False         # state of the keyboard switch, polled by the button task
+ledRenderHook = None            # function called by the LED task to render one LED frame
+ledFramesRendered = 0           # LED frames rendered by the LED task
+
+"""GLOBAL STATE FOR THE RAW FRAME RECORDER"""
+frameRecorder = None            # recorder of the raw sensor values, while a recording is running
+
 """ BEGIN THE ACTUAL PROCESS OF THE PROGRAM """
-# CALIBRATE THE SENSOR MATRIX BY FINDING THE LOW RANGE OF SENSORS
+# MEASURE THE SETTLE TIME EACH ROW NEEDS, IF ENABLED. THIS MUST HAPPEN BEFORE ANY CALIBRATION
+if settleAutoTuneEnabled == True:
+    print("Row settle times (us): ", end="")
+    print(list(AutoTuneSettleTimes()))
+# LOAD THE SAVED CALIBRATION, OR CALIBRATE FROM SCRATCH IF IT CANNOT BE USED
+if LoadStartupCalibration() == True:
+    print("Loaded the saved calibration.")
+else:
+    print("Calibrated the sensor matrix.")
 # PRINT OUT THE RESULT TO VERIFY THE PROCESS WORKED
-CalibrateLow()
-print(sensorData_low)
+PrintCalibration()
 time.sleep(3)
 
 # CREATE GLOBAL KEYBOARD OBJECT FOR KEYBOARD CONTROL
 picoKeyboard = Keyboard(usb_hid.devices)
+keyboardDevice = FindKeyboardDevice()
+gamepadDevice = FindGamepadDevice()
+telemetryPort = FindTelemetryPort()
+
+# START RECORDING THE RAW SENSOR VALUES, IF ENABLED
+StartRecording()
+
+# RUN AS COOPERATIVE TASKS IF ENABLED. THIS NEVER RETURNS
+if asyncRuntimeEnabled == True and asyncio is not None:
+    asyncio.run(RunTasks(0))
+
+# START THE FIRST FRAME NOW, SO THE TIME SPENT CALIBRATING IS NOT COUNTED AS AN OVERRUN
+frameDeadline = time.monotonic_ns() + framePeriod
 
 # ENTER MAIN LOOP TO REPEAT PROCESSES
 while True:
     # GET THE CURRENT SYSTEM TIME
     start = time.monotonic_ns()
+    if profilingEnabled == True:
+        ProfileStartFrame(start)
     
     # CHECK TO SEE IF A RESET OF CALIBRATION DATA IS DESIRED
     ResetCalibration(calibResetPin.value)
+    if profilingEnabled == True:
+        ProfileMark(ProfileStageReset)
     
-    # CHECK TO SEE IF ANY PRESSES HAVE BEEN DETECTED
+    # CHECK TO SEE IF ANY PRESSES HAVE BEEN DETECTED, AND RECORD THE RAW VALUES IF A RECORDING IS RUNNING
     CheckAllPresses()
+    RecordFrame()
+    if profilingEnabled == True:
+        ProfileMark(ProfileStagePresses)
+    
+    # BUILD THE SUMMED-AREA TABLES IF ANY REGION QUERIES ARE NEEDED THIS FRAME
+    if summedAreaTablesEnabled == True:
+        BuildSummedAreaTables(sensorMatrix)
+    if profilingEnabled == True:
+        ProfileMark(ProfileStageRegions)
     
-    # TRANSLATE PRESSES INTO POSSIBLE ARROW KEYS
-    pressesDDR = CheckArrowPressesDDR()
+    # TRANSLATE PRESSES INTO THE ACTIVE LAYOUT'S PANELS, DEBOUNCING THEM IF ENABLED
+    UpdatePanelPresses(activeLayout)
+    if profilingEnabled == True:
+        ProfileMark(ProfileStageArrows)
     
     # CHECK IF KEYBOARD INPUTS ARE ENABLED USING A SWITCH
     allowKeyboard = CheckKeyboardEnabled()
     
-    # SEND THE PRESSES TO THE KEYBOARD MANIPULATION FUNCTION
-    KeyboardControl(pressesDDR, StyleDDR, allowKeyboard)
+    # SEND THE PRESSES TO THE KEYBOARD AND/OR GAMEPAD, THEN THE SENSOR TELEMETRY IF IT IS ENABLED
+    HidControl(panelPresses, activeGameStyle, allowKeyboard)
+    if telemetryEnabled == True:
+        SendTelemetry(sensorMatrix)
+    if profilingEnabled == True:
+        ProfileMark(ProfileStageKeyboard)
+    
+    # EVERY SO OFTEN, SAVE NEWLY LEARNED HIGH/THRESHOLD VALUES. ONLY DO THIS WHILE NO ARROW IS
+    # HELD, SINCE WRITING TO FLASH PAUSES THE LOOP FOR A MOMENT
+    if calibrationSaveInterval > 0 and (time.monotonic() - lastCalibrationSave) >= calibrationSaveInterval:
+        if not any(panelPresses):
+            SaveCalibration(sensorMatrix)
+            lastCalibrationSave = time.monotonic()
+    if profilingEnabled == True:
+        ProfileMark(ProfileStageSave)
+        ProfileEndFrame()
+        CheckProfileRequest()
     
     # CALCULATE HOW LONG IT TOOK FOR THE PROCESSES TO OCCUR
     ms_duration = (((time.monotonic_ns() - start) + 500000)
                // 1000000)
     
     # PRINT OUT THE RESULTS TO THE USER
-    #print(pressesDDR)
+    #print(panelPresses)
     
     # SOME OTHER POSSIBLE PRINTS FOR MORE INFORMATION
     #PrintSensorsVsThresholds()
@@ -522,6 +2414,7 @@ while True:
     #print("Time it took this loop: ", end="")
     #print(ms_duration)
     
-    # SLOW DOWN THE PROCESS FOR TERMINAL SANITY
-    time.sleep(.05)
+    # WRITE OUT A FULL RECORDING BUFFER IF THIS FRAME HAS TIME LEFT, THEN WAIT OUT WHAT IS LEFT OF ITS PERIOD
+    FlushRecording(frameDeadline)
+    WaitForNextFrame()
     #print("-------------------------------")
\ No newline at end of file
@@ -47,6 +47,16 @@ calibResetPin.pull = Pull.UP
 numOfSensorRows = 12
 numOfSensorCols = 8
 numOfSensors = 96
+"""CONSTANTS FOR THE GRAY-CODE MUX SCAN ENGINE"""
+# ORDER TO VISIT THE SENSOR ROWS IN. EACH ROW NUMBER ONLY DIFFERS FROM THE NEXT BY ONE BIT,
+# SO MOVING TO THE NEXT ROW ONLY TOGGLES ONE OUTPUT MUX PIN
+grayRowOrder = (4, 5, 7, 6, 2, 3, 1, 0, 8, 9, 11, 10)
+# ORDER TO VISIT THE SENSOR COLUMNS IN (3-BIT GRAY CODE). EVERY OTHER ROW WALKS THIS IN
+# REVERSE, SO THE COLUMN STAYS THE SAME WHEN THE SCAN MOVES TO A NEW ROW
+grayColOrder = (0, 1, 3, 2, 6, 7, 5, 4)
+
+"""CONSTANTS FOR THE FRAME SCHEDULER"""
+framePeriod = 100000000         # nanoseconds from the start of one frame to the next, slow enough to read the terminal (0 = run as fast as possible)
 
 """ALL FUNCTIONS RELATED TO READING AND WRITING FROM GLOBAL DATA ARRAYS"""
 # FUNCTIONS FOR ARRAY THAT STORE THE LOW RANGE CALIBRATION DATA
@@ -93,55 +103,101 @@ def ReadSensorDetectionArray(row, col):
 def IntegerMap(x, i_m, i_M, o_m, o_M):
     return max(min(o_M, (x - i_m) * (o_M - o_m) // (i_M - i_m) + o_m), o_m)
 
+# FUNCTION TO CONVERT A ROW AND COLUMN INTO THE 8-BIT CODE THAT SELECTS IT ON THE MUXES.
+# THE LOW 4 BITS DRIVE THE OUTPUT MUX A-D PINS (ROW), THE HIGH 4 BITS DRIVE THE INPUT MUX A-D PINS (COLUMN)
+def RowCol2MuxCode(row, col):
+    return row | (col << 4)
+
+# FUNCTION TO SET THE MUX SELECTION PINS TO A NEW MUX CODE.
+# ONLY THE PINS WHOSE BIT IS DIFFERENT FROM THE LAST WRITTEN MUX STATE ARE WRITTEN,
+# AND EVERY PIN WRITE IS ADDED TO THE PIN WRITE COUNTER
+def SetMuxCode(muxCode):
+    global muxState, muxPinWriteCount
+    changedBits = muxCode ^ muxState
+    bitCounter = 0
+    while changedBits:
+        if changedBits & 1:
+            muxPins[bitCounter].value = (muxCode >> bitCounter) & 1
+            muxPinWriteCount += 1
+        changedBits >>= 1
+        bitCounter += 1
+    muxState = muxCode
+
 # COMPLETE FUNCTION TO READ THE VALUE OF A SINGLE SENSOR IN THE SENSOR ARRAY.
 # ACCEPTS A ROW AND COLUMN VALUE, AND RETURNS NOTHING. INSTEAD, THIS FUNCTION
 # DIRECTLY WRITES TO THE PROGRAM'S SENSOR DATA ARRAY.
 # THIS FUNCTION SHOULD TAKE LESS THAN 0ms TO PERFORM!
 def CheckOneSensor(row, col):
-    # CREATE VARIABLES TO REPRESENT EACH PIN TO SET ON THE OUTPUT MUX.
-    # USE FLOOR DIVISION TO CONVERT THE DECIMAL NUMBER TO BINARY, AND STORE
-    # THE RESULT IN THE OUTPUT MUX'S A-D PINS
-    outputA = row % 2
-    tempMath = row // 2
-    outputB = tempMath % 2
-    tempMath = tempMath // 2
-    outputC = tempMath % 2
-    tempMath = tempMath // 2
-    outputD = tempMath % 2
-    # DO THE SAME PROCESS, EXCEPT FOR THE CURRENT COLUMN. RESULTS ARE STORE IN
-    # INPUT MUX PINS
-    inputA = col % 2
-    tempMath = col // 2
-    inputB = tempMath % 2
-    tempMath = tempMath // 2
-    inputC = tempMath % 2
-    tempMath = tempMath // 2
-    inputD = tempMath % 2
-    
-    # SET THE PINS ON THE PICO TO THE VARIABLES THAT WERE CALCULATED
-    muxOutApin.value = outputA
-    muxOutBpin.value = outputB
-    muxOutCpin.value = outputC
-    muxOutDpin.value = outputD
-    muxInApin.value = inputA
-    muxInBpin.value = inputB
-    muxInCpin.value = inputC
-    muxInDpin.value = inputD
+    # SET THE MUX PINS TO SELECT THE SENSOR. PINS ALREADY AT THE RIGHT LEVEL ARE NOT TOUCHED
+    SetMuxCode(RowCol2MuxCode(row, col))
     
-    # MUX PINS ARE SET: READ THE VOLTAGE FROM A SPECIFIC SENSOR. THEN REMAP THE
-    # RESULT INTO A SMALLER RANGE TO SAVE DATA
+    # MUX PINS ARE SET: READ THE VOLTAGE FROM A SPECIFIC SENSOR
     rawVoltage = voltageInPin.value
     
     # WRITE DATA TO SENSOR DATA ARRAY
     WriteSensorArray_CurrentData(row, col, rawVoltage)
+
+# FUNCTION THAT RETURNS THE ORDER TO VISIT EVERY SENSOR IN, AS A LIST OF FLAT INDEXES.
+# ROWS FOLLOW grayRowOrder AND COLUMNS SNAKE BACK AND FORTH ALONG grayColOrder,
+# SO EACH STEP OF THE WALK ONLY CHANGES ONE MUX PIN
+def GrayScanOrder():
+    scanOrder = []
+    for rowStep in range(numOfSensorRows):
+        row = grayRowOrder[rowStep]
+        for colStep in range(numOfSensorCols):
+            if rowStep % 2 == 0:
+                col = grayColOrder[colStep]
+            else:
+                col = grayColOrder[(numOfSensorCols - 1) - colStep]
+            scanOrder.append((row * numOfSensorCols) + col)
+    return scanOrder
+
+# FUNCTION THAT PRECOMPUTES A "SCAN PROGRAM" FOR A LIST OF SENSOR INDEXES, IN THE ORDER GIVEN.
+# EACH STEP OF THE PROGRAM HOLDS THE SENSOR INDEX, AND ONLY THE (pin, value) WRITES NEEDED
+# TO GET THERE FROM THE STEP BEFORE IT.
+# RETURNS A PACKED VARIABLE FOR (steps, first mux code, last mux code, pin writes per scan)
+def CompileScanProgram(sensorIndexes):
+    scanSteps = []
+    stepPinWrites = 0
+    firstMuxCode = 0
+    lastMuxCode = 0
+    for stepCounter in range(len(sensorIndexes)):
+        index = sensorIndexes[stepCounter]
+        muxCode = RowCol2MuxCode(index // numOfSensorCols, index % numOfSensorCols)
+        pinChanges = []
+        if stepCounter == 0:
+            # THE FIRST STEP IS REACHED WITH SetMuxCode, SINCE THE PINS COULD BE IN ANY STATE
+            firstMuxCode = muxCode
+        else:
+            for bitCounter in range(8):
+                if ((muxCode ^ lastMuxCode) >> bitCounter) & 1:
+                    pinChanges.append((muxPins[bitCounter], (muxCode >> bitCounter) & 1))
+        stepPinWrites += len(pinChanges)
+        scanSteps.append((index, tuple(pinChanges)))
+        lastMuxCode = muxCode
+    return (tuple(scanSteps), firstMuxCode, lastMuxCode, stepPinWrites)
+
+# FUNCTION TO READ EVERY SENSOR IN A PRECOMPUTED SCAN PROGRAM
+# ACCEPTS A SCAN PROGRAM FROM CompileScanProgram, AND WRITES DIRECTLY TO THE CURRENT DATA ARRAY
+def RunScanProgram(scanProgram):
+    global muxState, muxPinWriteCount
+    scanSteps, firstMuxCode, lastMuxCode, stepPinWrites = scanProgram
+    # MOVE THE MUXES TO THE FIRST SENSOR, THEN ONLY APPLY THE PRECOMPUTED PIN CHANGES
+    SetMuxCode(firstMuxCode)
+    readPin = voltageInPin
+    currentData = sensorData_current
+    for index, pinChanges in scanSteps:
+        for pin, pinValue in pinChanges:
+            pin.value = pinValue
+        currentData[index] = readPin.value
+    muxState = lastMuxCode
+    muxPinWriteCount += stepPinWrites
     
 # FUNCTION TO AUTOMATICALLY CHECK ALL SENSORS IN THE SENSOR MATRIX
 # ACCEPTS NOTHING, AND RETURNS NOTHING
 def CheckAllSensors():
-    # ITERATE THROUGH EACH ROW AND COLUMN
-    for rowCounter in range(numOfSensorRows):
-        for colCounter in range(numOfSensorCols):
-            CheckOneSensor(rowCounter, colCounter)
+    # WALK THE WHOLE MATRIX IN GRAY-CODE ORDER
+    RunScanProgram(fullScanProgram)
 
 """ ALL FUNCTIONS RELATED TO PERFORMING CALIBRATIONS FOR THE SYSTEM"""
 # FUNCTION TO CALIBRATE THE SENSOR MATRIX, FINDING THE AVERAGE OF THE LOWEST POSSIBLE READINGS
@@ -331,6 +387,40 @@ def PrintSensorsVsThresholds():
             print(ReadSensorArray_ThresholdData(rowCounter, colCounterThreshold), end=" ")
         print("")
 
+"""ALL FUNCTIONS FOR KEEPING THE MAIN LOOP ON A FIXED FRAME RATE"""
+# FUNCTION THAT WAITS UNTIL THE DEADLINE OF THE CURRENT FRAME, THEN SETS THE DEADLINE OF THE NEXT ONE.
+# ONLY THE TIME LEFT IN THE FRAME IS WAITED, SO THE WORK DONE IN THE FRAME DOES NOT ADD TO THE PERIOD.
+# WHOLE MILLISECONDS ARE SLEPT, AND THE REST IS WAITED OUT BY POLLING THE SYSTEM TIME.
+# IF THE FRAME RAN PAST ITS DEADLINE, IT IS COUNTED AS AN OVERRUN AND THE NEXT FRAME STARTS RIGHT AWAY.
+# WITH A FRAME PERIOD OF 0, THE LOOP RUNS AS FAST AS IT CAN
+def WaitForNextFrame():
+    global frameDeadline, frameCount, frameOverruns, worstFrameOverrun
+    frameCount += 1
+    if framePeriod <= 0:
+        return
+    now = time.monotonic_ns()
+    remaining = frameDeadline - now
+    if remaining < 0:
+        # OVERRUN: RECORD IT, AND START THE NEXT FRAME'S PERIOD FROM NOW INSTEAD OF TRYING TO CATCH UP
+        frameOverruns += 1
+        worstFrameOverrun = max(worstFrameOverrun, -remaining)
+        frameDeadline = now + framePeriod
+        return
+    if remaining >= 1000000:
+        time.sleep((remaining // 1000000) / 1000)
+    while time.monotonic_ns() < frameDeadline:
+        pass
+    frameDeadline += framePeriod
+
+# FUNCTION TO PRINT THE NUMBER OF FRAMES RUN, AND HOW MANY OF THEM RAN PAST THEIR DEADLINE
+def PrintFrameStats():
+    print("Frames: ", end="")
+    print(frameCount, end="")
+    print(" | Overruns: ", end="")
+    print(frameOverruns, end="")
+    print(" | Worst overrun (us): ", end="")
+    print(worstFrameOverrun // 1000)
+
 """ ALL GLOBAL PYTHON ARRAYS WILL BE DEFINED BELOW"""
 # CREATE ALL DATA ARRAYS NEEDED FOR THE PROGRAM. ARRAY TYPE CAN BE SPECIFIED, IN EFFORT
 # TO USE MINIMAL MEMORY. THIS USES THE PYTHON ARRAY LIBRARY!
@@ -355,6 +445,21 @@ for rowCounter in range(numOfSensorRows):
     for colCounter in range(numOfSensorCols):
         sensorData_detection.append(0)
 
+"""GLOBAL STATE FOR THE GRAY-CODE MUX SCAN ENGINE"""
+# MUX SELECTION PINS, ORDERED BY THEIR BIT IN A MUX CODE
+muxPins = (muxOutApin, muxOutBpin, muxOutCpin, muxOutDpin,
+           muxInApin, muxInBpin, muxInCpin, muxInDpin)
+muxState = 0                # last mux code written to the pins (all pins start low as outputs)
+muxPinWriteCount = 0        # total number of mux pin writes, to measure scan cost
+# PRECOMPUTED SCAN PROGRAM THAT READS EVERY SENSOR IN THE MATRIX
+fullScanProgram = CompileScanProgram(GrayScanOrder())
+
+"""GLOBAL STATE FOR THE FRAME SCHEDULER"""
+frameDeadline = time.monotonic_ns() + framePeriod       # time the current frame should end at
+frameCount = 0                  # frames run since startup
+frameOverruns = 0               # frames that ran past their deadline
+worstFrameOverrun = 0           # longest a frame has run past its deadline, in nanoseconds
+
 """ BEGIN THE ACTUAL PROCESS OF THE PROGRAM """
 # CALIBRATE THE SENSOR MATRIX BY FINDING THE LOW RANGE OF SENSORS
 # PRINT OUT THE RESULT TO VERIFY THE PROCESS WORKED
@@ -362,6 +467,9 @@ CalibrateLow()
 print(sensorData_low)
 time.sleep(3)
 
+# START THE FIRST FRAME NOW, SO THE TIME SPENT CALIBRATING IS NOT COUNTED AS AN OVERRUN
+frameDeadline = time.monotonic_ns() + framePeriod
+
 # ENTER MAIN LOOP TO REPEAT PROCESSES
 while True:
     # GET THE CURRENT SYSTEM TIME
@@ -393,6 +501,6 @@ while True:
     print("Time it took this loop: ", end="")
     print(ms_duration)
     
-    # SLOW DOWN THE PROCESS FOR TERMINAL SANITY
-    time.sleep(0.1)
+    # SLOW DOWN THE PROCESS FOR TERMINAL SANITY, ONLY WAITING OUT WHAT IS LEFT OF THIS FRAME'S PERIOD
+    WaitForNextFrame()
     print("-------------------------------")
\ No newline at end of file
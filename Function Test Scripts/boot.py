@@ -0,0 +1,58 @@
+"""
+   THIS SCRIPT RUNS ONCE WHEN THE PICO STARTS UP, BEFORE USB IS SET UP, AND CHOOSES WHICH USB HID DEVICES
+   THE PICO SHOWS UP AS. COPY IT TO THE ROOT OF THE CIRCUITPY DRIVE NEXT TO code.py.
+   ALONG WITH THE NORMAL KEYBOARD, IT ADDS A SMALL GAMEPAD WHOSE REPORT IS ONE BYTE: ONE BIT PER PANEL.
+   THE GAMEPAD IS ONLY USED BY KeyboardInput_Test IF ITS hidOutputMode ASKS FOR IT. IT IS OFF BY DEFAULT, SINCE
+   ADDING IT CHANGES THE USB DEVICES THE COMPUTER SEES; SET gamepadEnabled TO True TO ADD IT.
+   NOTE: THE USB POLLING INTERVAL OF HID DEVICES IS SET BY CIRCUITPYTHON ITSELF AND CANNOT BE CHANGED HERE.
+   IT CAN ALSO MAKE THE CIRCUITPY DRIVE WRITABLE BY THE SCRIPTS, SO KeyboardInput_Test CAN SAVE RAW FRAME RECORDINGS.
+   WHILE IT IS, THE COMPUTER CAN ONLY READ THE DRIVE, SO TURN recordingEnabled BACK OFF TO EDIT THE SCRIPTS AGAIN.
+   LASTLY, IT CAN ADD A SECOND USB SERIAL PORT NEXT TO THE CONSOLE, WHICH KeyboardInput_Test SENDS SENSOR TELEMETRY ON,
+   OR STREAMS A RAW FRAME RECORDING OVER (THE DRIVE DOES NOT NEED TO BE WRITABLE FOR THAT).
+"""
+
+import usb_hid                                            # IMPORTS SETTING UP USB HID DEVICES
+import storage                                            # IMPORTS CHOOSING WHO CAN WRITE TO THE CIRCUITPY DRIVE
+import usb_cdc                                            # IMPORTS SETTING UP THE USB SERIAL PORTS
+
+# CONSTANTS FOR THE USB HID DEVICES
+gamepadEnabled = False          # when True, the panel gamepad is added to the normal keyboard, mouse and consumer control
+gamepadReportId = 4             # report ID of the gamepad, after the keyboard (1), mouse (2) and consumer control (3)
+recordingEnabled = False        # when True, the scripts can write to the CIRCUITPY drive (and the computer cannot)
+telemetryEnabled = False        # when True, a second USB serial port is added for sensor telemetry
+recordingToSerial = False       # when True, the second USB serial port is added for streaming a recording
+
+# REPORT DESCRIPTOR FOR A GAMEPAD WITH 8 BUTTONS, PACKED INTO ONE BYTE (BIT 0 = BUTTON 1)
+gamepadDescriptor = bytes((
+    0x05, 0x01,                 # USAGE PAGE (GENERIC DESKTOP)
+    0x09, 0x05,                 # USAGE (GAME PAD)
+    0xA1, 0x01,                 # COLLECTION (APPLICATION)
+    0x85, gamepadReportId,      #   REPORT ID
+    0x05, 0x09,                 #   USAGE PAGE (BUTTON)
+    0x19, 0x01,                 #   USAGE MINIMUM (BUTTON 1)
+    0x29, 0x08,                 #   USAGE MAXIMUM (BUTTON 8)
+    0x15, 0x00,                 #   LOGICAL MINIMUM (0)
+    0x25, 0x01,                 #   LOGICAL MAXIMUM (1)
+    0x75, 0x01,                 #   REPORT SIZE (1 BIT)
+    0x95, 0x08,                 #   REPORT COUNT (8 BUTTONS)
+    0x81, 0x02,                 #   INPUT (DATA, VARIABLE, ABSOLUTE)
+    0xC0,                       # END COLLECTION
+))
+
+if gamepadEnabled == True:
+    panelGamepad = usb_hid.Device(
+        report_descriptor=gamepadDescriptor,
+        usage_page=0x01,
+        usage=0x05,
+        report_ids=(gamepadReportId,),
+        in_report_lengths=(1,),
+        out_report_lengths=(0,),
+    )
+    usb_hid.enable((usb_hid.Device.KEYBOARD, usb_hid.Device.MOUSE,
+                    usb_hid.Device.CONSUMER_CONTROL, panelGamepad))
+
+if recordingEnabled == True:
+    storage.remount("/", readonly=False)
+
+if telemetryEnabled == True or recordingToSerial == True:
+    usb_cdc.enable(console=True, data=True)
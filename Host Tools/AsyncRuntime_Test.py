@@ -0,0 +1,117 @@
+"""
+   THIS SCRIPT RUNS THE ASYNCIO TASK RUNTIME OF KeyboardInput_Test ON A DESKTOP PYTHON, WITH THE HARDWARE
+   STAND-INS IN THIS FOLDER. AN ARROW PRESS IS SIMULATED PART WAY THROUGH THE RUN, WHILE A SLOW LED RENDER
+   RUNS IN THE BACKGROUND, TO CHECK THAT THE INPUT TASKS NEVER WAIT BEHIND THE LOW PRIORITY TASKS, AND THAT
+   FRAME OVERRUNS AND KEY LATENCY STAY WITHIN THEIR BOUNDS. IT EXITS WITH 1 IF ANY CHECK FAILS.
+"""
+import asyncio
+import time
+import HostLoader
+import TestResults
+import analogio
+import digitalio
+import usb_hid
+from adafruit_hid import keyboard
+
+# CONSTANTS FOR THE TEST
+framesToRun = 500               # frames the scan task runs for
+pressStartTime = 0.2            # seconds into the run the UP arrow is pressed
+pressEndTime = 0.6              # seconds into the run the UP arrow is released
+ledWorkTime = 300000            # nanoseconds of work done by every LED render
+pressedValue = 30000            # sensor value while pressed
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+# BOUNDS THE RUN MUST STAY WITHIN. A DESKTOP OS CAN WAKE A SLEEPING TASK SEVERAL ms LATE, SO THE OVERRUN BOUNDS
+# ALLOW FOR THAT, WHILE AN LED RENDER THAT RUNS INTO THE NEXT FRAME IS NEVER ALLOWED
+maxOverrunShare = 0.1           # most of the frames that may run past their deadline
+maxWorstOverrun = 25000000      # nanoseconds the worst overrun may last
+maxPressLatency = 20            # milliseconds the keyboard may take to follow the press
+maxReleaseLatency = 20          # milliseconds the keyboard may take to follow the release
+
+# LOAD THE SCRIPT, AND TURN ON THE KEYBOARD SWITCH (IT IS ACTIVE LOW)
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+digitalio.SetInputLevel("GP10", False)
+kb.CalibrateLow()
+kb.picoKeyboard = keyboard.Keyboard(usb_hid.devices)
+kb.keyboardDevice = kb.FindKeyboardDevice()
+
+# FUNCTION THAT SIMULATES THE SENSORS, PRESSING THE UP ARROW BETWEEN pressStartTime AND pressEndTime
+def SensorSource(row, col):
+    elapsed = (time.monotonic_ns() - runStart) / 1000000000
+    if pressStartTime <= elapsed < pressEndTime:
+        if upRegion[0] <= row < upRegion[1] and upRegion[2] <= col < upRegion[3]:
+            return pressedValue
+    return analogio.idleValue
+
+# FUNCTION THAT STANDS IN FOR AN LED RENDER THAT TAKES ledWorkTime. IT COUNTS RENDERS THAT STARTED WHILE THE
+# INPUT TASKS WERE STILL BUSY, OR THAT YieldToInput LET RUN WITH LESS THAN lowPriorityGuard LEFT BEFORE THE NEXT
+# FRAME, OR FOR A DIFFERENT FRAME THAN THE ONE NOW SCHEDULED. THE SLACK IS THE ONE YieldToInput SAVED WHEN IT
+# DECIDED, NOT A NEW READING OF THE CLOCK (ledWorkTime IS SHORTER THAN THE GUARD, SO ANY OTHER RENDER FITS IN ITS
+# FRAME). RENDERS THAT STILL ENDED AFTER THE NEXT FRAME SHOULD HAVE STARTED ARE COUNTED SEPARATELY: THAT ONLY
+# HAPPENS WHEN THE DESKTOP OS STALLS THE RENDER
+ledOverlaps = [0]
+ledLateEnds = [0]
+def SlowLedRender():
+    renderStart = time.monotonic_ns()
+    frameStart = kb.nextFrameStart
+    busy = kb.inputPending
+    endTime = renderStart + ledWorkTime
+    while time.monotonic_ns() < endTime:
+        pass
+    if busy == True or (kb.framePeriod > 0 and (kb.lowPrioritySlack < kb.lowPriorityGuard
+                                                 or kb.lowPriorityFrameStart != frameStart)):
+        ledOverlaps[0] += 1
+    elif kb.framePeriod > 0 and time.monotonic_ns() > frameStart:
+        ledLateEnds[0] += 1
+
+kb.ledRenderHook = SlowLedRender
+analogio.sensorSource = SensorSource
+runStart = time.monotonic_ns()
+asyncio.run(kb.RunTasks(framesToRun))
+runTime = (time.monotonic_ns() - runStart) / 1000000
+
+# GATHER THE KEY PRESSES AND RELEASES, FROM THE BATCHED KEYBOARD REPORTS IF THEY ARE IN USE
+keyEvents = list(keyboard.keyEvents)
+if kb.keyboardDevice is not None:
+    heldKeys = set()
+    for reportCounter in range(len(kb.keyboardDevice.sentReports)):
+        reportKeys = set(kb.keyboardDevice.sentReports[reportCounter][2:]) - {0}
+        reportTime = kb.keyboardDevice.reportTimes[reportCounter]
+        for keycode in sorted(reportKeys - heldKeys):
+            keyEvents.append((reportTime, "press", keycode))
+        for keycode in sorted(heldKeys - reportKeys):
+            keyEvents.append((reportTime, "release", keycode))
+        heldKeys = reportKeys
+
+# WORK OUT HOW LONG THE KEYBOARD TOOK TO FOLLOW THE PRESS AND RELEASE
+pressLatency = None
+releaseLatency = None
+for eventTime, action, keycode in keyEvents:
+    eventSeconds = (eventTime - runStart) / 1000000000
+    if action == "press" and pressLatency is None:
+        pressLatency = (eventSeconds - pressStartTime) * 1000
+    if action == "release" and releaseLatency is None:
+        releaseLatency = (eventSeconds - pressEndTime) * 1000
+
+print("Frames run: ", end="")
+print(framesToRun, end="")
+print(" in ", end="")
+print(round(runTime, 1), end="")
+print(" ms")
+kb.PrintFrameStats()
+print("LED frames rendered: ", end="")
+print(kb.ledFramesRendered)
+print("Keyboard events: ", end="")
+print([(action, keycode) for eventTime, action, keycode in keyEvents])
+print("Keyboard reports sent: ", end="")
+print(kb.hidReportsSent)
+print("LED renders stalled past the next frame by the OS: ", end="")
+print(ledLateEnds[0])
+TestResults.Check("LED renders started into input work", str(ledOverlaps[0]) + " of " + str(kb.ledFramesRendered),
+                  ledOverlaps[0] == 0 and kb.ledFramesRendered > 0 and ledWorkTime < kb.lowPriorityGuard)
+TestResults.Check("Frame overruns", kb.frameOverruns, kb.frameOverruns <= maxOverrunShare * framesToRun)
+TestResults.Check("Worst overrun (us)", kb.worstFrameOverrun // 1000, kb.worstFrameOverrun <= maxWorstOverrun)
+TestResults.Check("Press latency (ms)", None if pressLatency is None else round(pressLatency, 2),
+                  pressLatency is not None and pressLatency <= maxPressLatency)
+TestResults.Check("Release latency (ms)", None if releaseLatency is None else round(releaseLatency, 2),
+                  releaseLatency is not None and releaseLatency <= maxReleaseLatency)
+TestResults.Finish("task runtime checks")
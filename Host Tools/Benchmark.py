@@ -0,0 +1,267 @@
+"""
+   THIS SCRIPT BENCHMARKS THE HOT FUNCTIONS OF THE TEST SCRIPTS ON A DESKTOP PYTHON, WITH THE HARDWARE STAND-INS
+   IN THIS FOLDER. FOR EVERY FUNCTION IT MEASURES THE TIME PER CALL, AND THE MEMORY A CALL ALLOCATES AT ITS PEAK
+   AND LEAVES ALLOCATED AFTERWARDS (tracemalloc CANNOT COUNT EVERY ALLOCATION, SO THESE STAND IN FOR IT).
+   TIMES ARE ALSO DIVIDED BY THE TIME OF A FIXED REFERENCE WORKLOAD, SO RESULTS FROM DIFFERENT COMPUTERS
+   CAN BE COMPARED. THE RESULTS ARE SAVED AS JSON, AND COMPARED AGAINST benchmark_baseline.json: ANY FUNCTION
+   THAT GOT TOO MUCH SLOWER, OR ALLOCATES TOO MUCH MORE, IS REPORTED AND THE SCRIPT EXITS WITH AN ERROR.
+   THE FUSED SCAN OF CheckAllPresses IS ALSO TIMED AGAINST AN UNFUSED REFERENCE OF THE SAME FRAME (CheckAllSensors,
+   THEN CheckSensorThresholds THROUGH THE PER-SENSOR READ/WRITE FUNCTIONS), AND MUST NOT BE SLOWER THAN IT.
+
+   USAGE: python3 Benchmark.py [--save-baseline]
+   --save-baseline REPLACES THE STORED BASELINE WITH THIS RUN'S RESULTS, AFTER AN INTENDED CHANGE
+"""
+import array
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import HostLoader
+import analogio
+import digitalio
+import usb_hid
+from adafruit_hid import keyboard
+
+# CONSTANTS FOR THE BENCHMARK
+baselinePath = os.path.join(HostLoader.hostToolsFolder, "benchmark_baseline.json")
+resultsPath = os.path.join(HostLoader.hostToolsFolder, "benchmark_results.json")
+timingRepeats = 15              # timing runs of every function, to even out noise from the computer
+timingTarget = 5000000          # nanoseconds each timing run should take, used to pick the calls per run
+slowdownLimit = 1.3             # a function fails if its relative time is more than this times the baseline
+timingRetries = 2               # times a function that looks slower than the baseline is timed again before it fails
+allocationSlack = 256           # a function fails if it allocates more than this many bytes more than the baseline
+fusedSpeedupLimit = 1.1         # the fused scan fails if it is not at least this many times faster than the unfused one.
+                                # it measures 1.12x to 1.54x on a desktop, so this only allows for noise
+pressedValue = 30000            # sensor value while pressed
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+
+# CLASS THAT STANDS IN FOR THE time MODULE OF A BENCHMARKED SCRIPT, SO SLEEPS RETURN RIGHT AWAY
+class NoSleepClock:
+    __slots__ = ()
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        pass
+
+# CLASS FOR A USB HID DEVICE THAT THROWS ITS REPORTS AWAY, SO THE STAND-IN'S REPORT LIST DOES NOT GROW
+class DiscardingDevice(usb_hid.Device):
+    def send_report(self, report, report_id=None):
+        pass
+
+# FUNCTION FOR THE REFERENCE WORKLOAD: A SMALL LOOP OF ARRAY READS AND INTEGER MATH, LIKE THE SCAN LOOPS
+referenceValues = array.array('H', range(1000, 1096))
+def ReferenceWorkload():
+    total = 0
+    for value in referenceValues:
+        total += (value * 3) >> 1
+    return total
+
+# FUNCTION THAT WORKS OUT HOW MANY CALLS FILL ONE TIMING RUN OF timingTarget NANOSECONDS
+def CallsPerRun(call):
+    callsPerRun = 1
+    while True:
+        runStart = time.perf_counter_ns()
+        for callCounter in range(callsPerRun):
+            call()
+        runTime = time.perf_counter_ns() - runStart
+        if runTime >= timingTarget // 10 or callsPerRun >= 1000000:
+            break
+        callsPerRun *= 10
+    return max(1, (callsPerRun * timingTarget) // max(runTime, 1))
+
+# FUNCTION THAT TIMES ONE RUN OF CALLS, AND RETURNS THE TIME PER CALL IN NANOSECONDS
+def TimeRun(call, callsPerRun):
+    runStart = time.perf_counter_ns()
+    for callCounter in range(callsPerRun):
+        call()
+    return (time.perf_counter_ns() - runStart) / callsPerRun
+
+# FUNCTION THAT TIMES A CALL. EVERY TIMING RUN IS PAIRED WITH A RUN OF THE REFERENCE WORKLOAD, SO A CHANGE
+# IN THE COMPUTER'S SPEED AFFECTS BOTH TIMES THE SAME WAY. LIKE timeit, GARBAGE COLLECTION IS OFF WHILE TIMING.
+# RETURNS A PACKED VARIABLE FOR
+# (fastest time per call in nanoseconds, median of the call's time divided by the reference time)
+def TimeCall(call):
+    callsPerRun = CallsPerRun(call)
+    referenceCallsPerRun = CallsPerRun(ReferenceWorkload)
+    fastestTime = None
+    relativeTimes = []
+    gc.disable()
+    try:
+        for repeatCounter in range(timingRepeats):
+            referenceTime = TimeRun(ReferenceWorkload, referenceCallsPerRun)
+            callTime = TimeRun(call, callsPerRun)
+            relativeTimes.append(callTime / referenceTime)
+            if fastestTime is None or callTime < fastestTime:
+                fastestTime = callTime
+    finally:
+        gc.enable()
+    relativeTimes.sort()
+    return (fastestTime, relativeTimes[len(relativeTimes) // 2])
+
+# FUNCTION THAT MEASURES THE MEMORY A CALL ALLOCATES. RETURNS A PACKED VARIABLE FOR
+# (most bytes allocated at once during a call, bytes left allocated per call)
+def MeasureAllocations(call, numOfCalls=20):
+    call()
+    tracemalloc.start()
+    peakBytes = 0
+    startBytes = tracemalloc.get_traced_memory()[0]
+    for callCounter in range(numOfCalls):
+        tracemalloc.reset_peak()
+        callStart = tracemalloc.get_traced_memory()[0]
+        call()
+        peakBytes = max(peakBytes, tracemalloc.get_traced_memory()[1] - callStart)
+    retainedBytes = (tracemalloc.get_traced_memory()[0] - startBytes) / numOfCalls
+    tracemalloc.stop()
+    return (peakBytes, retainedBytes)
+
+# FUNCTION THAT LOADS THE SCRIPTS, AND RETURNS A TUPLE OF (name, function to call) BENCHMARKS
+def BuildBenchmarks():
+    with contextlib.redirect_stdout(io.StringIO()):
+        kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+        animations = HostLoader.LoadScript("PreRender_Animations_Test.py")
+    kb.time = NoSleepClock()
+
+    # PRESS THE UP ARROW, WITH THE KEYBOARD SWITCH ON (IT IS ACTIVE LOW)
+    analogio.sensorSource = lambda row, col: (pressedValue if upRegion[0] <= row < upRegion[1] and upRegion[2] <= col < upRegion[3]
+                                              else analogio.idleValue)
+    digitalio.SetInputLevel("GP10", False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        kb.CalibrateLow()
+    kb.picoKeyboard = keyboard.Keyboard(usb_hid.devices)
+    kb.keyboardDevice = DiscardingDevice(usage_page=0x01, usage=0x06, report_ids=(1,), in_report_lengths=(8,))
+
+    # KeyboardControl SWAPS BETWEEN TWO SETS OF PRESSES, SO EVERY CALL SENDS A REPORT
+    keyboardPresses = ((1, 0, 0, 0, 0), (0, 1, 0, 1, 0))
+    keyboardCalls = [0]
+    def KeyboardControlChange():
+        keyboardCalls[0] += 1
+        kb.KeyboardControl(keyboardPresses[keyboardCalls[0] & 1], kb.StyleDDR, True)
+
+    # THE UNFUSED REFERENCE OF CheckAllPresses: THE SAME SENSORS, READ BY CheckAllSensors AND THEN CHECKED ONE BY ONE
+    # BY CheckSensorThresholds, AS BEFORE THE SCAN AND CHECKS WERE FUSED. ONLY THE FUSED SCAN TRACKS DRIFT, SO THE
+    # FUSED SIDE OF THE COMPARISON RUNS WITHOUT IT
+    def CheckAllPressesFused():
+        kb.driftTrackingEnabled = False
+        kb.CheckAllPresses()
+        kb.driftTrackingEnabled = True
+    def CheckAllPressesUnfused():
+        kb.CheckAllSensors()
+        kb.CheckSensorThresholds(kb.panelScanPlan[0])
+
+    # THE SLOW CALIBRATION IS ONLY USED WHEN THE FAST ONE IS OFF
+    def CalibrateLowSlow():
+        kb.fastCalibrationEnabled = False
+        kb.CalibrateLow()
+        kb.fastCalibrationEnabled = True
+
+    return (("ReferenceWorkload", ReferenceWorkload),
+            ("CheckOneSensor", lambda: kb.CheckOneSensor(2, 3)),
+            ("CheckAllSensors", kb.CheckAllSensors),
+            ("CheckAllPresses", kb.CheckAllPresses),
+            ("CheckAllPresses (no drift)", CheckAllPressesFused),
+            ("CheckAllPresses (unfused)", CheckAllPressesUnfused),
+            ("CheckArrowPressesDDR", kb.CheckArrowPressesDDR),
+            ("UpdatePanelPresses", lambda: kb.UpdatePanelPresses(kb.activeLayout)),
+            ("KeyboardControl (no change)", lambda: kb.KeyboardControl(keyboardPresses[0], kb.StyleDDR, True)),
+            ("KeyboardControl (change)", KeyboardControlChange),
+            ("CalibrateLow", kb.CalibrateLow),
+            ("CalibrateLow (slow)", CalibrateLowSlow),
+            ("PreRenderFilledCircle", lambda: animations.PreRenderFilledCircle(6)),
+            ("PlaceSpriteOnFrameBuffer", lambda: animations.PlaceSpriteOnFrameBuffer(animations.circle_size02, 7, 7)))
+
+# FUNCTION THAT RUNS EVERY BENCHMARK, AND RETURNS THE RESULTS AS A DICTIONARY BY BENCHMARK NAME.
+# ACCEPTS THE BASELINE (OR None). A FUNCTION THAT LOOKS SLOWER THAN IT IS TIMED AGAIN, AND ITS BEST TIMES ARE KEPT.
+# THE SAME GOES FOR BOTH SIDES OF THE FUSED SCAN COMPARISON, IF THE FUSED SCAN LOOKS LESS THAN fusedSpeedupLimit FASTER
+def RunBenchmarks(baseline):
+    results = {}
+    benchmarks = BuildBenchmarks()
+    for name, call in benchmarks:
+        callTime, relativeTime = TimeCall(call)
+        if baseline is not None and name in baseline:
+            retryCounter = 0
+            while relativeTime > baseline[name]["relativeTime"] * slowdownLimit and retryCounter < timingRetries:
+                retryTime, retryRelativeTime = TimeCall(call)
+                callTime = min(callTime, retryTime)
+                relativeTime = min(relativeTime, retryRelativeTime)
+                retryCounter += 1
+        peakBytes, retainedBytes = MeasureAllocations(call)
+        results[name] = {"nsPerCall": round(callTime, 1),
+                         "relativeTime": round(relativeTime, 3),
+                         "peakBytes": peakBytes,
+                         "retainedBytes": round(retainedBytes, 1)}
+    calls = dict(benchmarks)
+    retryCounter = 0
+    while FusedSpeedup(results) < fusedSpeedupLimit and retryCounter < timingRetries:
+        for name in ("CheckAllPresses (no drift)", "CheckAllPresses (unfused)"):
+            retryTime, retryRelativeTime = TimeCall(calls[name])
+            results[name]["nsPerCall"] = round(min(results[name]["nsPerCall"], retryTime), 1)
+            results[name]["relativeTime"] = round(min(results[name]["relativeTime"], retryRelativeTime), 3)
+        retryCounter += 1
+    return results
+
+# FUNCTION THAT WORKS OUT HOW MANY TIMES FASTER THE FUSED SCAN IS THAN THE UNFUSED REFERENCE
+# ACCEPTS THE RESULTS, AND RETURNS THE SPEEDUP
+def FusedSpeedup(results):
+    return results["CheckAllPresses (unfused)"]["relativeTime"] / results["CheckAllPresses (no drift)"]["relativeTime"]
+
+# FUNCTION THAT COMPARES RESULTS AGAINST A BASELINE, AND RETURNS A LIST OF FAILURE MESSAGES
+def CompareToBaseline(results, baseline):
+    failures = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        baselineResult = baseline[name]
+        if result["relativeTime"] > baselineResult["relativeTime"] * slowdownLimit:
+            failures.append("%s is %.2fx slower than the baseline" % (
+                name, result["relativeTime"] / baselineResult["relativeTime"]))
+        if result["peakBytes"] > baselineResult["peakBytes"] + allocationSlack:
+            failures.append("%s allocates %d bytes at its peak (baseline %d)" % (
+                name, result["peakBytes"], baselineResult["peakBytes"]))
+        if result["retainedBytes"] > baselineResult["retainedBytes"] + allocationSlack:
+            failures.append("%s leaves %.0f bytes allocated per call (baseline %.0f)" % (
+                name, result["retainedBytes"], baselineResult["retainedBytes"]))
+    return failures
+
+if __name__ == "__main__":
+    baseline = None
+    if os.path.exists(baselinePath):
+        with open(baselinePath) as baselineFile:
+            baseline = json.load(baselineFile)
+    results = RunBenchmarks(None if "--save-baseline" in sys.argv[1:] else baseline)
+    with open(resultsPath, "w") as resultsFile:
+        json.dump(results, resultsFile, indent=2)
+
+    # PRINT EVERY RESULT NEXT TO ITS BASELINE
+    print("%-28s %12s %9s %9s %10s %9s" % ("Function", "us/call", "relative", "baseline", "peak B", "kept B"))
+    for name, result in results.items():
+        baselineTime = "-"
+        if baseline is not None and name in baseline:
+            baselineTime = "%.3f" % baseline[name]["relativeTime"]
+        print("%-28s %12.2f %9.3f %9s %10d %9.1f" % (name, result["nsPerCall"] / 1000, result["relativeTime"],
+                                                   baselineTime, result["peakBytes"], result["retainedBytes"]))
+    print("Fused scan: %.2fx faster than the unfused reference" % FusedSpeedup(results))
+
+    if "--save-baseline" in sys.argv[1:]:
+        with open(baselinePath, "w") as baselineFile:
+            json.dump(results, baselineFile, indent=2)
+        print("Saved the results as the new baseline.")
+    elif baseline is None:
+        print("No baseline to compare against. Run with --save-baseline to store one.")
+    else:
+        failures = CompareToBaseline(results, baseline)
+        if FusedSpeedup(results) < fusedSpeedupLimit:
+            failures.append("the fused scan is only %.2fx faster than the unfused reference" % FusedSpeedup(results))
+        for failure in failures:
+            print("REGRESSION: " + failure)
+        if len(failures) > 0:
+            sys.exit(1)
+        print("No regressions against the baseline.")
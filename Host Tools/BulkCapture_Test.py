@@ -0,0 +1,96 @@
+"""
+   THIS SCRIPT CHECKS THE BULK ADC CAPTURE READ PATH OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   THE SAME SIMULATED SESSION IS RUN ONCE WITH analogio.AnalogIn AND ONCE WITH analogbufio CAPTURES, WITH AND
+   WITHOUT OVERSAMPLING, AND EVERY FRAME'S READINGS, CALIBRATION, DETECTIONS AND PANEL PRESSES MUST MATCH.
+   IT ALSO CHECKS THAT A BURST IS AVERAGED, AND COUNTS THE PYTHON-LEVEL READS EACH BACKEND NEEDS.
+"""
+import random
+import HostLoader
+import TestResults
+import analogio
+import analogbufio
+
+# CONSTANTS FOR THE TEST
+framesToRun = 300               # frames in the simulated session
+idleSample = 62                 # raw 12-bit ADC result of an idle sensor
+pressedSample = 1875            # raw 12-bit ADC result of a pressed sensor
+pressNoise = 40                 # pressed sensors read up to this much above pressedSample
+pressChance = 0.02              # chance a panel-sized region starts being pressed on a frame
+oversampleShifts = (0, 2)       # oversampling shifts to compare the backends at
+
+# FUNCTION THAT SCALES A RAW 12-BIT ADC RESULT UP TO 16 BITS, THE SAME WAY CIRCUITPYTHON'S AnalogIn DOES
+def ScaleSample(rawSample):
+    return (rawSample << 4) | (rawSample >> 8)
+
+# MAKE THE SESSION: RAW 12-BIT RESULTS OF EVERY SENSOR ON EVERY FRAME, WITH REGIONS PRESSED FOR A WHILE
+random.seed(25)
+sessionFrames = []
+pressedRegions = []
+for frameCounter in range(framesToRun):
+    if random.random() < pressChance:
+        rowStart = random.randrange(0, 12, 4)
+        colStart = random.randrange(0, 6)
+        pressedRegions.append([random.randrange(10, 40), (rowStart, rowStart + 4, colStart, colStart + 3)])
+    frame = [idleSample] * 96
+    for pressedRegion in pressedRegions:
+        rowStart, rowEnd, colStart, colEnd = pressedRegion[1]
+        for rowCounter in range(rowStart, rowEnd):
+            for colCounter in range(colStart, colEnd):
+                frame[(rowCounter * 8) + colCounter] = pressedSample + random.randrange(pressNoise + 1)
+        pressedRegion[0] -= 1
+    pressedRegions = [pressedRegion for pressedRegion in pressedRegions if pressedRegion[0] > 0]
+    sessionFrames.append(frame)
+
+# FUNCTION THAT RUNS THE SESSION ON A FRESHLY LOADED SCRIPT WITH ONE READ BACKEND
+# ACCEPTS IF BULK CAPTURES ARE USED AND THE OVERSAMPLING SHIFT, AND RETURNS THE RESULTS OF EVERY FRAME
+# AND THE NUMBER OF PYTHON-LEVEL READS MADE
+def RunSession(bulkCapture, oversampleShift):
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    kb.bulkCaptureEnabled = bulkCapture
+    kb.readOversampleShift = oversampleShift
+    kb.voltageInPin = kb.OpenSensorInput()
+    kb.SetReadPath(kb.readSettleTime, oversampleShift)
+    if isinstance(kb.voltageInPin, kb.BulkAnalogIn) != bulkCapture:
+        raise RuntimeError("The script did not open the requested read backend")
+    analogio.sensorSource = lambda row, col: ScaleSample(idleSample)
+    kb.CalibrateLow()
+    frameSamples = sessionFrames[0]
+    analogio.sensorSource = lambda row, col: ScaleSample(frameSamples[(row * 8) + col])
+    readsBefore = analogio.readCount + analogbufio.captureCount
+    frameResults = []
+    for frameSamples in sessionFrames:
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+        matrix = kb.sensorMatrix
+        frameResults.append((bytes(matrix.current), bytes(matrix.calibration), bytes(matrix.detection),
+                             bytes(kb.panelPresses)))
+    reads = analogio.readCount + analogbufio.captureCount - readsBefore
+    analogio.sensorSource = None
+    return frameResults, reads
+
+# BOTH BACKENDS MUST GIVE THE SAME FRAMES
+for oversampleShift in oversampleShifts:
+    analogResults, analogReads = RunSession(False, oversampleShift)
+    bulkResults, bulkReads = RunSession(True, oversampleShift)
+    matchingFrames = 0
+    for frameCounter in range(framesToRun):
+        if analogResults[frameCounter] == bulkResults[frameCounter]:
+            matchingFrames += 1
+    pressFrames = sum(1 for frameResult in bulkResults if any(frameResult[3]))
+    TestResults.Check("Oversampling 2^" + str(oversampleShift),
+                      str(matchingFrames) + " of " + str(framesToRun) + " frames match (" + str(pressFrames)
+                      + " with presses), reads per frame " + str(analogReads // framesToRun) + " AnalogIn, "
+                      + str(bulkReads // framesToRun) + " bulk",
+                      matchingFrames == framesToRun and pressFrames > 0)
+
+# A BURST IS AVERAGED IN ONE STEP: SAMPLES idleSample TO idleSample + 3 AVERAGE TO idleSample + 1
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+kb.bulkCaptureEnabled = True
+kb.voltageInPin = kb.OpenSensorInput()
+kb.SetReadPath(0, 2)
+analogbufio.sampleSource = lambda row, col, sampleNumber: idleSample + sampleNumber
+kb.CheckOneSensor(3, 5)
+analogbufio.sampleSource = None
+TestResults.Check("Burst of 4 samples averaged", kb.ReadSensorArray_CurrentData(3, 5),
+                  kb.ReadSensorArray_CurrentData(3, 5) == ScaleSample(idleSample + 1) and kb.slowReadPath == False)
+TestResults.Finish("bulk capture checks")
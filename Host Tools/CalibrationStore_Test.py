@@ -0,0 +1,92 @@
+"""
+   THIS SCRIPT CHECKS THE SAVED CALIBRATION OF KeyboardInput_Test ON A DESKTOP PYTHON, USING ITS FileNVM STAND-IN.
+   A CALIBRATION IS LEARNED AND SAVED, THEN LOADED AGAIN ON A FRESH COPY OF THE SCRIPT, AS AFTER A REBOOT.
+   THE PAD IS THEN REBOOTED WITH EVERY SENSOR'S IDLE LEVEL RAISED, SO THE SAVED CALIBRATION HAS DRIFTED: IT MUST
+   BE REPLACED, AND NO PANEL MAY BE HELD PRESSED BY THE OLD THRESHOLD AND HIGH VALUES.
+"""
+import os
+import tempfile
+import HostLoader
+import TestResults
+import analogio
+
+# CONSTANTS FOR THE TEST
+idleValue = 1000                # sensor value with nothing on the pad
+driftedIdleValue = 1400         # idle sensor value after the drift
+pressedValue = 30000            # sensor value while pressed
+lightPressValue = 1600          # sensor value of the light press the saved high values are learned from
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+framesPressed = 50              # frames the UP arrow is held for when learning the high values
+idleFrames = 2000               # frames run on the drifted pad with nothing pressed
+
+# FUNCTION THAT SETS WHAT EVERY SENSOR READS, WITH THE UP ARROW PRESSED OR NOT
+def SetPad(idleLevel, upPressed, upValue=pressedValue):
+    analogio.sensorSource = lambda row, col: (upValue if upPressed and upRegion[0] <= row < upRegion[1]
+                                              and upRegion[2] <= col < upRegion[3] else idleLevel)
+
+# FUNCTION THAT LOADS A FRESH COPY OF THE SCRIPT, AS AFTER A REBOOT, USING THE TEST'S CALIBRATION FILE
+def Reboot():
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    kb.calibrationStore = kb.FileNVM(storePath, 4096)
+    return kb
+
+# FUNCTION THAT RUNS A NUMBER OF FRAMES, AND RETURNS THE NUMBER OF FRAMES WITH ANY PANEL PRESSED
+def RunFrames(kb, numOfFrames):
+    pressedFrames = 0
+    for frameCounter in range(numOfFrames):
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+        if any(kb.panelPresses):
+            pressedFrames += 1
+    return pressedFrames
+
+# FUNCTION THAT RETURNS ONE CALIBRATION FIELD OF EVERY SENSOR
+def CalibrationField(kb, field):
+    return list(kb.sensorMatrix.calibration[field::kb.calibrationStride])
+
+storePath = os.path.join(tempfile.mkdtemp(), "calibration.bin")
+
+# FIRST BOOT: NOTHING IS SAVED, SO THE PAD IS CALIBRATED FROM SCRATCH. THEN LEARN THE HIGH VALUES FROM A LIGHT
+# PRESS, SO THE SAVED THRESHOLDS SIT BELOW THE DRIFTED IDLE LEVEL, AND SAVE
+kb = Reboot()
+SetPad(idleValue, False)
+TestResults.Check("First boot calibrates from scratch", "loaded" if kb.LoadStartupCalibration() else "calibrated",
+                  os.path.exists(storePath))
+SetPad(idleValue, True, lightPressValue)
+RunFrames(kb, framesPressed)
+SetPad(idleValue, False)
+RunFrames(kb, framesPressed)
+kb.SaveCalibration(kb.sensorMatrix)
+savedCalibration = list(kb.sensorMatrix.calibration)
+
+# SECOND BOOT ON THE SAME PAD: THE SAVED CALIBRATION IS LOADED AS IT WAS
+kb = Reboot()
+loaded = kb.LoadStartupCalibration()
+TestResults.Check("Saved calibration loaded after a reboot", "loaded" if loaded else "calibrated",
+                  loaded and list(kb.sensorMatrix.calibration) == savedCalibration
+                  and max(CalibrationField(kb, kb.HighField)) > idleValue)
+
+# THIRD BOOT WITH THE IDLE LEVEL RAISED: THE DRIFT IS FOUND, AND THE OLD THRESHOLD AND HIGH VALUES ARE CLEARED
+kb = Reboot()
+SetPad(driftedIdleValue, False)
+loaded = kb.LoadStartupCalibration()
+lows = CalibrationField(kb, kb.LowField)
+TestResults.Check("Drifted calibration replaced", "loaded" if loaded else "calibrated",
+                  loaded == False and min(lows) >= driftedIdleValue
+                  and max(CalibrationField(kb, kb.ThresholdField)) == 0 and max(CalibrationField(kb, kb.HighField)) == 0)
+pressedFrames = RunFrames(kb, idleFrames)
+TestResults.Check("Frames with a panel held pressed on the drifted pad", pressedFrames, pressedFrames == 0)
+SetPad(driftedIdleValue, True)
+upFrames = RunFrames(kb, framesPressed)
+SetPad(driftedIdleValue, False)
+releasedFrames = framesPressed - RunFrames(kb, framesPressed)
+TestResults.Check("UP press after the drift (frames pressed, then released)",
+                  str(upFrames) + ", " + str(releasedFrames), upFrames > 0 and releasedFrames > 0)
+
+# THE NEW CALIBRATION WAS SAVED, SO THE NEXT BOOT ON THE DRIFTED PAD LOADS IT
+kb = Reboot()
+loaded = kb.LoadStartupCalibration()
+TestResults.Check("New calibration loaded after the next reboot", "loaded" if loaded else "calibrated",
+                  loaded and CalibrationField(kb, kb.LowField) == lows)
+analogio.sensorSource = None
+TestResults.Finish("calibration store checks")
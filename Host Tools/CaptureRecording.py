@@ -0,0 +1,43 @@
+"""
+   THIS SCRIPT SAVES A RAW FRAME RECORDING THAT KeyboardInput_Test STREAMS OVER THE usb_cdc DATA PORT
+   (recordingToSerial), SO SESSIONS LONGER THAN THE CIRCUITPY DRIVE CAN HOLD CAN BE RECORDED. THE PAD STARTS
+   SENDING ONCE THE PORT IS OPEN. STOP THE SCRIPT WITH CTRL-C, THEN REPLAY THE FILE WITH ReplayRecording.py.
+
+   USAGE: python3 CaptureRecording.py PORT recording.bin
+   PORT IS THE DATA PORT (FOR EXAMPLE /dev/ttyACM1 OR COM5), OR A FILE OF A SAVED STREAM.
+   READING A SERIAL PORT NEEDS THE pyserial PACKAGE.
+"""
+import sys
+import FrameRecording
+
+# FUNCTION THAT COPIES A STREAM TO A FILE, UNTIL A FILE STREAM ENDS OR CTRL-C IS PRESSED.
+# ACCEPTS THE STREAM AND THE PATH TO SAVE TO, AND RETURNS THE NUMBER OF BYTES SAVED
+def CaptureStream(stream, recordingPath):
+    bytesSaved = 0
+    with open(recordingPath, "wb") as recordingFile:
+        try:
+            while True:
+                newBytes = stream.read(4096)
+                if not newBytes and not hasattr(stream, "in_waiting"):
+                    break
+                recordingFile.write(newBytes)
+                bytesSaved += len(newBytes)
+        except KeyboardInterrupt:
+            pass
+    return bytesSaved
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    portName = sys.argv[1]
+    recordingPath = sys.argv[2]
+    try:
+        import serial
+        stream = serial.Serial(portName, timeout=0.1)
+    except (ImportError, ValueError, OSError):
+        stream = open(portName, "rb")
+    bytesSaved = CaptureStream(stream, recordingPath)
+    numOfRows, numOfCols, gameStyle, snapshot, frames = FrameRecording.ReadRecording(recordingPath)
+    recordedLength = frames[-1][0] if frames else 0
+    print("%s: %d bytes, %d frames, %.1f s recorded" % (recordingPath, bytesSaved, len(frames), recordedLength / 1000))
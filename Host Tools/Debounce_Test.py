@@ -0,0 +1,129 @@
+"""
+   THIS SCRIPT CHECKS THE PANEL DEBOUNCE OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   SYNTHETIC NOISY HIT COUNTS ARE FED TO DebouncePanelPresses ON A SIMULATED 2ms FRAME CLOCK. EVERY PRESS AND
+   RELEASE EDGE STARTS WITH A BURST OF CHATTER (FRAMES IN THE HYSTERESIS BAND, AND SINGLE FRAMES THAT BOUNCE BACK
+   TO THE OLD LEVEL), AND THE STEADY PARTS HAVE SINGLE-FRAME GLITCHES. IT CHECKS THAT EVERY EDGE GIVES EXACTLY ONE
+   CHANGE, THAT GLITCHES GIVE NONE, AND THAT NO CHANGE COMES LATER THAN maxAddedLatency AFTER ITS EDGE.
+   TWO OLD-LEVEL FRAMES IN A ROW ARE A REAL CHANGE BACK (SEE pressConfirmFrames), SO THE CHATTER NEVER HAS THEM.
+   A SINGLE SPIKE AFTER HOVERING IN THE HYSTERESIS BAND, HOWEVER LONG, MUST NOT BE SENT AS A PRESS
+"""
+import random
+import HostLoader
+import TestResults
+import ReplayRecording
+
+# CONSTANTS FOR THE TEST
+framePeriodMs = 2               # time between frames in ms
+numOfPulses = 400               # press and release pulses fed to the debounce
+chatterFrames = (0, 8)          # shortest and longest burst of chatter after an edge, in frames
+steadyFrames = (20, 60)         # shortest and longest steady part between edges, in frames
+chatterChance = 0.5             # chance a chatter frame bounces away from the new level
+glitchChance = 0.05             # chance a steady frame is a single-frame glitch to the other level
+
+# LOAD THE SCRIPT ON A SIMULATED CLOCK, AND TAKE THE UP PANEL'S LIMITS FROM THE ACTIVE LAYOUT
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+clock = ReplayRecording.ReplayClock()
+kb.time = clock
+pressLimits = bytes((kb.activeLayout.pressLimits[kb.UpIndex],))
+releaseLimits = bytes((kb.activeLayout.releaseLimits[kb.UpIndex],))
+pressedCount = pressLimits[0] + 4               # hit count of a firmly pressed panel
+releasedCount = 0                               # hit count of an empty panel
+bandCount = (pressLimits[0] + releaseLimits[0] + 1) // 2    # hit count inside the hysteresis band
+hitCounts = bytearray(1)
+presses = bytearray(1)
+
+# FUNCTION THAT RETURNS THE HIT COUNTS OF ONE PULSE: A PRESS EDGE WITH CHATTER, A STEADY PRESS WITH GLITCHES,
+# THEN THE SAME FOR THE RELEASE. ALSO RETURNS THE FIRST FRAME OF EACH EDGE, AND THE FRAME THE EDGE SETTLED ON:
+# THE FRAME AFTER ITS LAST BOUNCE BACK TO THE OLD LEVEL, SINCE SUCH A BOUNCE RESTARTS THE DEBOUNCE
+def MakePulse():
+    frames = []
+    edgeFrames = []
+    for newCount, oldCount in ((pressedCount, releasedCount), (releasedCount, pressedCount)):
+        edgeStart = len(frames)
+        settledFrame = edgeStart
+        lastBounce = True
+        for chatterCounter in range(random.randint(chatterFrames[0], chatterFrames[1])):
+            if random.random() < chatterChance:
+                bounceCount = bandCount if lastBounce == True else random.choice((oldCount, bandCount))
+                if bounceCount == oldCount:
+                    settledFrame = len(frames) + 1
+                    lastBounce = True
+                frames.append(bounceCount)
+            else:
+                frames.append(newCount)
+                lastBounce = False
+        edgeFrames.append((edgeStart, settledFrame))
+        # THE STEADY PART. A GLITCH IS NEVER TWO FRAMES IN A ROW, AND THE LAST FRAME IS ALWAYS STEADY
+        lastGlitch = True
+        for steadyCounter in range(random.randint(steadyFrames[0], steadyFrames[1])):
+            if lastGlitch == False and random.random() < glitchChance:
+                frames.append(oldCount)
+                lastGlitch = True
+            else:
+                frames.append(newCount)
+                lastGlitch = False
+        frames.append(newCount)
+    return frames, edgeFrames
+
+# FEED THE PULSES, AND NOTE EVERY CHANGE OF THE DEBOUNCED PRESS
+random.seed(12)
+frameCounter = 0
+lastPress = 0
+worstLatency = 0
+edgesWithOneChange = 0
+extraChanges = 0
+for pulseCounter in range(numOfPulses):
+    frames, edgeFrames = MakePulse()
+    changeFrames = []
+    for pulseFrame in range(len(frames)):
+        clock.nowNs = frameCounter * framePeriodMs * 1000000
+        hitCounts[0] = frames[pulseFrame]
+        kb.DebouncePanelPresses(hitCounts, pressLimits, releaseLimits, presses)
+        if presses[0] != lastPress:
+            changeFrames.append((pulseFrame, presses[0]))
+            lastPress = presses[0]
+        frameCounter += 1
+    # EXACTLY ONE PRESS AND ONE RELEASE, NOT BEFORE THEIR EDGES START. THE LATENCY IS COUNTED FROM THE
+    # FRAME EACH EDGE SETTLED ON
+    if (len(changeFrames) == 2 and changeFrames[0][1] == 1 and changeFrames[1][1] == 0
+            and changeFrames[0][0] >= edgeFrames[0][0] and changeFrames[1][0] >= edgeFrames[1][0]):
+        edgesWithOneChange += 2
+        for (changeFrame, pressed), (edgeStart, settledFrame) in zip(changeFrames, edgeFrames):
+            worstLatency = max(worstLatency, (changeFrame - settledFrame) * framePeriodMs)
+    else:
+        extraChanges += max(len(changeFrames) - 2, 0)
+
+TestResults.Check("Edges with exactly one change", str(edgesWithOneChange) + " of " + str(2 * numOfPulses),
+                  edgesWithOneChange == 2 * numOfPulses)
+TestResults.Check("Extra changes from chatter and glitches", extraChanges, extraChanges == 0)
+TestResults.Check("Worst added latency (ms)", worstLatency, worstLatency <= kb.maxAddedLatency)
+
+# A PANEL THAT HOVERS IN THE HYSTERESIS BAND FOR LONGER THAN maxAddedLatency, WITH SINGLE SPIKES ABOVE THE PRESS
+# LIMIT, IS NEVER PRESSED. TWO SPIKES IN A ROW ARE A PRESS
+spikePresses = []
+for spikeFrames in (1, 2):
+    for hitCount in ([releasedCount] * 5 + [pressedCount] + [bandCount] * (kb.maxAddedLatency // framePeriodMs + 5)
+                     + [pressedCount] * spikeFrames + [bandCount] * 5 + [releasedCount] * 10):
+        clock.nowNs = frameCounter * framePeriodMs * 1000000
+        hitCounts[0] = hitCount
+        kb.DebouncePanelPresses(hitCounts, pressLimits, releaseLimits, presses)
+        if presses[0] == 1 and spikeFrames not in spikePresses:
+            spikePresses.append(spikeFrames)
+        frameCounter += 1
+TestResults.Check("Spike lengths pressed after hovering in the band", spikePresses,
+                  spikePresses == [2])
+
+# WITHOUT THE DEBOUNCE, THE SAME NOISE CHATTERS, WHICH SHOWS THE TEST CAN SEE IT
+random.seed(12)
+rawChanges = 0
+lastPress = 0
+for pulseCounter in range(numOfPulses):
+    frames, edgeFrames = MakePulse()
+    for hitCount in frames:
+        rawPress = 1 if hitCount > pressLimits[0] else 0
+        if rawPress != lastPress:
+            rawChanges += 1
+            lastPress = rawPress
+TestResults.Check("Changes without the debounce", str(rawChanges) + " for " + str(2 * numOfPulses) + " edges",
+                  rawChanges > 2 * numOfPulses)
+TestResults.Finish("debounce checks")
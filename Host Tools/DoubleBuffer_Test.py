@@ -0,0 +1,116 @@
+"""
+   THIS SCRIPT CHECKS THE DOUBLE-BUFFERED SENSOR FRAMES OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   AcquireFrame (THE PRODUCER) AND EvaluateFrame (THE CONSUMER) RUN ON TWO THREADS, SWITCHING AS OFTEN AS
+   PYTHON ALLOWS. EVERY SENSOR READS THE NUMBER OF THE FRAME BEING ACQUIRED, SO A FRAME MIXING TWO READS (TORN),
+   A FRAME CHECKED TWICE, OR A FRAME SKIPPED, ALL SHOW UP IN THE FRONT BUFFER THE CONSUMER SEES.
+   THE SAME CHECK IS ALSO RUN WITH THE PRODUCER WRITING STRAIGHT INTO THE FRONT BUFFER, TO SHOW IT CAN SEE TORN FRAMES.
+   AN INCREMENTAL RECALIBRATION MUST LEAVE BOTH FRAME BUFFERS AS THEY WERE.
+"""
+import sys
+import threading
+import time
+import HostLoader
+import TestResults
+import analogio
+
+# CONSTANTS FOR THE TEST
+framesToRun = 3000              # frames passed from the producer to the consumer
+stampBase = 2000                # sensor value of frame 0. Frame n reads stampBase + n
+timeLimit = 60                  # seconds before the test gives up on a stuck thread
+switchInterval = 0.000001       # seconds between thread switches
+
+# LOAD THE SCRIPT, CALIBRATE IT, AND READ EVERY SENSOR ON EVERY FRAME
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+kb.CalibrateLow()
+kb.SetFullScanMode(True)
+kb.doubleBufferEnabled = True
+matrix = kb.sensorMatrix
+analogio.sensorSource = lambda row, col: stampBase + kb.framesAcquired
+sys.setswitchinterval(switchInterval)
+
+# FUNCTION THAT RETURNS THE FRAME NUMBER IN A BUFFER, OR None IF ITS SENSORS DO NOT ALL HOLD THE SAME FRAME
+def BufferFrame(buffer):
+    firstValue = buffer[0]
+    for value in buffer:
+        if value != firstValue:
+            return None
+    return firstValue - stampBase
+
+# PRODUCER THREAD: READS FRAMES INTO THE BACK BUFFER WHENEVER IT IS FREE
+def Producer(endTime):
+    while kb.framesAcquired < framesToRun and time.monotonic() < endTime:
+        if kb.AcquireFrame(matrix) == False:
+            time.sleep(0)
+
+# CONSUMER THREAD: CHECKS EVERY FRAME SWAPPED TO THE FRONT, AND NOTES ANY THAT ARE TORN OR OUT OF ORDER
+def Consumer(endTime, results):
+    expectedFrame = 0
+    while kb.framesEvaluated < framesToRun and time.monotonic() < endTime:
+        if kb.EvaluateFrame(matrix) == False:
+            time.sleep(0)
+            continue
+        frameNumber = BufferFrame(matrix.current)
+        if frameNumber is None:
+            results["torn"] += 1
+        elif frameNumber != expectedFrame:
+            results["outOfOrder"] += 1
+        expectedFrame += 1
+        results["checked"] += 1
+
+# RUN THE PRODUCER AND CONSUMER TOGETHER
+endTime = time.monotonic() + timeLimit
+results = {"checked": 0, "torn": 0, "outOfOrder": 0}
+producerThread = threading.Thread(target=Producer, args=(endTime,))
+consumerThread = threading.Thread(target=Consumer, args=(endTime, results))
+runStart = time.monotonic()
+producerThread.start()
+consumerThread.start()
+producerThread.join()
+consumerThread.join()
+runTime = time.monotonic() - runStart
+TestResults.Check("Frames checked", str(results["checked"]) + " in " + str(round(runTime, 2)) + "s, torn "
+                  + str(results["torn"]) + ", out of order " + str(results["outOfOrder"]),
+                  results["checked"] == framesToRun and results["torn"] == 0 and results["outOfOrder"] == 0)
+
+# WITHOUT THE BACK BUFFER, THE SAME CHECK SEES FRAMES THAT WERE STILL BEING READ
+unsafeFrames = [0]
+def UnsafeProducer(endTime):
+    while unsafeFrames[0] < framesToRun and time.monotonic() < endTime:
+        kb.RunScanProgram(matrix, kb.fullScanProgram, matrix.current)
+        unsafeFrames[0] += 1
+def UnsafeConsumer(endTime, results):
+    while unsafeFrames[0] < framesToRun and time.monotonic() < endTime:
+        if BufferFrame(matrix.current) is None:
+            results["torn"] += 1
+        results["checked"] += 1
+analogio.sensorSource = lambda row, col: stampBase + unsafeFrames[0]
+unsafeResults = {"checked": 0, "torn": 0, "outOfOrder": 0}
+producerThread = threading.Thread(target=UnsafeProducer, args=(endTime,))
+consumerThread = threading.Thread(target=UnsafeConsumer, args=(endTime, unsafeResults))
+producerThread.start()
+consumerThread.start()
+producerThread.join()
+consumerThread.join()
+TestResults.Check("Torn frames seen with a single buffer",
+                  str(unsafeResults["torn"]) + " of " + str(unsafeResults["checked"]), unsafeResults["torn"] > 0)
+
+# AN INCREMENTAL RECALIBRATION READS ITS SLICES INTO ITS OWN ARRAY. IT MUST NOT CHANGE THE FRONT BUFFER BEING
+# CHECKED, OR A FRAME WAITING IN THE BACK BUFFER
+analogio.sensorSource = lambda row, col: stampBase + kb.framesAcquired
+kb.AcquireFrame(matrix)
+kb.EvaluateFrame(matrix)
+kb.AcquireFrame(matrix)
+frontBefore = list(matrix.current)
+backBefore = list(matrix.backCurrent)
+analogio.sensorSource = lambda row, col: analogio.idleValue
+kb.StartRecalibration()
+while kb.StepRecalibration(matrix) == False:
+    pass
+lows = set(kb.ReadSensorArray_LowData(row, col)
+           for row in range(kb.numOfSensorRows) for col in range(kb.numOfSensorCols))
+TestResults.Check("Frame buffers changed by a recalibration (new low values)",
+                  str(int(list(matrix.current) != frontBefore) + int(list(matrix.backCurrent) != backBefore))
+                  + " (" + str(sorted(lows)) + ")",
+                  list(matrix.current) == frontBefore and list(matrix.backCurrent) == backBefore
+                  and lows == {analogio.idleValue + kb.lowOffsetValue})
+TestResults.Finish("double buffer checks")
@@ -0,0 +1,100 @@
+"""
+   THIS SCRIPT CHECKS THE BASELINE DRIFT TRACKING OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   FRAMES ARE RUN AS IF ONE STARTED EVERY framePeriod. THE IDLE LEVEL OF EVERY SENSOR IS RAISED A LITTLE, AND THE
+   LOW VALUES MUST FOLLOW IT ON THE SCALE OF driftTimeConstant: BARELY AFTER A TENTH OF IT, AND ABOUT 63% OF THE WAY
+   AFTER ALL OF IT. A FOOT RESTING ON A PANEL, BELOW THE THRESHOLDS, MUST NOT BE TAKEN FOR DRIFT. THE HIGH VALUES
+   DECAY OVER THE RUN, SO THE RESTING FOOT STAYS BELOW low + (thresholdPercentage * highDecayMinSpan).
+   THE TIME CONSTANT MUST STILL HOLD AFTER framePeriod CHANGES.
+"""
+import HostLoader
+import TestResults
+import analogio
+
+# CONSTANTS FOR THE TEST
+idleValue = 1000                # sensor value with nothing on the pad
+driftStep = 60                  # the idle level is raised by this much, inside driftNearLimit
+pressedValue = 30000            # sensor value while pressed, used to learn the high values
+restingValue = 1300             # sensor value of a foot resting on the UP arrow: past driftNearLimit, below the thresholds
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+framesPressed = 50              # frames the pad is pressed for when learning the high values
+
+# FUNCTION THAT SETS WHAT EVERY SENSOR READS, WITH A VALUE ON THE UP ARROW OR NOT
+def SetPad(idleLevel, upValue=None):
+    analogio.sensorSource = lambda row, col: (upValue if upValue is not None and upRegion[0] <= row < upRegion[1]
+                                              and upRegion[2] <= col < upRegion[3] else idleLevel)
+
+# FUNCTION THAT RUNS A NUMBER OF FRAMES, AND RETURNS THE NUMBER OF FRAMES WITH ANY PANEL PRESSED
+def RunFrames(numOfFrames):
+    pressedFrames = 0
+    for frameCounter in range(numOfFrames):
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+        if any(kb.panelPresses):
+            pressedFrames += 1
+    return pressedFrames
+
+# FUNCTION THAT RETURNS THE LOW VALUES OF THE SENSORS, EITHER ON THE UP ARROW OR OFF IT
+def LowValues(onUpArrow):
+    lows = []
+    for row in range(kb.numOfSensorRows):
+        for col in range(kb.numOfSensorCols):
+            if (upRegion[0] <= row < upRegion[1] and upRegion[2] <= col < upRegion[3]) == onUpArrow:
+                lows.append(kb.ReadSensorArray_LowData(row, col))
+    return lows
+
+# LOAD THE SCRIPT, CALIBRATE IT, AND LEARN EVERY SENSOR'S HIGH VALUE. EVERY SENSOR IS TRACKED
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+kb.SetFullScanMode(True)
+SetPad(idleValue)
+kb.CalibrateLow()
+SetPad(pressedValue)
+RunFrames(framesPressed)
+SetPad(idleValue)
+RunFrames(framesPressed)
+framesPerTimeConstant = (kb.driftTimeConstant * 1000000000) // kb.framePeriod
+startLow = max(LowValues(False))
+
+# RAISE THE IDLE LEVEL, AND SEE HOW FAR THE LOW VALUES HAVE FOLLOWED IT AFTER A TENTH OF THE TIME CONSTANT, AND
+# AFTER ALL OF IT
+SetPad(idleValue + driftStep)
+RunFrames(framesPerTimeConstant // 10)
+earlyShare = (min(LowValues(False)) - startLow) / driftStep
+RunFrames(framesPerTimeConstant - (framesPerTimeConstant // 10))
+lows = LowValues(False)
+shareRange = ((min(lows) - startLow) / driftStep, (max(lows) - startLow) / driftStep)
+TestResults.Check("Share of the drift followed after a tenth of driftTimeConstant", round(earlyShare, 2),
+                  earlyShare < 0.2)
+TestResults.Check("Share of the drift followed after driftTimeConstant",
+                  str(round(shareRange[0], 2)) + " to " + str(round(shareRange[1], 2)),
+                  0.5 <= shareRange[0] and shareRange[1] <= 0.75)
+
+# REST A FOOT ON THE UP ARROW FOR ANOTHER TIME CONSTANT. ITS LOW VALUES MUST STAY WHERE THEY WERE
+upLows = LowValues(True)
+SetPad(idleValue + driftStep, restingValue)
+pressedFrames = RunFrames(framesPerTimeConstant)
+restingLows = LowValues(True)
+TestResults.Check("Frames pressed with a resting foot", pressedFrames, pressedFrames == 0)
+TestResults.Check("Largest low value change from the resting foot",
+                  max(restingLows[index] - upLows[index] for index in range(len(upLows))), restingLows == upLows)
+
+# WITHOUT THE driftNearLimit CHECK, THE SAME RESTING FOOT PULLS THE LOW VALUES UP, WHICH SHOWS THE TEST CAN SEE IT
+kb.driftNearLimit = 65535
+RunFrames(framesPerTimeConstant // 10)
+restingLows = LowValues(True)
+TestResults.Check("Largest low value change from the resting foot without driftNearLimit",
+                  max(restingLows[index] - upLows[index] for index in range(len(upLows))), restingLows != upLows)
+# RUN FOUR TIMES SLOWER FRAMES, AND RAISE THE IDLE LEVEL AGAIN. THE BASELINE UPDATES ARE SPACED FROM THE NEW
+# framePeriod, SO THE LOW VALUES STILL FOLLOW ABOUT 63% OF THE WAY AFTER driftTimeConstant
+kb.driftNearLimit = 100
+kb.framePeriod *= 4
+SetPad(idleValue + (2 * driftStep))
+startLows = LowValues(False)
+RunFrames((kb.driftTimeConstant * 1000000000) // kb.framePeriod)
+lows = LowValues(False)
+shares = [(lows[index] - startLows[index]) / (idleValue + (2 * driftStep) - startLows[index])
+          for index in range(len(lows))]
+TestResults.Check("Share of the drift followed after driftTimeConstant, with 4x slower frames",
+                  str(round(min(shares), 2)) + " to " + str(round(max(shares), 2)),
+                  0.5 <= min(shares) and max(shares) <= 0.75)
+analogio.sensorSource = None
+TestResults.Finish("drift tracking checks")
@@ -0,0 +1,54 @@
+"""
+   THIS SCRIPT READS AND WRITES THE RAW FRAME RECORDINGS SAVED BY THE FrameRecorder OF KeyboardInput_Test.
+   A RECORDING IS A HEADER, THE SAVED FORM OF THE CALIBRATION IT STARTED FROM, THEN ONE RECORD PER FRAME:
+   THE TIME IN MILLISECONDS SINCE THE RECORDING STARTED, THEN EVERY SENSOR'S VALUE AS A LITTLE-ENDIAN
+   16-BIT NUMBER, IN ROW ORDER. THE FORMAT CONSTANTS MUST MATCH THE ONES IN KeyboardInput_Test.
+"""
+import array
+import struct
+import sys
+
+# CONSTANTS FOR THE RECORDING FORMAT
+recordingMagic = b"VPRF"
+recordingFormatVersion = 1
+recordingHeaderFormat = "<4sBBBBH"  # magic, format version, rows, columns, game style, calibration snapshot length
+recordingFrameHeaderFormat = "<I"   # time of the frame in ms since the recording started
+
+# FUNCTION THAT READS A WHOLE RECORDING INTO MEMORY.
+# ACCEPTS THE PATH OF A RECORDING, AND RETURNS A PACKED VARIABLE FOR
+# (rows, columns, game style, calibration snapshot, tuple of (time in ms, array of sensor values) frames).
+# A FRAME CUT SHORT AT THE END OF THE FILE (FROM A POWER LOSS PART WAY THROUGH A WRITE) IS DROPPED
+def ReadRecording(recordingPath):
+    with open(recordingPath, "rb") as recordingFile:
+        recordingBytes = recordingFile.read()
+    headerSize = struct.calcsize(recordingHeaderFormat)
+    if len(recordingBytes) < headerSize:
+        raise ValueError(recordingPath + " is too short to be a recording")
+    magic, formatVersion, numOfRows, numOfCols, gameStyle, snapshotLength = struct.unpack_from(recordingHeaderFormat, recordingBytes, 0)
+    if magic != recordingMagic or formatVersion != recordingFormatVersion:
+        raise ValueError(recordingPath + " is not a version " + str(recordingFormatVersion) + " recording")
+    snapshot = recordingBytes[headerSize:headerSize + snapshotLength]
+
+    # SPLIT THE REST OF THE FILE INTO FRAMES
+    frameHeaderSize = struct.calcsize(recordingFrameHeaderFormat)
+    frameSize = frameHeaderSize + (2 * numOfRows * numOfCols)
+    frames = []
+    for frameStart in range(headerSize + snapshotLength, len(recordingBytes) - frameSize + 1, frameSize):
+        frameTime = struct.unpack_from(recordingFrameHeaderFormat, recordingBytes, frameStart)[0]
+        frameValues = array.array('H', recordingBytes[frameStart + frameHeaderSize:frameStart + frameSize])
+        if sys.byteorder == "big":
+            frameValues.byteswap()
+        frames.append((frameTime, frameValues))
+    return (numOfRows, numOfCols, gameStyle, snapshot, tuple(frames))
+
+# FUNCTION THAT WRITES A RECORDING, SO TEST SESSIONS CAN BE BUILT ON A COMPUTER.
+# ACCEPTS THE PATH TO WRITE, THE MATRIX SIZE, THE GAME STYLE, A CALIBRATION SNAPSHOT, AND A LIST OF
+# (time in ms, list of sensor values) FRAMES
+def WriteRecording(recordingPath, numOfRows, numOfCols, gameStyle, snapshot, frames):
+    with open(recordingPath, "wb") as recordingFile:
+        recordingFile.write(struct.pack(recordingHeaderFormat, recordingMagic, recordingFormatVersion,
+                                        numOfRows, numOfCols, gameStyle, len(snapshot)))
+        recordingFile.write(snapshot)
+        for frameTime, frameValues in frames:
+            recordingFile.write(struct.pack(recordingFrameHeaderFormat, frameTime))
+            recordingFile.write(struct.pack("<" + str(numOfRows * numOfCols) + "H", *frameValues))
@@ -0,0 +1,82 @@
+"""
+   THIS SCRIPT CHECKS THE RAW FRAME RECORDER AND THE REPLAY HARNESS ON A DESKTOP PYTHON.
+   IT RUNS A SIMULATED SESSION THROUGH THE MAIN LOOP'S STEPS OF KeyboardInput_Test WHILE ITS FrameRecorder
+   SAVES EVERY FRAME, THEN REPLAYS THE RECORDING AND CHECKS THAT THE SAME PANELS CHANGE ON THE SAME FRAMES.
+   LIKE THE MAIN LOOP, FULL RECORDING BUFFERS ARE WRITTEN OUT AT THE END OF EACH FRAME, SO NONE SHOULD BE WRITTEN
+   DURING A FRAME.
+"""
+import os
+import tempfile
+import HostLoader
+import TestResults
+import analogio
+import digitalio
+import usb_hid
+import ReplayRecording
+from adafruit_hid import keyboard
+
+# CONSTANTS FOR THE TEST
+sessionLength = 4000            # length of the simulated session in ms
+framePeriodMs = 2               # time between frames in ms
+pressedValue = 30000            # sensor value while pressed
+lowNoise = 5                    # idle sensors read up to this much above the idle value, changing every frame
+# PRESSES OF THE SESSION: (first ms, last ms + 1, region pressed as (first row, last row + 1, first col, last col + 1))
+sessionPresses = ((200, 500, (0, 4, 2, 6)),
+                  (450, 900, (8, 12, 2, 6)),
+                  (1500, 1520, (4, 8, 0, 3)),
+                  (2000, 3200, (4, 8, 5, 8)))
+
+# FUNCTION THAT RETURNS THE SIMULATED VALUE OF A SENSOR AT A TIME IN THE SESSION
+def SessionValue(timeMs, row, col):
+    for pressStart, pressEnd, region in sessionPresses:
+        if pressStart <= timeMs < pressEnd and region[0] <= row < region[1] and region[2] <= col < region[3]:
+            return pressedValue
+    return analogio.idleValue + ((row * 7 + col * 13 + timeMs) % lowNoise)
+
+# LOAD THE SCRIPT ON A REPLAY CLOCK, SO THE RECORDED FRAME TIMES ARE EXACT
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+clock = ReplayRecording.ReplayClock()
+kb.time = clock
+digitalio.SetInputLevel("GP10", False)
+kb.CalibrateLow()
+kb.picoKeyboard = keyboard.Keyboard(usb_hid.devices)
+kb.keyboardDevice = kb.FindKeyboardDevice()
+
+# RUN THE SESSION LIVE WHILE RECORDING IT, AND NOTE EVERY PANEL THAT CHANGES
+recordingPath = os.path.join(tempfile.mkdtemp(), "recording.bin")
+kb.recordingEnabled = True
+kb.recordingFilePath = recordingPath
+kb.StartRecording()
+liveEvents = []
+lastPresses = bytearray(kb.maxPanels)
+for timeMs in range(0, sessionLength, framePeriodMs):
+    clock.nowNs = timeMs * 1000000
+    analogio.sensorSource = lambda row, col: SessionValue(timeMs, row, col)
+    kb.CheckAllPresses()
+    kb.RecordFrame()
+    kb.UpdatePanelPresses(kb.activeLayout)
+    kb.HidControl(kb.panelPresses, kb.activeGameStyle, True)
+    kb.FlushRecording((timeMs + framePeriodMs) * 1000000)
+    for panelCounter in range(kb.activeLayout.numOfPanels):
+        if kb.panelPresses[panelCounter] != lastPresses[panelCounter]:
+            liveEvents.append((timeMs, "press" if kb.panelPresses[panelCounter] == 1 else "release", panelCounter))
+            lastPresses[panelCounter] = kb.panelPresses[panelCounter]
+lateFlushes = kb.frameRecorder.lateFlushes
+kb.frameRecorder.Flush()
+analogio.sensorSource = None
+
+# REPLAY THE RECORDING, AND COMPARE
+replayEvents, numOfFrames, recordedLength, replaySeconds, longestFrame = ReplayRecording.ReplayFile(recordingPath)
+print("Recording size (bytes): ", end="")
+print(os.path.getsize(recordingPath))
+print("Live events: ", end="")
+print(liveEvents)
+print("Replayed events: ", end="")
+print(replayEvents)
+print("Replay speed (x real time): ", end="")
+print(round((recordedLength / 1000) / replaySeconds, 1))
+TestResults.Check("Frames recorded and replayed", numOfFrames, numOfFrames == sessionLength // framePeriodMs)
+TestResults.Check("Buffers written during a frame", lateFlushes, lateFlushes == 0)
+TestResults.Check("Replayed events matching the live session", len(replayEvents),
+                  replayEvents == liveEvents and len(liveEvents) > 0)
+TestResults.Finish("frame replay checks")
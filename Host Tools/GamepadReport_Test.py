@@ -0,0 +1,40 @@
+"""
+   THIS SCRIPT CHECKS THE PANEL GAMEPAD ON A DESKTOP PYTHON, WITH THE HARDWARE STAND-INS IN THIS FOLDER.
+   IT RUNS boot.py TO SET UP THE USB HID DEVICES, THEN SENDS A FEW FRAMES OF PRESSES FROM KeyboardInput_Test
+   AND CHECKS THE GAMEPAD REPORT BYTES THAT WOULD HAVE GONE OVER USB.
+"""
+import os
+import HostLoader
+import TestResults
+import usb_hid
+
+# RUN boot.py WITH THE PANEL GAMEPAD ON, WHICH ENABLES THE KEYBOARD AND THE GAMEPAD
+bootPath = os.path.join(HostLoader.scriptsFolder, "boot.py")
+with open(bootPath) as bootFile:
+    bootSource = bootFile.read().replace("gamepadEnabled = False", "gamepadEnabled = True")
+exec(compile(bootSource, bootPath, "exec"), {"__name__": "boot"})
+print("USB HID devices (usage page, usage): ", end="")
+print([(device.usage_page, device.usage) for device in usb_hid.devices])
+
+# LOAD THE SCRIPT, AND SEND ONLY TO THE GAMEPAD
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+kb.gamepadDevice = kb.FindGamepadDevice()
+kb.hidOutputMode = kb.HidModeGamepad
+
+# FRAMES OF PRESSES (up, right, down, left, center) AND THE REPORT BYTE EXPECTED AFTER EACH ONE
+# (None = NO REPORT, SINCE NOTHING CHANGED)
+testFrames = (((1, 0, 0, 0, 0), 0x01),
+              ((1, 0, 0, 0, 0), None),
+              ((1, 0, 0, 1, 0), 0x09),
+              ((0, 1, 1, 0, 0), 0x06),
+              ((0, 0, 0, 0, 0), 0x00))
+for presses, expectedByte in testFrames:
+    reportsBefore = len(kb.gamepadDevice.sentReports)
+    kb.HidControl(presses, kb.StyleDDR, True)
+    newReports = kb.gamepadDevice.sentReports[reportsBefore:]
+    if expectedByte is None:
+        passed = len(newReports) == 0
+    else:
+        passed = newReports == [bytes((expectedByte,))]
+    TestResults.Check(str(presses), [report.hex() for report in newReports], passed)
+TestResults.Finish("gamepad report checks")
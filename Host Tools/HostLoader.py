@@ -0,0 +1,56 @@
+"""
+   THIS SCRIPT LETS THE PICO TEST SCRIPTS RUN ON A DESKTOP PYTHON, USING THE HARDWARE STAND-INS IN
+   THIS FOLDER (board, digitalio, analogio, usb_hid, adafruit_hid) INSTEAD OF THE REAL MODULES.
+   ONLY THE PART OF A SCRIPT BEFORE ITS "BEGIN THE ACTUAL PROCESS OF THE PROGRAM" MARKER IS RUN, SO ALL OF
+   ITS FUNCTIONS AND GLOBALS ARE SET UP WITHOUT ENTERING ITS MAIN LOOP.
+   A SCRIPT WITHOUT THE MARKER (LIKE PreRender_Animations_Test) IS RUN IN FULL.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+import types
+
+hostToolsFolder = os.path.dirname(os.path.abspath(__file__))
+scriptsFolder = os.path.join(os.path.dirname(hostToolsFolder), "Function Test Scripts")
+beginMarker = '""" BEGIN THE ACTUAL PROCESS OF THE PROGRAM """'
+
+# MAKE THE HARDWARE STAND-INS IMPORTABLE BEFORE ANY SCRIPT IS LOADED
+if hostToolsFolder not in sys.path:
+    sys.path.insert(0, hostToolsFolder)
+
+# CIRCUITPYTHON'S gc MODULE ALSO HAS mem_free AND mem_alloc. CPYTHON'S gc IS BUILT IN, SO IT CANNOT BE REPLACED
+# BY A FILE IN THIS FOLDER. INSTEAD, A COPY OF IT WITH THOSE TWO FUNCTIONS ADDED IS SWAPPED IN WHILE A SCRIPT LOADS.
+# THE MEMORY IN USE IS ONLY KNOWN WHILE tracemalloc IS RUNNING, OTHERWISE IT IS ALWAYS 0
+hostHeapSize = 192 * 1024       # heap size reported by the gc stand-in, about what a Pico has free
+def HostMemAlloc():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+def HostMemFree():
+    return max(hostHeapSize - HostMemAlloc(), 0)
+hostGC = types.ModuleType("gc")
+for gcName in dir(gc):
+    if not gcName.startswith("__"):
+        setattr(hostGC, gcName, getattr(gc, gcName))
+hostGC.mem_alloc = HostMemAlloc
+hostGC.mem_free = HostMemFree
+
+# FUNCTION THAT LOADS A TEST SCRIPT UP TO ITS MAIN PROGRAM
+# ACCEPTS THE FILE NAME OF A SCRIPT IN "Function Test Scripts" (OR A FULL PATH), AND RETURNS IT AS A MODULE
+def LoadScript(scriptName):
+    scriptPath = scriptName
+    if not os.path.isabs(scriptPath):
+        scriptPath = os.path.join(scriptsFolder, scriptName)
+    with open(scriptPath) as scriptFile:
+        source = scriptFile.read()
+    source = source.split(beginMarker)[0]
+    script = types.ModuleType(os.path.splitext(os.path.basename(scriptPath))[0])
+    script.__file__ = scriptPath
+    systemGC = sys.modules["gc"]
+    sys.modules["gc"] = hostGC
+    try:
+        exec(compile(source, scriptPath, "exec"), script.__dict__)
+    finally:
+        sys.modules["gc"] = systemGC
+    return script
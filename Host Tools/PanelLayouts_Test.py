@@ -0,0 +1,49 @@
+"""
+   THIS SCRIPT CHECKS THE PANEL LAYOUTS OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   EVERY GAME STYLE (DDR, PIU AND THE CUSTOM LAYOUT) IS SWITCHED TO WITH SetGameStyle, THEN EACH OF ITS PANEL REGIONS
+   IS PRESSED IN TURN. ONLY THAT PANEL'S INDEX IN panelPresses MAY BE SET WHILE IT IS PRESSED, AND EVERY PANEL MUST
+   BE RELEASED AGAIN AFTERWARDS.
+"""
+import HostLoader
+import TestResults
+import analogio
+
+# CONSTANTS FOR THE TEST
+pressedValue = 30000            # sensor value while pressed
+pressFrames = 10                # frames each region is pressed for, long enough to pass the debounce
+releaseFrames = 10              # frames with nothing pressed after each region
+
+# FUNCTION THAT RUNS A NUMBER OF FRAMES, AND RETURNS THE PANEL PRESSES OF THE LAST ONE
+def RunFrames(numOfFrames):
+    for frameCounter in range(numOfFrames):
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+    return bytes(kb.panelPresses[0:kb.activeLayout.numOfPanels])
+
+# LOAD THE SCRIPT AND CALIBRATE IT ON AN EMPTY PAD. THE PRESSED REGION IS CHANGED BY EACH PRESS
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+pressedRegion = [None]
+analogio.sensorSource = lambda row, col: (pressedValue if pressedRegion[0] is not None
+                                          and pressedRegion[0][0] <= row < pressedRegion[0][1]
+                                          and pressedRegion[0][2] <= col < pressedRegion[0][3]
+                                          else analogio.idleValue)
+kb.CalibrateLow()
+
+# PRESS EVERY PANEL OF EVERY LAYOUT ON ITS OWN
+for gameStyle, styleName in ((kb.StyleDDR, "DDR"), (kb.StylePIU, "PIU"), (kb.StyleCustom, "custom")):
+    kb.SetGameStyle(gameStyle)
+    layout = kb.activeLayout
+    wrongPanels = []
+    for panelCounter in range(layout.numOfPanels):
+        pressedRegion[0] = layout.regions[panelCounter]
+        presses = RunFrames(pressFrames)
+        expectedPresses = bytes(1 if index == panelCounter else 0 for index in range(layout.numOfPanels))
+        pressedRegion[0] = None
+        releases = RunFrames(releaseFrames)
+        if presses != expectedPresses or any(releases):
+            wrongPanels.append(layout.panelNames[panelCounter])
+    TestResults.Check("Panels of the " + styleName + " layout pressed on their own (wrong panels)",
+                      str(layout.numOfPanels - len(wrongPanels)) + " of " + str(layout.numOfPanels)
+                      + " " + str(wrongPanels), len(wrongPanels) == 0 and kb.activeGameStyle == gameStyle)
+analogio.sensorSource = None
+TestResults.Finish("panel layout checks")
@@ -0,0 +1,108 @@
+"""
+   THIS SCRIPT CHECKS THE LIMITS OF THE RAW FRAME RECORDER OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   THE SAME SIMULATED SESSION IS RECORDED SEVERAL WAYS: EVERY FEW FRAMES (recordingDecimation), TO A FILE CAPPED BY
+   recordingMaxBytes, WITH NO TIME LEFT IN ANY FRAME TO WRITE THE BUFFERS OUT, AND STREAMED OVER THE usb_cdc STAND-IN
+   (BOTH TO A COMPUTER THAT OPENS THE PORT LATE, AND TO ONE THAT DOES NOT KEEP UP).
+   EVERY RECORDING THAT IS KEPT MUST STILL BE READABLE, WITH NO FRAMES LOST OR CUT SHORT.
+"""
+import io
+import os
+import struct
+import tempfile
+import HostLoader
+import TestResults
+import analogio
+import usb_cdc
+import ReplayRecording
+import FrameRecording
+import CaptureRecording
+
+# CONSTANTS FOR THE TEST
+framesToRun = 1000              # frames in the simulated session
+framePeriodMs = 2               # time between frames in ms
+pressedValue = 30000            # sensor value while pressed
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+pressFrames = (300, 500)        # first frame the UP arrow is pressed, and the frame it is released
+decimation = 4                  # recordingDecimation of the decimated recording
+maxBytes = 20000                # recordingMaxBytes of the capped recording
+lateConnectFrames = 100         # frames the computer takes to open the port
+writeLimit = 1000               # most bytes a single write sends, for the computer that does not keep up
+
+# FUNCTION THAT RECORDS THE SESSION ON A FRESH COPY OF THE SCRIPT.
+# ACCEPTS A DICTIONARY OF SCRIPT GLOBALS TO SET, IF EACH FRAME HAS TIME LEFT TO WRITE A BUFFER OUT, AND THE usb_cdc
+# PORT TO RECORD TO (OR None). RETURNS THE SCRIPT, AND THE PATH THE RECORDING WAS SAVED TO
+def RecordSession(settings, flushSlack=True, port=None):
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    clock = ReplayRecording.ReplayClock()
+    kb.time = clock
+    analogio.sensorSource = None
+    kb.CalibrateLow()
+    recordingPath = os.path.join(tempfile.mkdtemp(), "recording.bin")
+    kb.recordingEnabled = True
+    kb.recordingFilePath = recordingPath
+    for name, value in settings.items():
+        setattr(kb, name, value)
+    if port is not None:
+        kb.recordingToSerial = True
+        kb.telemetryPort = port
+    kb.StartRecording()
+    for frameCounter in range(framesToRun):
+        clock.nowNs = frameCounter * framePeriodMs * 1000000
+        upPressed = pressFrames[0] <= frameCounter < pressFrames[1]
+        analogio.sensorSource = lambda row, col: (pressedValue if upPressed and upRegion[0] <= row < upRegion[1]
+                                                  and upRegion[2] <= col < upRegion[3] else analogio.idleValue)
+        if port is not None:
+            port.connected = frameCounter >= lateConnectFrames
+        kb.CheckAllPresses()
+        kb.RecordFrame()
+        kb.FlushRecording(clock.nowNs + (framePeriodMs * 1000000 if flushSlack else 0))
+    if kb.frameRecorder is not None:
+        kb.frameRecorder.Flush()
+    analogio.sensorSource = None
+    if port is not None:
+        CaptureRecording.CaptureStream(io.BytesIO(bytes(port.loopback)), recordingPath)
+    return kb, recordingPath
+
+# FUNCTION THAT RETURNS THE FRAMES OF A RECORDING, AS A TUPLE OF (time in ms, sensor values)
+def RecordedFrames(recordingPath):
+    return FrameRecording.ReadRecording(recordingPath)[4]
+
+# ONLY EVERY FEW FRAMES
+kb, recordingPath = RecordSession({"recordingDecimation": decimation})
+frames = RecordedFrames(recordingPath)
+frameSteps = set(frames[index + 1][0] - frames[index][0] for index in range(len(frames) - 1))
+TestResults.Check("Decimated frames recorded (ms between them)",
+                  str(len(frames)) + " (" + str(sorted(frameSteps)) + ")",
+                  len(frames) == framesToRun // decimation and frameSteps == {decimation * framePeriodMs})
+
+# CAPPED FILE: THE RECORDING STOPS, THE FILE STAYS UNDER THE CAP, AND HOLDS ONLY WHOLE FRAMES
+kb, recordingPath = RecordSession({"recordingMaxBytes": maxBytes})
+frames = RecordedFrames(recordingPath)
+recordingSize = os.path.getsize(recordingPath)
+frameSize = struct.calcsize(FrameRecording.recordingFrameHeaderFormat) + (2 * kb.numOfSensors)
+TestResults.Check("Capped recording size in bytes (frames)", str(recordingSize) + " (" + str(len(frames)) + ")",
+                  kb.frameRecorder is None and maxBytes - frameSize < recordingSize <= maxBytes and len(frames) > 0)
+
+# NO TIME LEFT IN ANY FRAME: THE BUFFERS ARE WRITTEN DURING FRAMES INSTEAD, AND NO FRAME IS LOST
+kb, recordingPath = RecordSession({}, False)
+frames = RecordedFrames(recordingPath)
+TestResults.Check("Frames recorded with no time left to write (buffers written during a frame)",
+                  str(len(frames)) + " (" + str(kb.frameRecorder.lateFlushes) + ")",
+                  len(frames) == framesToRun and kb.frameRecorder.lateFlushes > 0)
+
+# STREAMED OVER USB SERIAL, TO A COMPUTER THAT OPENS THE PORT LATE. THERE IS NO SIZE LIMIT
+usb_cdc.EnableDataPort(True)
+kb, recordingPath = RecordSession({"recordingMaxBytes": maxBytes}, True, usb_cdc.data)
+frames = RecordedFrames(recordingPath)
+TestResults.Check("Frames streamed over USB serial", len(frames),
+                  len(frames) == framesToRun - lateConnectFrames and kb.frameRecorder is not None)
+
+# STREAMED TO A COMPUTER THAT DOES NOT KEEP UP: THE RECORDING STOPS, AND WHAT ARRIVED IS STILL READABLE
+usb_cdc.EnableDataPort(True)
+usb_cdc.data.writeLimit = writeLimit
+kb, recordingPath = RecordSession({}, True, usb_cdc.data)
+frames = RecordedFrames(recordingPath)
+TestResults.Check("Frames kept when the computer does not keep up", len(frames),
+                  kb.frameRecorder is None and len(frames) < framesToRun)
+usb_cdc.EnableDataPort(False)
+TestResults.Finish("recording limit checks")
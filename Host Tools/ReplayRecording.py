@@ -0,0 +1,115 @@
+"""
+   THIS SCRIPT REPLAYS RAW FRAME RECORDINGS THROUGH THE DETECTION PIPELINE OF KeyboardInput_Test ON A DESKTOP
+   PYTHON, WITH THE HARDWARE STAND-INS IN THIS FOLDER. EVERY FRAME GOES THROUGH THE SAME STEPS AS THE MAIN LOOP:
+   CheckAllPresses, THEN UpdatePanelPresses, THEN HidControl (WHICH CALLS KeyboardControl).
+   THE SCRIPT'S CLOCK IS REPLACED BY THE RECORDED FRAME TIMES, SO THE REPLAY RUNS AS FAST AS THE COMPUTER
+   CAN GO WHILE TIMING-BASED LOGIC (LIKE THE DEBOUNCE LATENCY CAP) STILL SEES THE RECORDED TIMING.
+
+   USAGE: python3 ReplayRecording.py recording.bin [more recordings] [--events] [name=value ...]
+   EVERY name=value SETS A GLOBAL OF THE SCRIPT BEFORE THE REPLAY, FOR EXAMPLE debounceEnabled=False
+"""
+import ast
+import sys
+import time
+import HostLoader
+import analogio
+import digitalio
+import usb_hid
+import FrameRecording
+from adafruit_hid import keyboard
+
+# CLASS THAT STANDS IN FOR THE time MODULE OF THE REPLAYED SCRIPT. IT ALWAYS READS THE TIME OF THE
+# FRAME BEING REPLAYED, AND NEVER SLEEPS
+class ReplayClock:
+    __slots__ = ("nowNs",)
+
+    def __init__(self):
+        self.nowNs = 0
+
+    def monotonic_ns(self):
+        return self.nowNs
+
+    def monotonic(self):
+        return self.nowNs / 1000000000
+
+    def sleep(self, seconds):
+        pass
+
+# FUNCTION THAT REPLAYS ONE RECORDING THROUGH A FRESH COPY OF KeyboardInput_Test.
+# ACCEPTS THE PATH OF A RECORDING, AND A DICTIONARY OF SCRIPT GLOBALS TO SET BEFORE THE REPLAY.
+# RETURNS A PACKED VARIABLE FOR (list of (time in ms, "press"/"release", panel index) events,
+# number of frames, recorded length in ms, seconds spent replaying, longest frame in seconds)
+def ReplayFile(recordingPath, settings=None):
+    numOfRows, numOfCols, gameStyle, snapshot, frames = FrameRecording.ReadRecording(recordingPath)
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    if numOfRows != kb.numOfSensorRows or numOfCols != kb.numOfSensorCols:
+        raise ValueError(recordingPath + " was recorded on a different sensor matrix")
+    if settings is not None:
+        for name, value in settings.items():
+            setattr(kb, name, value)
+
+    # START FROM THE RECORDED CALIBRATION, WITH THE KEYBOARD SWITCH ON (IT IS ACTIVE LOW)
+    clock = ReplayClock()
+    kb.time = clock
+    kb.slowReadPath = False
+    kb.calibrationStore = bytearray(snapshot)
+    if kb.LoadCalibration(kb.sensorMatrix) == False:
+        raise ValueError(recordingPath + " has an unusable calibration snapshot")
+    digitalio.SetInputLevel("GP10", False)
+    kb.picoKeyboard = keyboard.Keyboard(usb_hid.devices)
+    kb.keyboardDevice = kb.FindKeyboardDevice()
+    kb.SetGameStyle(gameStyle)
+
+    # EVERY SENSOR READ RETURNS THE RECORDED VALUE OF THE FRAME BEING REPLAYED
+    replayFrame = [frames[0][1] if frames else None]
+    analogio.sensorSource = lambda row, col: replayFrame[0][(row * numOfCols) + col]
+
+    # RUN EVERY FRAME THROUGH THE MAIN LOOP'S STEPS, AND NOTE EVERY PANEL THAT CHANGES
+    panelEvents = []
+    lastPresses = bytearray(kb.maxPanels)
+    longestFrame = 0
+    replayStart = time.perf_counter()
+    for frameTime, frameValues in frames:
+        clock.nowNs = frameTime * 1000000
+        replayFrame[0] = frameValues
+        frameStart = time.perf_counter()
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+        kb.HidControl(kb.panelPresses, kb.activeGameStyle, True)
+        longestFrame = max(longestFrame, time.perf_counter() - frameStart)
+        for panelCounter in range(kb.activeLayout.numOfPanels):
+            if kb.panelPresses[panelCounter] != lastPresses[panelCounter]:
+                panelEvents.append((frameTime, "press" if kb.panelPresses[panelCounter] == 1 else "release", panelCounter))
+                lastPresses[panelCounter] = kb.panelPresses[panelCounter]
+    replaySeconds = time.perf_counter() - replayStart
+    analogio.sensorSource = None
+    recordedLength = frames[-1][0] if frames else 0
+    return (panelEvents, len(frames), recordedLength, replaySeconds, longestFrame)
+
+# FUNCTION THAT TURNS THE name=value ARGUMENTS INTO A DICTIONARY OF SCRIPT GLOBALS
+def ParseSettings(arguments):
+    settings = {}
+    for argument in arguments:
+        name, value = argument.split("=", 1)
+        settings[name] = ast.literal_eval(value)
+    return settings
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    printEvents = "--events" in arguments
+    recordingPaths = [argument for argument in arguments if "=" not in argument and argument != "--events"]
+    settings = ParseSettings([argument for argument in arguments if "=" in argument])
+    if len(recordingPaths) == 0:
+        print(__doc__)
+        sys.exit(1)
+    for recordingPath in recordingPaths:
+        panelEvents, numOfFrames, recordedLength, replaySeconds, longestFrame = ReplayFile(recordingPath, settings)
+        if printEvents == True:
+            for eventTime, eventType, panelIndex in panelEvents:
+                print("%10d ms  %-7s panel %d" % (eventTime, eventType, panelIndex))
+        presses = sum(1 for event in panelEvents if event[1] == "press")
+        speedUp = (recordedLength / 1000) / replaySeconds if replaySeconds > 0 else 0
+        print("%s: %d frames, %.1f s recorded, replayed in %.2f s (%.0fx real time)" % (
+            recordingPath, numOfFrames, recordedLength / 1000, replaySeconds, speedUp))
+        print("  %d presses, %d releases, longest frame %.3f ms" % (
+            presses, len(panelEvents) - presses, longestFrame * 1000))
@@ -0,0 +1,145 @@
+"""
+   THIS SCRIPT CHECKS THE REGION-OF-INTEREST SCAN PLAN OF KeyboardInput_Test ON A DESKTOP PYTHON.
+   THE SAME SYNTHETIC SESSION IS RUN ONCE WITH A FULL SCAN OF THE MATRIX AND ONCE WITH THE COMPILED PANEL SCAN PLAN
+   (WITH THE ADAPTIVE SCHEDULER OFF, SO EVERY PANEL SENSOR IS READ ON EVERY FRAME). THE SESSION PRESSES THE PANELS,
+   AND ALSO SENSORS NO PANEL USES. EVERY FRAME'S PANEL PRESSES MUST MATCH, AND THE PLAN MUST READ FEWER SENSORS.
+   IT ALSO MEASURES THE FIRST-STEP LATENCY (FRAMES FROM A PRESS STARTING TO ITS PANEL PRESS) WITH THE ADAPTIVE
+   SCHEDULER OFF AND ON. WITH IT ON, A PRESS ON AN IDLE REGION MAY ONLY BE SEEN UP TO idleScanInterval - 1 FRAMES LATER.
+   WITH PRESSURE SCORING, A LIGHT PRESS THAT CROSSES NO THRESHOLD MUST STILL KEEP ITS REGION READ ON EVERY FRAME
+"""
+import random
+import HostLoader
+import TestResults
+import analogio
+
+# CONSTANTS FOR THE TEST
+framesToRun = 1500              # frames in the simulated session
+pressedValue = 30000            # sensor value while pressed
+lowNoise = 5                    # idle sensors read up to this much above the idle value, changing every frame
+pressChance = 0.03              # chance a new press starts on a frame
+pressFrames = (10, 120)         # shortest and longest press, in frames
+idleFramesBetween = 12          # frames of nothing pressed between the presses of the latency check
+lightPressValue = 3000          # sensor value of a light press, below the learned thresholds but above the lows
+lightPressFrames = 40           # frames the light press is held for
+
+# MAKE THE SESSION: EVERY SENSOR'S VALUE ON EVERY FRAME. PRESSES COVER A RANDOM RECTANGLE OF THE MATRIX,
+# SO SOME LAND ON PANELS, SOME ON SENSORS NO PANEL USES, AND SOME ON BOTH
+random.seed(2)
+sessionFrames = []
+activePresses = []
+for frameCounter in range(framesToRun):
+    if random.random() < pressChance:
+        rowStart = random.randrange(0, 11)
+        colStart = random.randrange(0, 7)
+        region = (rowStart, min(rowStart + random.randint(1, 4), 12), colStart, min(colStart + random.randint(1, 4), 8))
+        activePresses.append([random.randint(pressFrames[0], pressFrames[1]), region])
+    frame = [analogio.idleValue + random.randrange(lowNoise) for index in range(96)]
+    for activePress in activePresses:
+        rowStart, rowEnd, colStart, colEnd = activePress[1]
+        for rowCounter in range(rowStart, rowEnd):
+            for colCounter in range(colStart, colEnd):
+                frame[(rowCounter * 8) + colCounter] = pressedValue
+        activePress[0] -= 1
+    activePresses = [activePress for activePress in activePresses if activePress[0] > 0]
+    sessionFrames.append(frame)
+
+# FUNCTION THAT RUNS THE SESSION ON A FRESHLY LOADED SCRIPT IN ONE SCAN MODE
+# ACCEPTS IF THE FULL SCAN IS USED, AND RETURNS THE PANEL PRESSES OF EVERY FRAME AND THE SENSOR READS PER FRAME
+def RunSession(fullScan):
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    kb.adaptiveScanEnabled = False
+    analogio.sensorSource = None
+    kb.CalibrateLow()
+    kb.SetFullScanMode(fullScan)
+    frameValues = sessionFrames[0]
+    analogio.sensorSource = lambda row, col: frameValues[(row * 8) + col]
+    readsBefore = analogio.readCount
+    framePresses = []
+    for frameValues in sessionFrames:
+        kb.CheckAllPresses()
+        kb.UpdatePanelPresses(kb.activeLayout)
+        framePresses.append(bytes(kb.panelPresses))
+    readsPerFrame = (analogio.readCount - readsBefore) / framesToRun
+    analogio.sensorSource = None
+    return framePresses, readsPerFrame
+
+fullPresses, fullReads = RunSession(True)
+planPresses, planReads = RunSession(False)
+matchingFrames = sum(1 for frameCounter in range(framesToRun) if fullPresses[frameCounter] == planPresses[frameCounter])
+pressedFrames = sum(1 for framePresses in fullPresses if any(framePresses))
+TestResults.Check("Frames with the same panel presses", str(matchingFrames) + " of " + str(framesToRun) + " ("
+                  + str(pressedFrames) + " with presses)", matchingFrames == framesToRun and pressedFrames > 0)
+TestResults.Check("Sensor reads per frame (full scan, scan plan)", str(fullReads) + ", " + str(planReads),
+                  planReads < fullReads)
+
+# FUNCTION THAT PRESSES EVERY PANEL, STARTING ON EVERY FRAME OF THE IDLE SWEEP, AND RETURNS THE MOST FRAMES
+# FROM A PRESS STARTING TO ITS PANEL PRESS. ACCEPTS IF THE ADAPTIVE SCHEDULER IS ON, AND RETURNS A PACKED VARIABLE FOR
+# (worst latency in frames, the script's idleScanInterval)
+def WorstFirstStepLatency(adaptiveScan):
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    kb.adaptiveScanEnabled = adaptiveScan
+    analogio.sensorSource = None
+    kb.CalibrateLow()
+    pressedRegion = [None]
+    analogio.sensorSource = lambda row, col: (pressedValue if pressedRegion[0] is not None
+                                              and pressedRegion[0][0] <= row < pressedRegion[0][1]
+                                              and pressedRegion[0][2] <= col < pressedRegion[0][3]
+                                              else analogio.idleValue)
+    worstLatency = 0
+    for panelCounter in range(kb.activeLayout.numOfPanels):
+        for startOffset in range(kb.idleScanInterval):
+            pressedRegion[0] = None
+            for frameCounter in range(idleFramesBetween + startOffset):
+                kb.CheckAllPresses()
+                kb.UpdatePanelPresses(kb.activeLayout)
+            pressedRegion[0] = kb.activeLayout.regions[panelCounter]
+            latency = 0
+            while kb.panelPresses[panelCounter] == 0 and latency < idleFramesBetween:
+                kb.CheckAllPresses()
+                kb.UpdatePanelPresses(kb.activeLayout)
+                latency += 1
+            worstLatency = max(worstLatency, latency)
+    analogio.sensorSource = None
+    return worstLatency, kb.idleScanInterval
+
+everyFrameLatency, idleScanInterval = WorstFirstStepLatency(False)
+adaptiveLatency, idleScanInterval = WorstFirstStepLatency(True)
+TestResults.Check("Worst first-step latency in frames (every region read, adaptive)",
+                  str(everyFrameLatency) + ", " + str(adaptiveLatency),
+                  everyFrameLatency < idleFramesBetween and adaptiveLatency <= everyFrameLatency + idleScanInterval - 1)
+
+# FUNCTION THAT LEARNS THE UP PANEL'S HIGH VALUES, THEN HOLDS A LIGHT PRESS ON IT WITH PRESSURE SCORING AND THE
+# ADAPTIVE SCHEDULER ON. ACCEPTS THE HOT PRESSURE TO USE (None KEEPS THE SCRIPT'S OWN), AND RETURNS A PACKED VARIABLE FOR
+# (times the UP region was read during the light press, frames the UP panel was pressed)
+def LightPressReads(hotPressure=None):
+    kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+    kb.adaptiveScanEnabled = True
+    kb.pressureScoringEnabled = True
+    if hotPressure is not None:
+        kb.scanHotPressure = hotPressure
+    analogio.sensorSource = None
+    kb.CalibrateLow()
+    upRegion = kb.activeLayout.regions[kb.UpIndex]
+    upValue = [pressedValue]
+    analogio.sensorSource = lambda row, col: (upValue[0] if upRegion[0] <= row < upRegion[1]
+                                              and upRegion[2] <= col < upRegion[3] else analogio.idleValue)
+    for value in (pressedValue, analogio.idleValue, lightPressValue):
+        upValue[0] = value
+        readsBefore = kb.regionScanCounts[kb.UpIndex]
+        pressedFrames = 0
+        for frameCounter in range(lightPressFrames):
+            kb.CheckAllPresses()
+            kb.UpdatePanelPresses(kb.activeLayout)
+            pressedFrames += kb.panelPresses[kb.UpIndex]
+    analogio.sensorSource = None
+    return kb.regionScanCounts[kb.UpIndex] - readsBefore, pressedFrames
+
+lightReads, lightPressedFrames = LightPressReads()
+TestResults.Check("Reads of a lightly pressed region under pressure scoring",
+                  str(lightReads) + " of " + str(lightPressFrames) + " frames",
+                  lightReads == lightPressFrames and lightPressedFrames == 0)
+# WITHOUT THE PRESSURE CHECK, THE SAME LIGHT PRESS IS ONLY READ ON THE IDLE SWEEP
+sweepReads, sweepPressedFrames = LightPressReads(65535)
+TestResults.Check("Reads of the same region on the idle sweep alone", str(sweepReads) + " of " + str(lightPressFrames)
+                  + " frames", sweepReads < lightPressFrames)
+TestResults.Finish("scan plan checks")
@@ -0,0 +1,154 @@
+"""
+   THIS SCRIPT DECODES THE SENSOR TELEMETRY STREAM SENT BY KeyboardInput_Test OVER THE usb_cdc DATA PORT.
+   A PACKET IS A HEADER, THEN EVERY SENSOR'S CURRENT VALUE, THEN THE WHOLE INTERLEAVED (threshold, high, low)
+   CALIBRATION, THEN THE DETECTION BITMAP (ONE BYTE PER ROW), THEN THE SEQUENCE NUMBER AGAIN.
+   ALL VALUES ARE LITTLE-ENDIAN 16-BIT NUMBERS.
+   THE FORMAT CONSTANTS MUST MATCH THE ONES IN KeyboardInput_Test.
+
+   USAGE: python3 TelemetryDecoder.py PORT
+   PORT IS THE DATA PORT (FOR EXAMPLE /dev/ttyACM1 OR COM5), OR A FILE OF SAVED TELEMETRY.
+   READING A SERIAL PORT NEEDS THE pyserial PACKAGE.
+"""
+import array
+import struct
+import sys
+
+# CONSTANTS FOR THE TELEMETRY FORMAT
+telemetryMagic = b"VT"
+telemetryFormatVersion = 1
+telemetryHeaderFormat = "<2sBBBBHI"  # magic, format version, rows, columns, panel presses bitmask, sequence, time in ms
+telemetryHeaderSize = struct.calcsize(telemetryHeaderFormat)
+telemetryTrailerFormat = "<H"       # sequence, repeated at the end of the packet
+calibrationStride = 3               # (threshold, high, low) values per sensor
+
+# CLASS THAT TURNS THE TELEMETRY STREAM BACK INTO LIVE ARRAYS. BYTES CAN BE FED IN ANY SIZE OF PIECE, AND THE
+# ARRAYS ARE UPDATED IN PLACE FOR EVERY WHOLE PACKET. A PACKET IS ONLY USED IF THE SEQUENCE NUMBER AT ITS END
+# MATCHES ITS HEADER, SO IF PART OF A PACKET WAS DROPPED, THE DECODER SKIPS AHEAD TO THE NEXT PACKET HEADER
+class TelemetryDecoder:
+    __slots__ = ("numOfRows", "numOfCols", "current", "thresholds", "highs", "lows", "detection", "panelMask",
+                 "sequence", "frameTime", "packetsDecoded", "packetsLost", "bytesSkipped", "pending")
+
+    def __init__(self):
+        self.numOfRows = 0
+        self.numOfCols = 0
+        self.current = array.array('H')
+        self.thresholds = array.array('H')
+        self.highs = array.array('H')
+        self.lows = array.array('H')
+        self.detection = bytearray()
+        self.panelMask = 0
+        self.sequence = None
+        self.frameTime = 0
+        self.packetsDecoded = 0
+        self.packetsLost = 0        # packets missing from the sequence numbers
+        self.bytesSkipped = 0       # bytes thrown away while looking for a packet header
+        self.pending = bytearray()
+
+    # RETURNS THE SIZE OF A WHOLE PACKET FOR A MATRIX SIZE
+    @staticmethod
+    def PacketSize(numOfRows, numOfCols):
+        return (telemetryHeaderSize + (2 * (1 + calibrationStride) * numOfRows * numOfCols) + numOfRows
+                + struct.calcsize(telemetryTrailerFormat))
+
+    # READS A SENSOR'S DETECTION BIT, BY ROW AND COLUMN
+    def ReadDetection(self, row, col):
+        return (self.detection[row] >> col) & 1
+
+    # ADDS BYTES FROM THE STREAM, AND DECODES EVERY WHOLE PACKET IN THEM.
+    # ACCEPTS THE NEW BYTES, AND RETURNS THE NUMBER OF PACKETS DECODED
+    def Feed(self, newBytes):
+        self.pending += newBytes
+        packetsFound = 0
+        while True:
+            # SKIP TO THE NEXT PACKET HEADER
+            headerStart = self.pending.find(telemetryMagic)
+            if headerStart < 0:
+                keptBytes = 1 if self.pending[-1:] == telemetryMagic[0:1] else 0
+                self.bytesSkipped += len(self.pending) - keptBytes
+                del self.pending[0:len(self.pending) - keptBytes]
+                return packetsFound
+            if headerStart > 0:
+                self.bytesSkipped += headerStart
+                del self.pending[0:headerStart]
+            if len(self.pending) < telemetryHeaderSize:
+                return packetsFound
+            magic, formatVersion, numOfRows, numOfCols, panelMask, sequence, frameTime = struct.unpack_from(
+                telemetryHeaderFormat, self.pending, 0)
+            packetSize = self.PacketSize(numOfRows, numOfCols)
+            if formatVersion != telemetryFormatVersion or not (0 < numOfRows <= 16 and 0 < numOfCols <= 8):
+                # NOT A REAL HEADER: SKIP PAST THIS MAGIC AND LOOK AGAIN
+                self.bytesSkipped += 1
+                del self.pending[0:1]
+                continue
+            if len(self.pending) < packetSize:
+                return packetsFound
+            trailerSequence = struct.unpack_from(telemetryTrailerFormat, self.pending,
+                                                 packetSize - struct.calcsize(telemetryTrailerFormat))[0]
+            if trailerSequence != sequence:
+                # THE PACKET WAS CUT SHORT: SKIP PAST THIS MAGIC AND LOOK AGAIN
+                self.bytesSkipped += 1
+                del self.pending[0:1]
+                continue
+            self.DecodePacket(numOfRows, numOfCols, panelMask, sequence, frameTime)
+            del self.pending[0:packetSize]
+            packetsFound += 1
+
+    # COPIES ONE WHOLE PACKET AT THE START OF THE PENDING BYTES INTO THE LIVE ARRAYS
+    def DecodePacket(self, numOfRows, numOfCols, panelMask, sequence, frameTime):
+        numOfSensors = numOfRows * numOfCols
+        if numOfRows != self.numOfRows or numOfCols != self.numOfCols:
+            self.numOfRows = numOfRows
+            self.numOfCols = numOfCols
+            self.current = array.array('H', bytes(2 * numOfSensors))
+            self.thresholds = array.array('H', bytes(2 * numOfSensors))
+            self.highs = array.array('H', bytes(2 * numOfSensors))
+            self.lows = array.array('H', bytes(2 * numOfSensors))
+        currentStart = telemetryHeaderSize
+        calibrationStart = currentStart + (2 * numOfSensors)
+        detectionStart = calibrationStart + (2 * calibrationStride * numOfSensors)
+        current = array.array('H', self.pending[currentStart:calibrationStart])
+        calibration = array.array('H', self.pending[calibrationStart:detectionStart])
+        if sys.byteorder == "big":
+            current.byteswap()
+            calibration.byteswap()
+        self.current[:] = current
+        self.thresholds[:] = calibration[0::calibrationStride]
+        self.highs[:] = calibration[1::calibrationStride]
+        self.lows[:] = calibration[2::calibrationStride]
+        self.detection[:] = self.pending[detectionStart:detectionStart + numOfRows]
+        # COUNT ANY PACKETS MISSING BETWEEN THIS ONE AND THE LAST
+        if self.sequence is not None:
+            self.packetsLost += (sequence - self.sequence - 1) & 0xFFFF
+        self.sequence = sequence
+        self.panelMask = panelMask
+        self.frameTime = frameTime
+        self.packetsDecoded += 1
+
+# FUNCTION THAT PRINTS THE LATEST FRAME: EVERY SENSOR'S CURRENT VALUE, WITH A * AFTER EACH DETECTED PRESS
+def PrintFrame(decoder):
+    print("Packet %d at %d ms | panels %s | lost %d" % (
+        decoder.sequence, decoder.frameTime, format(decoder.panelMask, "08b"), decoder.packetsLost))
+    for rowCounter in range(decoder.numOfRows):
+        rowText = ""
+        for colCounter in range(decoder.numOfCols):
+            index = (rowCounter * decoder.numOfCols) + colCounter
+            rowText += "%6d%s" % (decoder.current[index], "*" if decoder.ReadDetection(rowCounter, colCounter) else " ")
+        print(rowText)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    portName = sys.argv[1]
+    try:
+        import serial
+        stream = serial.Serial(portName, timeout=0.1)
+    except (ImportError, ValueError, OSError):
+        stream = open(portName, "rb")
+    decoder = TelemetryDecoder()
+    while True:
+        newBytes = stream.read(4096)
+        if not newBytes and not hasattr(stream, "in_waiting"):
+            break
+        if decoder.Feed(newBytes) > 0:
+            PrintFrame(decoder)
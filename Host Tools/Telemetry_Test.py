@@ -0,0 +1,97 @@
+"""
+   THIS SCRIPT CHECKS THE SENSOR TELEMETRY OF KeyboardInput_Test ON A DESKTOP PYTHON. IT RUNS boot.py WITH
+   TELEMETRY ON, SENDS FRAMES OVER THE LOOPBACK usb_cdc STAND-IN, AND DECODES THEM WITH TelemetryDecoder.
+   IT CHECKS THAT THE DECODED ARRAYS MATCH THE SCRIPT'S, THAT PACKETS ARE RATE-LIMITED, AND THAT THE DECODER
+   RECOVERS FROM NOISE AND FROM PACKETS THAT WERE CUT SHORT.
+"""
+import os
+import time
+import HostLoader
+import TestResults
+import analogio
+import usb_cdc
+import TelemetryDecoder
+
+# CONSTANTS FOR THE TEST
+pressedValue = 30000            # sensor value while pressed
+upRegion = (0, 4, 2, 6)         # sensors pressed for the UP arrow (first row, last row + 1, first col, last col + 1)
+framesToRun = 200               # frames sent without any rate limit
+rateLimitedFrames = 50          # frames run 2ms apart with the normal telemetry interval
+
+# RUN boot.py WITH TELEMETRY ON, WHICH ENABLES THE usb_cdc DATA PORT
+bootPath = os.path.join(HostLoader.scriptsFolder, "boot.py")
+with open(bootPath) as bootFile:
+    bootSource = bootFile.read().replace("telemetryEnabled = False", "telemetryEnabled = True")
+exec(compile(bootSource, bootPath, "exec"), {"__name__": "boot"})
+
+# LOAD THE SCRIPT, AND PRESS THE UP ARROW
+kb = HostLoader.LoadScript("KeyboardInput_Test.py")
+kb.CalibrateLow()
+kb.telemetryEnabled = True
+kb.telemetryPort = kb.FindTelemetryPort()
+analogio.sensorSource = lambda row, col: (pressedValue if upRegion[0] <= row < upRegion[1] and upRegion[2] <= col < upRegion[3]
+                                          else analogio.idleValue)
+decoder = TelemetryDecoder.TelemetryDecoder()
+
+# FUNCTION THAT RUNS ONE FRAME, AND RETURNS TRUE IF IT SENT A TELEMETRY PACKET
+def RunFrame():
+    kb.CheckAllPresses()
+    kb.UpdatePanelPresses(kb.activeLayout)
+    return kb.SendTelemetry(kb.sensorMatrix)
+
+# EVERY FRAME SENDS A PACKET WITH NO RATE LIMIT, AND THE DECODED ARRAYS MUST MATCH THE SCRIPT'S
+kb.telemetryInterval = 0
+matchingFrames = 0
+for frameCounter in range(framesToRun):
+    RunFrame()
+    # FEED THE STREAM IN ODD-SIZED PIECES, AS A SERIAL PORT WOULD DELIVER IT
+    while kb.telemetryPort.in_waiting > 0:
+        decoder.Feed(kb.telemetryPort.read(97))
+    calibration = kb.sensorMatrix.calibration
+    if (list(decoder.current) == list(kb.sensorMatrix.current)
+            and list(decoder.thresholds) == list(calibration[0::kb.calibrationStride])
+            and list(decoder.highs) == list(calibration[1::kb.calibrationStride])
+            and list(decoder.lows) == list(calibration[2::kb.calibrationStride])
+            and bytes(decoder.detection) == bytes(kb.sensorMatrix.detection)):
+        matchingFrames += 1
+print("Packet size (bytes): ", end="")
+print(kb.telemetryPacketSize)
+TestResults.Check("Decoded frames matching the script", matchingFrames,
+                  matchingFrames == framesToRun and decoder.packetsLost == 0 and decoder.bytesSkipped == 0)
+TestResults.Check("Panel bitmask with the UP panel pressed", format(decoder.panelMask, "08b"),
+                  decoder.panelMask == 1 << kb.UpIndex)
+
+# WITH THE NORMAL INTERVAL, FRAMES 2ms APART ONLY SEND ONE PACKET EVERY telemetryInterval
+kb.telemetryInterval = 20000000
+kb.nextTelemetryTime = 0
+packetsSent = 0
+runStart = time.monotonic_ns()
+for frameCounter in range(rateLimitedFrames):
+    frameEnd = time.monotonic_ns() + 2000000
+    if RunFrame() == True:
+        packetsSent += 1
+    while time.monotonic_ns() < frameEnd:
+        pass
+runTime = time.monotonic_ns() - runStart
+packetsExpected = (runTime // kb.telemetryInterval) + 1
+TestResults.Check("Rate-limited packets", str(packetsSent) + " of " + str(rateLimitedFrames) + " frames",
+                  abs(packetsSent - packetsExpected) <= 1)
+
+# NOISE BETWEEN PACKETS, AND PACKETS CUT SHORT BY A SLOW PC, ARE SKIPPED WITHOUT LOSING THE WHOLE PACKETS AROUND THEM
+kb.telemetryInterval = 0
+kb.nextTelemetryTime = 0
+decoder.Feed(kb.telemetryPort.read(kb.telemetryPort.in_waiting))
+packetsBefore = decoder.packetsDecoded
+kb.telemetryPort.loopback += b"noise VT noise"
+RunFrame()
+kb.telemetryPort.writeLimit = 300
+RunFrame()
+kb.telemetryPort.writeLimit = None
+RunFrame()
+RunFrame()
+decoder.Feed(kb.telemetryPort.read(kb.telemetryPort.in_waiting))
+TestResults.Check("Decoded after noise and a cut packet",
+                  str(decoder.packetsDecoded - packetsBefore) + " of 4, lost " + str(decoder.packetsLost),
+                  decoder.packetsDecoded - packetsBefore == 3 and kb.telemetryPacketsCut == 1
+                  and list(decoder.current) == list(kb.sensorMatrix.current))
+TestResults.Finish("telemetry checks")
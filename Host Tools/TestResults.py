@@ -0,0 +1,22 @@
+"""
+   SHARED RESULT REPORTING FOR THE HOST TEST SCRIPTS IN THIS FOLDER.
+   EVERY CHECK PRINTS ONE LINE: ITS LABEL, WHAT WAS MEASURED, AND OK OR FAILED. Finish PRINTS THE SUMMARY AND
+   EXITS WITH 1 IF ANY CHECK FAILED, SO A REGRESSION FAILS THE RUN OF THE SCRIPT.
+"""
+import sys
+
+allPassed = True        # False once any check has failed
+
+# FUNCTION THAT REPORTS ONE CHECK
+# ACCEPTS THE LABEL, WHAT WAS MEASURED (PRINTED AS IT IS), AND IF THE CHECK PASSED. RETURNS IF IT PASSED
+def Check(label, measured, passed):
+    global allPassed
+    allPassed = allPassed and passed
+    print(label + ": " + str(measured) + " " + ("OK" if passed else "FAILED"))
+    return passed
+
+# FUNCTION THAT PRINTS WHETHER EVERY CHECK PASSED, AND EXITS WITH 0 IF THEY DID, OR 1 IF ANY FAILED
+# ACCEPTS WHAT WAS CHECKED, FOR THE SUMMARY LINE
+def Finish(checkedName):
+    print("All " + checkedName + " passed: " + str(allPassed))
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,3 @@
+"""
+   HOST STAND-IN FOR THE adafruit_hid LIBRARY.
+"""
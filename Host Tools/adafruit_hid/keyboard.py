@@ -0,0 +1,25 @@
+"""
+   HOST STAND-IN FOR adafruit_hid.keyboard.
+   EVERY PRESS AND RELEASE IS KEPT IN keyEvents AS (time in ns, "press"/"release", keycode).
+"""
+import time
+
+keyEvents = []
+
+class Keyboard:
+    def __init__(self, devices):
+        self.devices = devices
+        self.pressedKeys = set()
+
+    def press(self, *keycodes):
+        for keycode in keycodes:
+            self.pressedKeys.add(keycode)
+            keyEvents.append((time.monotonic_ns(), "press", keycode))
+
+    def release(self, *keycodes):
+        for keycode in keycodes:
+            self.pressedKeys.discard(keycode)
+            keyEvents.append((time.monotonic_ns(), "release", keycode))
+
+    def release_all(self):
+        self.release(*tuple(self.pressedKeys))
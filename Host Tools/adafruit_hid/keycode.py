@@ -0,0 +1,16 @@
+"""
+   HOST STAND-IN FOR adafruit_hid.keycode, WITH THE KEYCODES USED BY THE TEST SCRIPTS.
+"""
+
+class Keycode:
+    A = 0x04
+    C = 0x06
+    E = 0x08
+    Q = 0x14
+    S = 0x16
+    Z = 0x1D
+    ENTER = 0x28
+    RIGHT_ARROW = 0x4F
+    LEFT_ARROW = 0x50
+    DOWN_ARROW = 0x51
+    UP_ARROW = 0x52
@@ -0,0 +1,39 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON analogbufio MODULE.
+   A CAPTURE DECODES THE MUX SELECTION PINS THE SAME WAY THE analogio STAND-IN DOES, AND FILLS THE WHOLE BUFFER
+   WITH SAMPLES OF THAT SENSOR. EACH SAMPLE IS THE analogio STAND-IN'S 16-BIT VALUE CUT DOWN TO THE sampleBits
+   THE RP2040'S ADC GIVES. SET sampleSource TO A FUNCTION OF (row, col, sample number) TO GIVE EVERY SAMPLE OF
+   A BURST ITS OWN RAW VALUE INSTEAD.
+"""
+import analogio
+
+sampleBits = 12         # bits in every captured sample
+sampleSource = None     # function of (row, col, sample number) that returns a raw sample
+captureCount = 0        # total number of captures
+sampleCount = 0         # total number of samples captured
+
+class BufferedIn:
+    def __init__(self, pin, *, sample_rate=500000):
+        self.pin = pin
+        self.sample_rate = sample_rate
+
+    def readinto(self, buffer, loop=False):
+        global captureCount, sampleCount
+        captureCount += 1
+        sampleCount += len(buffer)
+        row, col = analogio.SelectedSensor()
+        if sampleSource is not None:
+            for sampleCounter in range(len(buffer)):
+                buffer[sampleCounter] = sampleSource(row, col, sampleCounter)
+            return len(buffer)
+        if analogio.sensorSource is None:
+            sensorValue = analogio.idleValue
+        else:
+            sensorValue = analogio.sensorSource(row, col)
+        rawSample = sensorValue >> (16 - sampleBits)
+        for sampleCounter in range(len(buffer)):
+            buffer[sampleCounter] = rawSample
+        return len(buffer)
+
+    def deinit(self):
+        pass
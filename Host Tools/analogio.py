@@ -0,0 +1,42 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON analogio MODULE.
+   READING AnalogIn.value DECODES THE MUX SELECTION PINS (GP2-GP5 FOR THE ROW, GP6-GP9 FOR THE COLUMN)
+   AND ASKS sensorSource FOR THE VALUE OF THAT SENSOR. SET sensorSource TO A FUNCTION OF (row, col)
+   TO SIMULATE PRESSES. WITHOUT ONE, EVERY SENSOR READS AN IDLE VALUE.
+"""
+import digitalio
+
+rowPinNames = ("GP2", "GP3", "GP4", "GP5")
+colPinNames = ("GP6", "GP7", "GP8", "GP9")
+idleValue = 1000        # value read from every sensor when no sensorSource is set
+sensorSource = None     # function of (row, col) that returns a 16-bit sensor value
+readCount = 0           # total number of analog reads
+
+# FUNCTION THAT RETURNS THE ROW AND COLUMN THE MUX SELECTION PINS ARE SET TO
+def SelectedSensor():
+    row = 0
+    col = 0
+    for bitCounter in range(4):
+        rowPin = digitalio.pinsByName.get(rowPinNames[bitCounter])
+        colPin = digitalio.pinsByName.get(colPinNames[bitCounter])
+        if rowPin is not None and rowPin.outputValue:
+            row |= 1 << bitCounter
+        if colPin is not None and colPin.outputValue:
+            col |= 1 << bitCounter
+    return row, col
+
+class AnalogIn:
+    def __init__(self, pin):
+        self.pin = pin
+
+    @property
+    def value(self):
+        global readCount
+        readCount += 1
+        if sensorSource is None:
+            return idleValue
+        row, col = SelectedSensor()
+        return sensorSource(row, col)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,15 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON board MODULE.
+   EVERY RP2040 GPIO PIN IS A SIMPLE OBJECT THAT ONLY KNOWS ITS NAME.
+"""
+
+# CLASS THAT REPRESENTS ONE PIN OF THE BOARD
+class Pin:
+    def __init__(self, name):
+        self.name = name
+    def __repr__(self):
+        return "board." + self.name
+
+# CREATE GP0 TO GP29
+for pinCounter in range(30):
+    globals()["GP" + str(pinCounter)] = Pin("GP" + str(pinCounter))
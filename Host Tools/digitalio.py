@@ -0,0 +1,50 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON digitalio MODULE.
+   EVERY PIN THAT IS CREATED IS KEPT BY NAME IN pinsByName, SO OTHER STAND-INS (LIKE analogio) CAN SEE
+   WHAT THE MUX SELECTION PINS ARE SET TO. INPUT PINS READ THEIR PULL LEVEL, UNLESS A LEVEL HAS BEEN
+   SET WITH SetInputLevel TO SIMULATE A BUTTON OR SWITCH.
+"""
+
+pinsByName = {}         # every DigitalInOut created, by pin name
+inputLevels = {}        # levels forced onto input pins, by pin name
+pinWriteCount = 0       # total number of writes to output pins
+
+class Direction:
+    INPUT = 0
+    OUTPUT = 1
+
+class Pull:
+    UP = 1
+    DOWN = 2
+
+# FUNCTION TO SIMULATE A LEVEL ON AN INPUT PIN (None GOES BACK TO THE PULL LEVEL)
+def SetInputLevel(pinName, level):
+    if level is None:
+        inputLevels.pop(pinName, None)
+    else:
+        inputLevels[pinName] = level
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.outputValue = False
+        pinsByName[pin.name] = self
+
+    @property
+    def value(self):
+        if self.direction == Direction.OUTPUT:
+            return self.outputValue
+        if self.pin.name in inputLevels:
+            return inputLevels[self.pin.name]
+        return self.pull == Pull.UP
+
+    @value.setter
+    def value(self, newValue):
+        global pinWriteCount
+        pinWriteCount += 1
+        self.outputValue = bool(newValue)
+
+    def deinit(self):
+        pinsByName.pop(self.pin.name, None)
@@ -0,0 +1,9 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON storage MODULE.
+   REMOUNTING ONLY KEEPS THE REQUESTED STATE IN mountStates, SINCE THE COMPUTER'S FILES ARE ALWAYS WRITABLE.
+"""
+
+mountStates = {}        # read-only state requested for every remounted path, by path
+
+def remount(mount_path, readonly=False, disable_concurrent_write_protection=False):
+    mountStates[mount_path] = readonly
@@ -0,0 +1,45 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON usb_cdc MODULE.
+   EVERY PORT IS A LOOPBACK: BYTES WRITTEN TO IT ARE KEPT, AND CAN BE READ BACK AS THE PC WOULD RECEIVE THEM.
+   SET writeLimit ON A PORT TO SIMULATE A PC THAT IS NOT KEEPING UP, SO WRITES ONLY SEND PART OF THEIR BYTES.
+"""
+
+class Serial:
+    def __init__(self):
+        self.connected = True
+        self.timeout = 1
+        self.write_timeout = None
+        self.writeLimit = None      # most bytes a single write sends (None = no limit)
+        self.loopback = bytearray()
+
+    # LIKE THE REAL PORT, ANY BUFFER CAN BE WRITTEN (SUCH AS AN array), AND THE LIMIT AND RESULT COUNT ITS BYTES
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        bytesToWrite = len(data)
+        if self.writeLimit is not None:
+            bytesToWrite = min(bytesToWrite, self.writeLimit)
+        self.loopback += bytes(data[0:bytesToWrite])
+        return bytesToWrite
+
+    @property
+    def in_waiting(self):
+        return len(self.loopback)
+
+    def read(self, size=1):
+        readBytes = bytes(self.loopback[0:size])
+        del self.loopback[0:size]
+        return readBytes
+
+    def reset_input_buffer(self):
+        self.loopback = bytearray()
+
+console = Serial()
+data = None
+
+# THE data ARGUMENT HIDES THE MODULE'S data PORT INSIDE enable, SO THE PORT IS SET UP BY A SECOND FUNCTION
+def enable(console=True, data=False):
+    EnableDataPort(data)
+
+def EnableDataPort(enabled):
+    global data
+    data = Serial() if enabled else None
@@ -0,0 +1,40 @@
+"""
+   HOST STAND-IN FOR THE CIRCUITPYTHON usb_hid MODULE.
+   DEVICES KEEP EVERY REPORT SENT TO THEM IN sentReports, AND THE TIME (IN ns) IT WAS SENT AT IN reportTimes.
+"""
+import time
+
+class Device:
+    KEYBOARD = None
+    MOUSE = None
+    CONSUMER_CONTROL = None
+
+    def __init__(self, report_descriptor=b"", usage_page=0, usage=0, report_ids=(0,),
+                 in_report_lengths=(0,), out_report_lengths=(0,)):
+        self.report_descriptor = report_descriptor
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_ids = report_ids
+        self.in_report_lengths = in_report_lengths
+        self.out_report_lengths = out_report_lengths
+        self.sentReports = []
+        self.reportTimes = []
+
+    def send_report(self, report, report_id=None):
+        self.sentReports.append(bytes(report))
+        self.reportTimes.append(time.monotonic_ns())
+
+Device.KEYBOARD = Device(usage_page=0x01, usage=0x06, report_ids=(1,), in_report_lengths=(8,))
+Device.MOUSE = Device(usage_page=0x01, usage=0x02, report_ids=(2,), in_report_lengths=(4,))
+Device.CONSUMER_CONTROL = Device(usage_page=0x0C, usage=0x01, report_ids=(3,), in_report_lengths=(2,))
+
+devices = [Device.KEYBOARD, Device.MOUSE, Device.CONSUMER_CONTROL]
+enabledDevices = None       # devices passed to enable(), as boot.py would
+
+def enable(newDevices, boot_device=0):
+    global enabledDevices, devices
+    enabledDevices = tuple(newDevices)
+    devices = list(newDevices)
+
+def disable():
+    enable(())